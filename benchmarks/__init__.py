@@ -0,0 +1,2 @@
+from .fakes import HashingEmbedding, create_service_context
+from .synthetic import generate_movies, generate_queries, write_movies_csv
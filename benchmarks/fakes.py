@@ -0,0 +1,61 @@
+import re
+import zlib
+import numpy as np
+from typing import List
+from llama_index import ServiceContext
+from llama_index.embeddings.base import BaseEmbedding
+
+from src.config.settings import EMBEDDING_DIMENSION
+from src.utils.llm import SimulatedLLM
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedding(BaseEmbedding):
+    """
+    Deterministic bag-of-words embedder for offline runs.
+
+    Each token is hashed to a signed coordinate, so texts sharing words
+    land close together without downloading a model.
+    """
+
+    model_name: str = f"hashing-{EMBEDDING_DIMENSION}"
+    dimension: int = EMBEDDING_DIMENSION
+    embed_batch_size: int = 256
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashingEmbedding"
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dimension), dtype='float32')
+        for i, text in enumerate(texts):
+            for token in _TOKEN.findall(text.lower()):
+                h = zlib.crc32(token.encode())
+                vectors[i, h % self.dimension] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+    def get_query_embedding_batch(self, queries: List[str]) -> List[List[float]]:
+        return self._embed(queries)
+
+
+def create_service_context(llm_latency: float = 0.0) -> ServiceContext:
+    """Service context with the hashing embedder and a simulated LLM."""
+    return ServiceContext.from_defaults(
+        embed_model=HashingEmbedding(),
+        llm=SimulatedLLM(latency=llm_latency)
+    )
@@ -0,0 +1,318 @@
+"""
+Offline benchmark suite.
+
+Runs ingestion, index build/load, query latency, filtered and sharded search and
+incremental updates over a synthetic catalog with the hashing embedder and
+simulated LLM, and writes the results as JSON:
+
+    python -m benchmarks.run --rows 100000 --output results.json
+    python -m benchmarks.run --rows 100000 --baseline results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from llama_index import Document
+
+from src.data.data_loader import MovieDataLoader
+from src.indexing.vector_store import MovieVectorStore
+from src.recommender.query_engine import MovieQueryEngine
+from src.utils.metrics import metrics
+from .fakes import create_service_context
+from .synthetic import generate_queries, write_movies_csv
+
+logger = logging.getLogger(__name__)
+
+# Lower is better for every reported metric whose name ends with one of these.
+TIMING_SUFFIXES = ('seconds', '_p50', '_p95', '_p99')
+
+
+def latency_summary(samples: List[float], prefix: str = "latency") -> Dict[str, float]:
+    values = np.array(samples)
+    p50, p95, p99 = np.quantile(values, [0.5, 0.95, 0.99])
+    return {
+        f"{prefix}_p50": float(p50),
+        f"{prefix}_p95": float(p95),
+        f"{prefix}_p99": float(p99),
+        f"{prefix}_mean": float(values.mean()),
+        'queries_per_second': len(values) / float(values.sum())
+    }
+
+
+def measure(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_ingestion(csv_path: Path, workers: int) -> Tuple[Dict[str, Any], Any, list]:
+    loader = MovieDataLoader(data_file=str(csv_path), workers=workers, use_cache=False)
+    df, documents = loader.load_and_preprocess()
+    return {
+        'seconds': loader.stats['seconds'],
+        'rows_per_second': loader.stats['rows_per_second'],
+        'rows_kept': len(df),
+        'documents': len(documents)
+    }, df, documents
+
+
+def bench_index(documents, index_dir: Path, service_context) -> Tuple[Dict[str, Any], MovieVectorStore]:
+    build_store = MovieVectorStore(service_context=service_context, use_embedding_cache=False, index_dir=index_dir)
+    build_seconds = measure(lambda: build_store.initialize_index(documents))
+
+    load_store = MovieVectorStore(
+        service_context=service_context,
+        use_embedding_cache=False,
+        index_dir=index_dir,
+        search_cache_bytes=0
+    )
+    load_seconds = measure(lambda: load_store.initialize_index(documents))
+    return {
+        'build_seconds': build_seconds,
+        'documents_per_second': len(documents) / build_seconds,
+        'load_seconds': load_seconds
+    }, load_store
+
+
+def bench_queries(store: MovieVectorStore, df, queries: List[str], top_k: int) -> Dict[str, Any]:
+    engine = MovieQueryEngine(store.get_query_engine(top_k=top_k), df, store, top_k)
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        nodes = store.retrieve(engine.retrieval_query(query), top_k)
+        engine.format_response(engine.explain(query, nodes))
+        samples.append(time.perf_counter() - start)
+    return latency_summary(samples)
+
+
+def bench_search(store: MovieVectorStore, queries: List[str], top_k: int, backend: str) -> Dict[str, Any]:
+    vectors = [store.embed_query(query) for query in queries]
+    store.use_backend(backend)
+    samples = [measure(lambda v=v: store.search(v, top_k, backend=backend)) for v in vectors]
+    return latency_summary(samples)
+
+
+def bench_filtered_search(store: MovieVectorStore, queries: List[str], top_k: int) -> Dict[str, Any]:
+    vectors = [store.embed_query(query) for query in queries]
+    filters = [
+        {'genres': ['Drama']},
+        {'genres': ['Western'], 'ranges': {'vote_average': (7.0, None)}},
+        {'ranges': {'budget': (1_000_000, 50_000_000), 'runtime': (80, 120)}}
+    ]
+    store.metadata_index  # built once, outside the timed region
+
+    results = {}
+    for i, f in enumerate(filters):
+        samples = [
+            measure(lambda v=v: store.retrieve(v, top_k, genres=f.get('genres'), ranges=f.get('ranges')))
+            for v in vectors
+        ]
+        allowed = store.metadata_index.select(f.get('genres'), f.get('ranges'))
+        results[f"filter_{i}"] = {
+            'filter': json.dumps(f),
+            'selectivity': len(allowed) / len(store.row_doc_ids),
+            **latency_summary(samples)
+        }
+    return results
+
+
+def bench_sharded_search(
+    store: MovieVectorStore,
+    queries: List[str],
+    top_k: int,
+    shard_counts: List[int],
+    batch_size: int = 32
+) -> Dict[str, Any]:
+    """Single-query latency and batch throughput with one worker process per shard."""
+    vectors = np.array([store.embed_query(query) for query in queries], dtype='float32')
+    batches = [vectors[i:i + batch_size] for i in range(0, len(vectors), batch_size)]
+
+    results = {}
+    for n_shards in shard_counts:
+        sync_seconds = measure(lambda: store.enable_sharding(n_shards, workers=n_shards))
+        store.shards.warmup(store.dimension)
+        samples = [measure(lambda v=v: store.search(v, top_k)) for v in vectors]
+        batch_seconds = sum(measure(lambda b=b: store.search_batch(b, top_k)) for b in batches)
+        results[f"shards_{n_shards}"] = {
+            'sync_seconds': sync_seconds,
+            **latency_summary(samples),
+            'batch_queries_per_second': len(vectors) / batch_seconds
+        }
+    store.disable_sharding()
+
+    if shard_counts:
+        base = results[f"shards_{shard_counts[0]}"]['batch_queries_per_second']
+        for n_shards in shard_counts:
+            scenario = results[f"shards_{n_shards}"]
+            scenario['throughput_scaling'] = scenario['batch_queries_per_second'] / base
+    return results
+
+
+def bench_updates(store: MovieVectorStore, documents, batch_size: int) -> Dict[str, Any]:
+    """Cost of a logged upsert and delete batch, and of folding the log into a snapshot."""
+    originals = documents[:batch_size]
+    edited = [Document(id_=doc.id_, text=doc.text + " (restored edition)", metadata=doc.metadata) for doc in originals]
+    removed = documents[batch_size:2 * batch_size]
+
+    upsert_seconds = measure(lambda: store.update_documents(edited, batch_size=batch_size))
+    delete_seconds = measure(lambda: store.delete_documents([doc.id_ for doc in removed]))
+    compaction_seconds = measure(store.compact)
+
+    # Put the corpus back so a reused --work-dir still matches its manifest.
+    store.update_documents(originals + removed, batch_size=batch_size)
+    store.compact()
+    return {
+        'batch_size': batch_size,
+        'upsert_seconds': upsert_seconds,
+        'delete_seconds': delete_seconds,
+        'compaction_seconds': compaction_seconds
+    }
+
+
+def bench_rebuild(store: MovieVectorStore, documents, queries: List[str], top_k: int) -> Dict[str, Any]:
+    """Search latency while idle and while a new index generation is built and swapped in."""
+    vectors = [store.embed_query(query) for query in queries]
+    idle = [measure(lambda v=v: store.search(v, top_k)) for v in vectors]
+
+    during = []
+    start = time.perf_counter()
+    thread = store.rebuild(documents)
+    while thread.is_alive():
+        for v in vectors:
+            during.append(measure(lambda v=v: store.search(v, top_k)))
+            if not thread.is_alive():
+                break
+    rebuild_seconds = time.perf_counter() - start
+    if store.rebuild_status['state'] != 'swapped':
+        raise RuntimeError(f"Rebuild failed: {store.rebuild_status.get('error')}")
+    return {
+        'idle': latency_summary(idle),
+        'during_rebuild': latency_summary(during),
+        'rebuild_seconds': rebuild_seconds,
+        'sample_recall': store.rebuild_status['sample_recall']
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="movie-bench-"))
+    csv_path = work_dir / f"movies_{args.rows}_{args.seed}.csv"
+    if not csv_path.exists():
+        logger.info("Generating %d synthetic movies in %s", args.rows, csv_path)
+        write_movies_csv(csv_path, args.rows, args.seed)
+
+    service_context = create_service_context(args.llm_latency)
+    queries = generate_queries(args.queries, args.seed + 1)
+    metrics.reset()
+
+    scenarios: Dict[str, Any] = {}
+    scenarios['ingestion'], df, documents = bench_ingestion(csv_path, args.workers)
+    scenarios['index'], store = bench_index(documents, work_dir / f"index_{args.rows}_{args.seed}", service_context)
+    scenarios['query_latency'] = bench_queries(store, df, queries, args.top_k)
+    for backend in args.backends:
+        scenarios[f"search_{backend}"] = bench_search(store, queries, args.top_k, backend)
+    scenarios['filtered_search'] = bench_filtered_search(store, queries, args.top_k)
+    if args.shards:
+        scenarios['sharded_search'] = bench_sharded_search(store, queries, args.top_k, args.shards)
+    scenarios['updates'] = bench_updates(store, documents, args.update_batch)
+    scenarios['rebuild'] = bench_rebuild(store, documents, queries, args.top_k)
+    snapshot = metrics.snapshot()
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'rows': args.rows,
+            'seed': args.seed,
+            'queries': args.queries,
+            'top_k': args.top_k,
+            'llm_latency': args.llm_latency
+        },
+        'scenarios': scenarios,
+        'stages': snapshot['stages'],
+        'values': snapshot['values']
+    }
+
+
+def _flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List timing metrics that got more than `tolerance` slower than the baseline."""
+    current = _flatten(results['scenarios'])
+    previous = _flatten(baseline['scenarios'])
+    regressions = []
+    for name, value in sorted(current.items()):
+        if not name.endswith(TIMING_SUFFIXES) or name not in previous or previous[name] <= 0:
+            continue
+        change = value / previous[name] - 1
+        if change > tolerance:
+            regressions.append(f"{name}: {previous[name]:.6f} -> {value:.6f} (+{change:.0%})")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline recommendation pipeline benchmarks")
+    parser.add_argument('--rows', type=int, default=10_000, help="Synthetic catalog size, e.g. 10000, 100000, 1000000")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=1, help="Ingestion worker processes")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Simulated LLM latency in seconds")
+    parser.add_argument('--backends', nargs='+', default=['flat', 'ivf', 'hnsw'])
+    parser.add_argument('--shards', nargs='*', type=int, default=[1, 2, 4],
+                        help="Shard counts for the sharded search scenario; none to skip")
+    parser.add_argument('--update-batch', type=int, default=100, help="Documents per upsert/delete batch in the update scenario")
+    parser.add_argument('--work-dir', help="Where the CSV and index are kept; reused across runs")
+    parser.add_argument('--output', help="Write results JSON here instead of stdout")
+    parser.add_argument('--baseline', help="Results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before failing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    results = run(args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for regression in regressions:
+            logger.warning("Regression %s", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
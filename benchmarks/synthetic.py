@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+GENRES = [
+    (28, 'Action'), (12, 'Adventure'), (16, 'Animation'), (35, 'Comedy'),
+    (80, 'Crime'), (99, 'Documentary'), (18, 'Drama'), (10751, 'Family'),
+    (14, 'Fantasy'), (36, 'History'), (27, 'Horror'), (10402, 'Music'),
+    (9648, 'Mystery'), (10749, 'Romance'), (878, 'Science Fiction'),
+    (10770, 'TV Movie'), (53, 'Thriller'), (10752, 'War'), (37, 'Western')
+]
+
+# Relative frequencies roughly follow the Kaggle catalog, where drama and
+# comedy dominate.
+GENRE_WEIGHTS = np.array([
+    6.6, 3.5, 1.9, 13.2, 4.3, 3.9, 20.3, 2.8, 2.3, 1.4,
+    4.7, 1.6, 2.5, 6.7, 3.0, 0.8, 7.6, 1.3, 1.1
+])
+
+GENRE_WORDS = {
+    'Action': "explosive chase fight mission agent weapon",
+    'Adventure': "journey quest treasure expedition island",
+    'Animation': "animated cartoon talking animals colorful",
+    'Comedy': "funny hilarious misadventure awkward prank",
+    'Crime': "heist detective gang murder police",
+    'Documentary': "true story interviews footage real",
+    'Drama': "family struggle loss relationship emotional",
+    'Family': "kids parents holiday friendship heartwarming",
+    'Fantasy': "magic wizard dragon kingdom spell",
+    'History': "historical empire revolution century king",
+    'Horror': "haunted terrifying ghost demon blood",
+    'Music': "band singer concert song musician",
+    'Mystery': "secret clue disappearance puzzle investigation",
+    'Romance': "love couple wedding passion heart",
+    'Science Fiction': "space alien future robot planet",
+    'TV Movie': "television special network episode",
+    'Thriller': "suspense conspiracy danger hunt escape",
+    'War': "soldier battle army front world",
+    'Western': "cowboy frontier outlaw sheriff desert"
+}
+
+TITLE_ADJECTIVES = [
+    "Silent", "Last", "Dark", "Broken", "Golden", "Hidden", "Lost", "Red",
+    "Endless", "Final", "Secret", "Wild", "Frozen", "Burning", "Little", "Midnight"
+]
+TITLE_NOUNS = [
+    "Harbor", "Kingdom", "River", "Promise", "Storm", "Garden", "Empire",
+    "Journey", "Shadow", "Horizon", "Frontier", "City", "Station", "Memory", "Signal"
+]
+FILLER_WORDS = "a the of and in to who with when after their world life story young man woman".split()
+LANGUAGES = np.array(['en', 'fr', 'it', 'ja', 'de', 'es', 'ru', 'hi'])
+LANGUAGE_WEIGHTS = np.array([0.71, 0.06, 0.03, 0.04, 0.03, 0.03, 0.02, 0.08])
+
+COLUMNS = [
+    'adult', 'belongs_to_collection', 'budget', 'genres', 'homepage', 'id',
+    'imdb_id', 'original_language', 'original_title', 'overview', 'popularity',
+    'poster_path', 'production_companies', 'production_countries', 'release_date',
+    'revenue', 'runtime', 'spoken_languages', 'status', 'tagline', 'title',
+    'video', 'vote_average', 'vote_count'
+]
+
+
+def _genre_strings(rng: np.random.Generator, n: int):
+    counts = rng.choice(4, size=n, p=[0.05, 0.35, 0.35, 0.25])
+    probabilities = GENRE_WEIGHTS / GENRE_WEIGHTS.sum()
+    picks = [rng.choice(len(GENRES), size=count, replace=False, p=probabilities) for count in counts]
+    strings = [str([{'id': GENRES[g][0], 'name': GENRES[g][1]} for g in pick]) for pick in picks]
+    return strings, picks
+
+
+def _overviews(rng: np.random.Generator, picks, missing: np.ndarray):
+    genre_words = [GENRE_WORDS[name].split() for _, name in GENRES]
+    lengths = rng.integers(8, 40, size=len(picks))
+    overviews = []
+    for pick, length, is_missing in zip(picks, lengths, missing):
+        if is_missing:
+            overviews.append(None)
+            continue
+        vocabulary = FILLER_WORDS + [word for g in pick for word in genre_words[g]]
+        overviews.append(" ".join(rng.choice(vocabulary, size=length)).capitalize() + ".")
+    return overviews
+
+
+def generate_movies(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a catalog shaped like the Kaggle `movies_metadata.csv`.
+
+    Args:
+        n_rows: Number of movies
+        seed: Random seed; the same seed always yields the same catalog
+
+    Returns:
+        DataFrame with the raw CSV's columns, including stringified
+        `genres` and `belongs_to_collection` dicts
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n_rows + 1)
+
+    genres, picks = _genre_strings(rng, n_rows)
+    overviews = _overviews(rng, picks, rng.random(n_rows) < 0.02)
+
+    titles = (
+        np.array(["The "] * n_rows, dtype=object)
+        + rng.choice(TITLE_ADJECTIVES, size=n_rows).astype(object) + " "
+        + rng.choice(TITLE_NOUNS, size=n_rows).astype(object)
+    )
+    sequels = rng.random(n_rows) < 0.1
+    titles[sequels] = titles[sequels] + " " + rng.integers(2, 5, size=sequels.sum()).astype(str).astype(object)
+
+    in_collection = rng.random(n_rows) < 0.1
+    collection_ids = rng.integers(1, max(2, n_rows // 20), size=n_rows)
+    collections = np.where(
+        in_collection,
+        [str({'id': int(c), 'name': f"Collection {c}", 'poster_path': None, 'backdrop_path': None})
+         for c in collection_ids],
+        None
+    )
+
+    # About 60% of real movies have no recorded budget.
+    budgets = np.where(
+        rng.random(n_rows) < 0.6,
+        0,
+        np.round(rng.lognormal(16, 1.3, size=n_rows), -3)
+    ).astype(np.int64)
+    revenue = np.where(budgets > 0, np.round(budgets * rng.lognormal(0.5, 1.0, size=n_rows)), 0)
+    runtime = np.where(rng.random(n_rows) < 0.01, np.nan, np.clip(rng.normal(100, 22, size=n_rows), 1, 300).round())
+    vote_count = np.floor(rng.pareto(1.2, size=n_rows) * 10).astype(np.int64)
+    vote_average = np.where(vote_count > 0, np.clip(rng.normal(6.0, 1.3, size=n_rows), 0, 10).round(1), 0.0)
+    release = pd.Timestamp("1930-01-01") + pd.to_timedelta(rng.integers(0, 32000, size=n_rows), unit="D")
+    languages = rng.choice(LANGUAGES, size=n_rows, p=LANGUAGE_WEIGHTS)
+
+    return pd.DataFrame({
+        'adult': 'False',
+        'belongs_to_collection': collections,
+        'budget': budgets,
+        'genres': genres,
+        'homepage': None,
+        'id': ids,
+        'imdb_id': [f"tt{i:07d}" for i in ids],
+        'original_language': languages,
+        'original_title': titles,
+        'overview': overviews,
+        'popularity': np.round(rng.lognormal(0.5, 1.2, size=n_rows), 6),
+        'poster_path': None,
+        'production_companies': '[]',
+        'production_countries': "[{'iso_3166_1': 'US', 'name': 'United States of America'}]",
+        'release_date': release.strftime("%Y-%m-%d"),
+        'revenue': revenue,
+        'runtime': runtime,
+        'spoken_languages': '[]',
+        'status': 'Released',
+        'tagline': None,
+        'title': titles,
+        'video': 'False',
+        'vote_average': vote_average,
+        'vote_count': vote_count
+    }, columns=COLUMNS)
+
+
+def write_movies_csv(path: Path, n_rows: int, seed: int = 0) -> Path:
+    """Write a synthetic catalog to `path` and return it."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    generate_movies(n_rows, seed).to_csv(path, index=False)
+    return path
+
+
+def generate_queries(n_queries: int, seed: int = 1):
+    """Natural-language requests built from the same genre vocabulary as the catalog."""
+    rng = np.random.default_rng(seed)
+    names = [name for _, name in GENRES]
+    queries = []
+    for _ in range(n_queries):
+        genre = names[rng.integers(len(names))]
+        words = rng.choice(GENRE_WORDS[genre].split(), size=2, replace=False)
+        queries.append(f"I want a {genre.lower()} movie with {words[0]} and {words[1]}")
+    return queries
@@ -1,7 +1,11 @@
+import argparse
 import logging
-from src.config.settings import AZURE_CREDENTIALS
+from src.config.settings import AZURE_CREDENTIALS, LLM_BACKEND, SERVER_HOST, SERVER_PORT
 from src.data.data_loader import MovieDataLoader
 from src.recommender.chatbot import MovieRecommendationBot
+from src.serving.server import run_server
+from src.utils.llm import create_llm
+from src.utils.metrics import metrics, profile
 
 logging.basicConfig(
     level=logging.INFO,
@@ -9,7 +13,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CLI_SESSION = "cli"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Movie Recommendation Chatbot")
+    parser.add_argument('--serve', action='store_true', help="Serve the HTTP API instead of the interactive prompt")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--llm', choices=['azure', 'simulated'], default=LLM_BACKEND, help="LLM backend")
+    parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'], help="Profile each interactive query")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     try:
         logger.info("Loading and preprocessing movie data...")
         data_loader = MovieDataLoader()
@@ -19,23 +35,50 @@ def main():
         chatbot = MovieRecommendationBot(
             documents=documents,
             movie_data=df,
-            azure_credentials=AZURE_CREDENTIALS
+            catalog=data_loader.catalog,
+            azure_credentials=AZURE_CREDENTIALS,
+            llm=create_llm(AZURE_CREDENTIALS, backend=args.llm)
         )
         
+        if args.serve:
+            run_server(chatbot, args.host, args.port)
+            return
+        
         print("\nMovie Recommendation Chatbot")
-        print("Type 'quit' to exit")
+        print("Type 'quit' to exit, 'new' to start over")
         print("="*50)
         
         while True:
             query = input("\nWhat kind of movie are you looking for? ")
             
             if query.lower() == 'quit':
+                chatbot.cleanup()
+                logger.info(f"Stage timings: {metrics.snapshot()}")
                 break
+            
+            if query.lower() == 'new':
+                chatbot.end_session(CLI_SESSION)
+                continue
                 
             try:
-                response = chatbot.get_recommendation(query)
+                if args.profile:
+                    with profile(args.profile) as result:
+                        stream = chatbot.stream_chat(query, CLI_SESSION)
+                        chunks = list(stream)
+                    print("\nRecommendations:")
+                    print("".join(chunks))
+                    print(result.report)
+                    continue
+                
+                stream = chatbot.stream_chat(query, CLI_SESSION)
                 print("\nRecommendations:")
-                print(response)
+                for chunk in stream:
+                    print(chunk, end="", flush=True)
+                print()
+                logger.info(
+                    f"Time to first token: {stream.time_to_first_token or 0:.2f}s, "
+                    f"total: {stream.total_seconds:.2f}s"
+                )
             except Exception as e:
                 logger.error(f"Error processing query: {e}")
                 print("Sorry, I encountered an error. Please try a different query.")
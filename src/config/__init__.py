@@ -3,4 +3,4 @@ from .settings import (
     EMBEDDING_MODEL,
     EMBEDDING_DIMENSION,
     TOP_K_RECOMMENDATIONS
-)c
\ No newline at end of file
+)
\ No newline at end of file
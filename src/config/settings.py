@@ -12,6 +12,8 @@ PROCESSED_DATA_DIR = DATA_DIR / "processed"
 
 GENERATED_DIR = ROOT_DIR / "generated"
 INDEX_DIR = GENERATED_DIR / "movie_index"
+EMBEDDING_CACHE_DIR = GENERATED_DIR / "embedding_cache"
+RESPONSE_CACHE_DIR = GENERATED_DIR / "response_cache"
 
 AZURE_CREDENTIALS = {
     'AD_DEPLOYMENT_ID': os.getenv('AD_DEPLOYMENT_ID'),
@@ -24,6 +26,86 @@ AZURE_CREDENTIALS = {
 EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
 EMBEDDING_DIMENSION = 384
 DEVICE = "cuda" if os.getenv("USE_GPU", "false").lower() == "true" else "cpu"
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_MAX_LENGTH = 512
+EMBEDDING_PRECISION = os.getenv("EMBEDDING_PRECISION", "fp32")  # fp32, int8 or onnx
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", os.cpu_count() or 1))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+EMBEDDING_PARALLEL_THRESHOLD = 512
+
+ANN_BACKEND = os.getenv("ANN_BACKEND", "ivf")
+ANN_PARAMS = {
+    'ivf': {'nlist': 100, 'nprobe': 8},
+    'hnsw': {'M': 32, 'ef_construction': 80, 'ef_search': 64}
+}
+NEIGHBOR_GRAPH_SIZE = 20
+
+# Sharded search: FAISS rows split into SHARD_COUNT shards ('hash' or
+# 'genre' partitioning) searched by SHARD_WORKERS processes; a count of 0
+# or 1 keeps the single in-process index, 0 workers searches shards inline
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0"))
+SHARD_PARTITION = os.getenv("SHARD_PARTITION", "hash")
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", str(min(max(SHARD_COUNT, 1), os.cpu_count() or 1))))
+
+# Logged upserts/deletes after which the update log is folded into a new
+# index snapshot in the background
+COMPACTION_THRESHOLD = int(os.getenv("COMPACTION_THRESHOLD", "1000"))
+
+# Background rebuilds: index generations kept on disk (the live one
+# included), and the checks a new generation must pass before it is
+# swapped in: recall@REBUILD_RECALL_K against the live generation on
+# REBUILD_SAMPLE_SIZE held-out queries, and at most REBUILD_MAX_SHRINK of
+# the catalog lost
+INDEX_GENERATIONS_KEPT = 2
+REBUILD_SAMPLE_SIZE = 200
+REBUILD_RECALL_K = 10
+REBUILD_MIN_RECALL = 0.95
+REBUILD_MAX_SHRINK = 0.5
 
 TOP_K_RECOMMENDATIONS = 3
-MIN_BUDGET_FILTER = 1_000_000
\ No newline at end of file
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Retrieval-only mode: FAISS candidates per requested result, and the
+# blend of similarity and movie quality used to re-rank them
+FAST_RETRIEVAL_OVERSAMPLE = 4
+FUSION_WEIGHTS = {'similarity': 0.7, 'rating': 0.2, 'popularity': 0.1}
+
+# Synthesis context: token budget for the packed movie list, and overview
+# sentences kept per movie
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+CONTEXT_MAX_SENTENCES = 3
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "azure")
+LLM_MAX_RETRIES = 3
+LLM_BACKOFF_SECONDS = 0.5
+LLM_TIMEOUT_SECONDS = 60.0
+SIMULATED_LLM_LATENCY = float(os.getenv("SIMULATED_LLM_LATENCY", "0.5"))
+
+# Multi-turn chat: candidates kept per session for refining in memory, the
+# query similarity above which a turn rephrases the current request, and
+# bounds on the session store
+SESSION_CANDIDATES = 100
+SESSION_SAME_INTENT_THRESHOLD = 0.85
+SESSION_MAX_COUNT = 10_000
+SESSION_TTL_SECONDS = 1800
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+
+RESPONSE_CACHE_THRESHOLD = 0.92
+RESPONSE_CACHE_SIZE = 1000
+RESPONSE_CACHE_TTL_SECONDS = 3600
+PERSIST_RESPONSE_CACHE = os.getenv("PERSIST_RESPONSE_CACHE", "false").lower() == "true"
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_SAMPLE_SIZE = 2048
+
+SEARCH_THREADS = 4
+SEARCH_CACHE_BYTES = 32 * 1024 * 1024
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+MIN_BUDGET_FILTER = 1_000_000
+# Vote-count quantile used as the prior weight in the weighted rating
+WEIGHTED_RATING_QUANTILE = 0.9
+
+INGEST_CHUNK_SIZE = 20_000
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+PROCESSED_CACHE_VERSION = 1
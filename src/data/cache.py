@@ -0,0 +1,77 @@
+import hashlib
+import json
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..config.settings import PROCESSED_DATA_DIR, PROCESSED_CACHE_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessedDataCache:
+    """
+    Columnar cache of the filtered, preprocessed movie catalog.
+
+    The catalog is stored as a Parquet file in `PROCESSED_DATA_DIR` whose name
+    embeds a fingerprint of the raw CSV contents and the preprocessing
+    settings, so a stale cache is simply never found.
+    """
+
+    def __init__(self, cache_dir: Path = PROCESSED_DATA_DIR, prefix: str = "movies"):
+        self.cache_dir = Path(cache_dir)
+        self.prefix = prefix
+
+    def fingerprint(self, source: Path, settings: Dict[str, Any]) -> str:
+        """Hash the raw file contents together with the preprocessing settings."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps(
+            {'version': PROCESSED_CACHE_VERSION, **settings},
+            sort_keys=True,
+            default=str
+        ).encode())
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def path_for(self, fingerprint: str) -> Path:
+        return self.cache_dir / f"{self.prefix}_{fingerprint}.parquet"
+
+    def load(self, fingerprint: str) -> Optional[pd.DataFrame]:
+        """Load the cached catalog, or return None on a miss."""
+        path = self.path_for(fingerprint)
+        if not path.exists():
+            return None
+
+        try:
+            table = pq.read_table(path)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("Ignoring unreadable processed cache %s: %s", path, e)
+            return None
+
+        columns = table.column_names
+        genres = table.column('genres').to_pylist()
+        df = table.drop(['genres']).to_pandas()
+        df['genres'] = ['NULL' if g is None else g for g in genres]
+        return df[[c for c in columns if c in df.columns]]
+
+    def save(self, fingerprint: str, df: pd.DataFrame):
+        """Write the catalog with genres as a list column and drop stale caches."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(fingerprint)
+
+        frame = df.copy()
+        frame['genres'] = [g if isinstance(g, list) else None for g in frame['genres']]
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+
+        tmp_path = path.with_suffix('.tmp')
+        pq.write_table(table, tmp_path)
+        tmp_path.replace(path)
+
+        for stale in self.cache_dir.glob(f"{self.prefix}_*.parquet"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
@@ -1,43 +1,137 @@
+import logging
+import time
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
-from ..config.settings import RAW_DATA_DIR, MIN_BUDGET_FILTER
+from ..config.settings import RAW_DATA_DIR, MIN_BUDGET_FILTER, INGEST_CHUNK_SIZE, INGEST_WORKERS
+from ..models.catalog import MovieCatalog
+from ..utils.metrics import metrics, timer
+from .cache import ProcessedDataCache
 from .preprocessor import MoviePreprocessor
 
+logger = logging.getLogger(__name__)
+
+OUTPUT_COLUMNS = [
+    'adult',
+    'belongs_to_collection',
+    'budget',
+    'genres',
+    'original_language',
+    'original_title',
+    'overview',
+    'popularity',
+    'revenue',
+    'runtime',
+    'vote_average',
+    'vote_count'
+]
+
+# Everything is read as text: the raw Kaggle file has shifted rows with
+# strings in numeric columns, so numerics are coerced explicitly afterwards.
+RAW_DTYPES = {column: object for column in OUTPUT_COLUMNS}
+
+
+def _preprocess_chunk(chunk: pd.DataFrame, min_budget: float) -> pd.DataFrame:
+    """Module-level worker so chunks can be shipped to a process pool."""
+    return MoviePreprocessor().preprocess_frame(chunk, min_budget)
+
+
 class MovieDataLoader:
-    def __init__(self, data_file: str = "movies_metadata.csv"):
+    def __init__(
+        self,
+        data_file: str = "movies_metadata.csv",
+        chunk_size: int = INGEST_CHUNK_SIZE,
+        workers: int = INGEST_WORKERS,
+        use_cache: bool = True
+    ):
         self.data_path = Path(RAW_DATA_DIR) / data_file
         self.preprocessor = MoviePreprocessor()
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.cache = ProcessedDataCache() if use_cache else None
+        self.stats: Dict[str, float] = {}
+        self.catalog: Optional[MovieCatalog] = None
 
     def load_and_preprocess(self) -> Tuple[pd.DataFrame, list]:
         """
         Load and preprocess the movie dataset.
-        
+
         Returns:
             Tuple containing:
             - Processed DataFrame
             - List of Document objects ready for indexing
+
+        The catalog's derived scores (ROI, engagement, weighted rating) are
+        computed alongside and kept in `self.catalog`.
         """
-        df = pd.read_csv(self.data_path)
-        df = df.apply(self.preprocessor.preprocess_row, axis=1)
-        
-        df = df[df['budget'] > MIN_BUDGET_FILTER]
-        
-        df = df[[
-            'adult',
-            'belongs_to_collection',
-            'budget',
-            'genres',
-            'original_language',
-            'original_title',
-            'overview',
-            'popularity',
-            'revenue',
-            'runtime',
-            'vote_average',
-            'vote_count'
-        ]]
-        
-        documents = self.preprocessor.create_documents(df)
-        return df, documents
\ No newline at end of file
+        start = time.perf_counter()
+        fingerprint = self._fingerprint() if self.cache else None
+
+        df = self.cache.load(fingerprint) if self.cache else None
+        if df is not None:
+            logger.info("Loaded preprocessed catalog from cache (%d movies)", len(df))
+            rows_read = len(df)
+        else:
+            with timer('ingest_read'):
+                df, rows_read = self._read_filtered_frame()
+            if self.cache:
+                self.cache.save(fingerprint, df)
+
+        with timer('create_documents'):
+            documents = self.preprocessor.create_documents(df)
+        with timer('catalog_scores'):
+            self.catalog = MovieCatalog.from_frame(df)
+        seconds = time.perf_counter() - start
+        metrics.observe('ingest', seconds)
+        self._record_stats(rows_read, len(df), seconds)
+        return df, documents
+
+    def _fingerprint(self) -> str:
+        return self.cache.fingerprint(self.data_path, {
+            'min_budget': MIN_BUDGET_FILTER,
+            'columns': OUTPUT_COLUMNS
+        })
+
+    def _read_filtered_frame(self) -> Tuple[pd.DataFrame, int]:
+        """Read the CSV in chunks and preprocess each chunk column-wise."""
+        reader = pd.read_csv(
+            self.data_path,
+            usecols=OUTPUT_COLUMNS,
+            dtype=RAW_DTYPES,
+            chunksize=self.chunk_size
+        )
+        process = partial(_preprocess_chunk, min_budget=MIN_BUDGET_FILTER)
+
+        rows_read = 0
+
+        def counted_chunks():
+            nonlocal rows_read
+            for chunk in reader:
+                rows_read += len(chunk)
+                yield chunk
+
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                frames = list(executor.map(process, counted_chunks()))
+        else:
+            frames = [process(chunk) for chunk in counted_chunks()]
+
+        df = pd.concat(frames) if frames else pd.DataFrame(columns=OUTPUT_COLUMNS)
+        return df[OUTPUT_COLUMNS], rows_read
+
+    def _record_stats(self, rows_read: int, rows_kept: int, seconds: float):
+        rows_per_second = rows_read / seconds if seconds > 0 else float('inf')
+        self.stats = {
+            'rows_read': rows_read,
+            'rows_kept': rows_kept,
+            'seconds': seconds,
+            'rows_per_second': rows_per_second
+        }
+        logger.info(
+            "Ingested %d rows (%d kept) in %.2fs (%.0f rows/s)",
+            rows_read, rows_kept, seconds, rows_per_second
+        )
+
@@ -0,0 +1,107 @@
+import ast
+import pandas as pd
+from typing import Any, Dict, List
+from llama_index import Document
+
+NUMERIC_COLUMNS = ['budget', 'popularity', 'revenue', 'runtime', 'vote_average', 'vote_count']
+
+
+def _literal(value: str) -> Any:
+    """Safely parse a Python-literal string such as the raw `genres` column."""
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+class MoviePreprocessor:
+    def preprocess_row(self, row: pd.Series) -> pd.Series:
+        """Process a single row of movie data."""
+        belongs_to_collection = row['belongs_to_collection']
+        belongs_to_collection = 'NULL' if pd.isnull(belongs_to_collection) else belongs_to_collection
+        belongs_to_collection = eval(belongs_to_collection)['name'] if belongs_to_collection != 'NULL' else 'NULL'
+
+        genres = row['genres']
+        genres = 'NULL' if pd.isnull(genres) else genres
+        if genres != 'NULL':
+            genres = eval(genres)
+            genres = [genre['name'] for genre in genres]
+
+        row['belongs_to_collection'] = belongs_to_collection
+        row['genres'] = genres
+
+        return row
+
+    def parse_genres(self, genres: pd.Series) -> pd.Series:
+        """
+        Parse the stringified genre lists of a whole column.
+
+        Each distinct string is parsed once with `ast.literal_eval`, which is
+        both safe and cheap because the catalog only has a few thousand
+        distinct genre combinations.
+        """
+        parsed: Dict[str, Any] = {}
+        for value in genres.dropna().unique():
+            items = _literal(value)
+            parsed[value] = [genre['name'] for genre in items] if isinstance(items, list) else []
+        return genres.map(parsed).where(genres.notna(), 'NULL')
+
+    def parse_collections(self, collections: pd.Series) -> pd.Series:
+        """Parse the stringified `belongs_to_collection` column into collection names."""
+        parsed: Dict[str, str] = {}
+        for value in collections.dropna().unique():
+            item = _literal(value)
+            parsed[value] = item.get('name', 'NULL') if isinstance(item, dict) else 'NULL'
+        return collections.map(parsed).fillna('NULL')
+
+    def preprocess_frame(self, df: pd.DataFrame, min_budget: float) -> pd.DataFrame:
+        """
+        Columnar equivalent of `preprocess_row` that also applies the budget filter.
+
+        Numeric columns are coerced first so the budget filter can drop rows
+        before any of the JSON-like columns are parsed.
+        """
+        df = df.copy()
+        for column in NUMERIC_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+
+        df = df[df['budget'] > min_budget].copy()
+        df['genres'] = self.parse_genres(df['genres'])
+        df['belongs_to_collection'] = self.parse_collections(df['belongs_to_collection'])
+        df['overview'] = df['overview'].fillna('')
+        return df
+
+    def create_documents(self, df: pd.DataFrame) -> List[Document]:
+        """Create Document objects from preprocessed DataFrame."""
+        rows = zip(
+            df.index.tolist(),
+            df['overview'].tolist(),
+            df['original_title'].tolist(),
+            df['genres'].tolist(),
+            df['belongs_to_collection'].tolist(),
+            df['budget'].astype('float64').tolist(),
+            df['popularity'].astype('float64').tolist(),
+            df['revenue'].astype('float64').tolist(),
+            df['runtime'].astype('float64').fillna(0.0).tolist(),
+            df['vote_average'].astype('float64').tolist(),
+            df['vote_count'].astype('float64').tolist()
+        )
+        return [
+            Document(
+                id_=str(i),
+                text=overview,
+                metadata={
+                    'title': title,
+                    'genres': genres,
+                    'belongs_to_collection': collection,
+                    'budget': budget,
+                    'popularity': popularity,
+                    'revenue': revenue,
+                    'runtime': runtime,
+                    'vote_average': vote_average,
+                    'vote_count': vote_count
+                }
+            )
+            for (i, overview, title, genres, collection, budget,
+                 popularity, revenue, runtime, vote_average, vote_count) in rows
+        ]
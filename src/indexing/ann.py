@@ -0,0 +1,110 @@
+import time
+import faiss
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+ANN_BACKENDS = ('flat', 'ivf', 'hnsw')
+
+# IVF k-means wants roughly this many training points per centroid.
+MIN_POINTS_PER_CENTROID = 39
+
+
+def build_index(backend: str, vectors: np.ndarray, params: Optional[Dict[str, Any]] = None) -> faiss.Index:
+    """
+    Build and populate an inner-product FAISS index over `vectors`.
+
+    IVF centroids are trained on the vectors themselves, so the index is
+    always usable as soon as it is returned.
+    """
+    params = params or {}
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    dimension = vectors.shape[1]
+
+    if backend == 'flat':
+        index = faiss.IndexFlatIP(dimension)
+    elif backend == 'ivf':
+        nlist = max(1, min(params.get('nlist', 100), len(vectors) // MIN_POINTS_PER_CENTROID))
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+    elif backend == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, params.get('M', 32), faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params.get('ef_construction', 80)
+    else:
+        raise ValueError(f"Unknown ANN backend '{backend}', expected one of {ANN_BACKENDS}")
+
+    index.add(vectors)
+    configure_index(index, params)
+    return index
+
+
+def configure_index(index: faiss.Index, params: Dict[str, Any]):
+    """Apply query-time knobs (`nprobe`, `ef_search`) to an index."""
+    if isinstance(index, faiss.IndexIVF) and 'nprobe' in params:
+        index.nprobe = min(params['nprobe'], index.nlist)
+    if isinstance(index, faiss.IndexHNSW) and 'ef_search' in params:
+        index.hnsw.efSearch = params['ef_search']
+
+
+def timed_search(index: faiss.Index, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Search one query at a time, returning ids and per-query latency in ms."""
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, found = index.search(query.reshape(1, -1), k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        ids[i] = found[0]
+    return ids, latencies
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Fraction of the exact top-k that the approximate search returned."""
+    hits = sum(len(set(t[t >= 0]) & set(f[f >= 0])) for t, f in zip(truth, found))
+    total = sum(int((t >= 0).sum()) for t in truth)
+    return hits / total if total else 1.0
+
+
+def evaluate_backends(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    configs: List[Dict[str, Any]],
+    k: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Compare ANN configurations against exact flat search.
+
+    Args:
+        vectors: Corpus embeddings
+        queries: Query embeddings
+        configs: Dicts with a `backend` key plus build/search parameters
+        k: Cut-off for recall
+
+    Returns:
+        One report per configuration with recall@k, p50/p99 latency and build time
+    """
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    k = min(k, len(vectors))
+    truth, _ = timed_search(build_index('flat', vectors), queries, k)
+
+    reports = []
+    built: Dict[Tuple, Tuple[faiss.Index, float]] = {}
+    for config in configs:
+        backend = config['backend']
+        build_params = {key: v for key, v in config.items() if key not in ('backend', 'nprobe', 'ef_search')}
+        cache_key = (backend, tuple(sorted(build_params.items())))
+        if cache_key not in built:
+            start = time.perf_counter()
+            built[cache_key] = (build_index(backend, vectors, build_params), time.perf_counter() - start)
+        index, build_seconds = built[cache_key]
+
+        configure_index(index, config)
+        found, latencies = timed_search(index, queries, k)
+        reports.append({
+            **config,
+            f'recall@{k}': recall_at_k(truth, found),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'build_seconds': build_seconds
+        })
+    return reports
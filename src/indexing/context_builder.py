@@ -0,0 +1,176 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+from llama_index.bridge.pydantic import PrivateAttr
+from llama_index.postprocessor.types import BaseNodePostprocessor
+from llama_index.prompts.default_prompts import DEFAULT_TEXT_QA_PROMPT_TMPL
+from llama_index.schema import MetadataMode, NodeWithScore, QueryBundle, TextNode
+from llama_index.utils import get_tokenizer
+
+from ..config.settings import CONTEXT_TOKEN_BUDGET, CONTEXT_MAX_SENTENCES
+
+if TYPE_CHECKING:
+    from .vector_store import MovieVectorStore
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Words too common in requests to say anything about which sentence matters.
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its like me movie movies "
+    "my of on or some something that the their them this to want was with".split()
+)
+
+
+@dataclass
+class ContextStats:
+    """What a context build kept and what it cost, for tuning the budget."""
+    nodes_in: int = 0
+    nodes_kept: int = 0
+    duplicates: int = 0
+    sentences_dropped: int = 0
+    context_tokens: int = 0
+    prompt_tokens: int = 0
+
+
+def _query_terms(query: str) -> Set[str]:
+    return {word for word in _WORD.findall(query.lower()) if word not in STOPWORDS}
+
+
+def _format_money(amount: float) -> str:
+    if amount >= 1e9:
+        return f"${amount / 1e9:.1f}B"
+    if amount >= 1e6:
+        return f"${amount / 1e6:.0f}M"
+    return f"${amount:,.0f}"
+
+
+class ContextBuilder(BaseNodePostprocessor):
+    """
+    Pack retrieved movies into a token budget before synthesis.
+
+    Nodes are deduplicated by movie and taken best-scored first. Each
+    becomes one compact metadata line, read from the document store,
+    followed by the overview sentences that share the most words with the
+    query, in their original order. Movies are added until the budget runs
+    out. The result replaces each node's text and metadata, so the prompt
+    carries nothing else.
+    """
+
+    token_budget: int = CONTEXT_TOKEN_BUDGET
+    max_sentences: int = CONTEXT_MAX_SENTENCES
+    prompt_template: str = DEFAULT_TEXT_QA_PROMPT_TMPL
+
+    _vector_store: Optional["MovieVectorStore"] = PrivateAttr(default=None)
+    _tokenizer: Callable[[str], List[int]] = PrivateAttr()
+
+    def __init__(self, vector_store: Optional["MovieVectorStore"] = None, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._vector_store = vector_store
+        self._tokenizer = get_tokenizer()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ContextBuilder"
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._tokenizer(text))
+
+    def _metadata(self, node: NodeWithScore) -> Dict[str, Any]:
+        store = self._vector_store.documents if self._vector_store is not None else None
+        pos = store.position(node.node.ref_doc_id) if store is not None and node.node.ref_doc_id else None
+        return store.metadata(pos) if pos is not None else node.node.metadata
+
+    def _header(self, metadata: Dict[str, Any]) -> str:
+        """A `title:` line, then the other fields on one line."""
+        genres = metadata.get('genres')
+        parts = [
+            f"genres: {', '.join(genres) if isinstance(genres, list) and genres else 'n/a'}",
+            f"rating: {float(metadata.get('vote_average') or 0):.1f}/10 ({float(metadata.get('vote_count') or 0):.0f} votes)"
+        ]
+        budget = float(metadata.get('budget') or 0)
+        if budget:
+            parts.append(f"budget: {_format_money(budget)}")
+        collection = metadata.get('belongs_to_collection')
+        if collection and collection != 'NULL':
+            parts.append(f"collection: {collection}")
+        return f"title: {metadata.get('title', 'Unknown')}\n" + " | ".join(parts)
+
+    def _select_sentences(self, sentences: List[str], terms: Set[str]) -> List[str]:
+        """The `max_sentences` sentences sharing the most words with the query, in text order."""
+        if len(sentences) <= self.max_sentences:
+            return sentences
+        # Ties (including no overlap at all) go to earlier sentences, which
+        # usually set up the premise.
+        overlap = [len(terms.intersection(_WORD.findall(s.lower()))) for s in sentences]
+        chosen = sorted(range(len(sentences)), key=lambda i: (-overlap[i], i))[:self.max_sentences]
+        return [sentences[i] for i in sorted(chosen)]
+
+    def build(self, query: str, nodes: List[NodeWithScore]) -> Tuple[List[NodeWithScore], ContextStats]:
+        """
+        Compact `nodes` for `query`.
+
+        Returns:
+            Tuple of (compacted nodes, best first, and build statistics);
+            `prompt_tokens` counts `prompt_template` filled with the query
+            and the packed context
+        """
+        stats = ContextStats(nodes_in=len(nodes))
+        terms = _query_terms(query)
+        remaining = self.token_budget
+
+        seen_ids: Set[str] = set()
+        seen_content: Set[Tuple[str, str]] = set()
+        packed: List[NodeWithScore] = []
+        for node in sorted(nodes, key=lambda n: n.score or 0.0, reverse=True):
+            metadata = self._metadata(node)
+            overview = node.node.get_content(metadata_mode=MetadataMode.NONE)
+            # Several chunks of one movie, or the same movie indexed twice.
+            doc_id = node.node.ref_doc_id or node.node.node_id
+            content = (str(metadata.get('title', '')).lower(), overview)
+            if doc_id in seen_ids or content in seen_content:
+                stats.duplicates += 1
+                continue
+            seen_ids.add(doc_id)
+            seen_content.add(content)
+
+            header = self._header(metadata)
+            cost = self.count_tokens(header) + 1
+            if cost > remaining:
+                break
+
+            lines = [header]
+            sentences = [s for s in _SENTENCE_END.split(overview.strip()) if s]
+            selected = self._select_sentences(sentences, terms)
+            stats.sentences_dropped += len(sentences) - len(selected)
+            for sentence in selected:
+                sentence_cost = self.count_tokens(sentence) + 1
+                if cost + sentence_cost > remaining:
+                    stats.sentences_dropped += 1
+                    continue
+                lines.append(sentence)
+                cost += sentence_cost
+
+            remaining -= cost
+            stats.context_tokens += cost
+            compact = TextNode(
+                id_=node.node.node_id,
+                text="\n".join(lines),
+                relationships=node.node.relationships
+            )
+            packed.append(NodeWithScore(node=compact, score=node.score))
+
+        stats.nodes_kept = len(packed)
+        context = "\n\n".join(n.node.get_content(metadata_mode=MetadataMode.LLM) for n in packed)
+        stats.prompt_tokens = self.count_tokens(
+            self.prompt_template.format(context_str=context, query_str=query)
+        )
+        return packed, stats
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None
+    ) -> List[NodeWithScore]:
+        packed, _ = self.build(query_bundle.query_str if query_bundle else "", nodes)
+        return packed
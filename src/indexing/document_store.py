@@ -0,0 +1,327 @@
+import copy
+import json
+import logging
+import math
+import shutil
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from llama_index import Document
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+NUMERIC_FIELDS = ('budget', 'popularity', 'revenue', 'runtime', 'vote_average', 'vote_count')
+NUMERIC_DTYPE = np.dtype([(name, 'float64') for name in NUMERIC_FIELDS])
+
+# Per-document strings, stored back to back in one UTF-8 blob. An empty
+# collection stands for "not part of a collection".
+STRING_FIELDS = ('id', 'title', 'overview', 'collection')
+
+# The preprocessor marks movies without genre data with the string 'NULL'
+# rather than a list; it is stored as this reserved genre so materialized
+# documents keep the same metadata (and hash).
+NULL_GENRES = "\x00NULL"
+
+# Movies without an original title keep pandas' NaN there; it is stored as
+# this reserved title for the same reason.
+NAN_TITLE = "\x00NaN"
+
+# (doc id, title, overview, collection, genres, numeric values)
+Record = Tuple[str, str, str, Optional[str], List[str], Tuple[float, ...]]
+
+
+def _stored_title(title: Any) -> str:
+    if isinstance(title, float) and math.isnan(title):
+        return NAN_TITLE
+    return str(title) if title else ""
+
+
+def _document_record(doc: Document) -> Record:
+    metadata = doc.metadata
+    genres = metadata.get('genres')
+    return (
+        doc.id_,
+        _stored_title(metadata.get('title')),
+        doc.text or "",
+        metadata.get('belongs_to_collection'),
+        list(genres) if isinstance(genres, list) else [NULL_GENRES],
+        tuple(float(metadata.get(name) or 0.0) for name in NUMERIC_FIELDS)
+    )
+
+
+class DocumentStore:
+    """
+    Column-oriented, memory-mappable store of the indexed movies.
+
+    Numeric metadata lives in a structured array, genres in a CSR layout
+    (per-document offsets into an array of genre ids), and ids, titles,
+    overviews and collections in a single UTF-8 blob addressed by offsets.
+    `Document` objects are only built on request.
+
+    The catalog's ids are row numbers, so id -> position goes through a
+    dense int32 table that is memory-mapped like everything else; other
+    id schemes fall back to a dict built on first use.
+
+    Upserts and deletes leave the arrays untouched: new records are
+    appended after them in a small overlay and replaced or deleted
+    positions are marked dead, so a change costs the size of the change.
+    `compacted` (and `save`) fold the overlay back into the arrays.
+    """
+
+    def __init__(
+        self,
+        numeric: np.ndarray,
+        genre_offsets: np.ndarray,
+        genre_ids: np.ndarray,
+        genre_names: List[str],
+        string_offsets: np.ndarray,
+        strings: np.ndarray,
+        id_positions: Optional[np.ndarray] = None
+    ):
+        self.numeric = numeric
+        self.genre_offsets = genre_offsets
+        self.genre_ids = genre_ids
+        self.genre_names = genre_names
+        self.string_offsets = string_offsets
+        self.strings = strings
+        self.id_positions = id_positions
+        self._positions: Optional[Dict[str, int]] = None
+
+        # Overlay of changes since the arrays were built: records appended
+        # after the arrays, id -> position overrides (None for deleted ids)
+        # and dead positions.
+        self._base_size = len(numeric)
+        self._appended: List[Record] = []
+        self._overrides: Dict[str, Optional[int]] = {}
+        self._dead: Set[int] = set()
+
+    @classmethod
+    def empty(cls) -> 'DocumentStore':
+        return cls._from_records([])
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document]) -> 'DocumentStore':
+        return cls._from_records(_document_record(doc) for doc in documents)
+
+    @classmethod
+    def _from_records(cls, records: Iterable[Record]) -> 'DocumentStore':
+        numeric_rows, genre_counts, genre_ids, chunks = [], [], [], []
+        genre_index: Dict[str, int] = {}
+        for doc_id, title, overview, collection, genres, numeric in records:
+            numeric_rows.append(numeric)
+            genre_counts.append(len(genres))
+            genre_ids.extend(genre_index.setdefault(genre, len(genre_index)) for genre in genres)
+            chunks.extend(value.encode('utf-8') for value in (doc_id, title, overview, collection or ""))
+
+        string_offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in chunks], out=string_offsets[1:])
+        genre_offsets = np.zeros(len(genre_counts) + 1, dtype=np.int64)
+        np.cumsum(genre_counts, out=genre_offsets[1:])
+
+        return cls(
+            np.array(numeric_rows, dtype=np.float64).reshape(-1, len(NUMERIC_FIELDS)).view(NUMERIC_DTYPE).ravel(),
+            genre_offsets,
+            np.array(genre_ids, dtype=np.int16),
+            list(genre_index),
+            string_offsets,
+            np.frombuffer(b"".join(chunks), dtype=np.uint8),
+            cls._dense_positions(chunks[0::len(STRING_FIELDS)])
+        )
+
+    @staticmethod
+    def _dense_positions(encoded_ids: List[bytes]) -> Optional[np.ndarray]:
+        """id -> position table when every id is a reasonably dense non-negative integer."""
+        if not all(doc_id.isdigit() and (doc_id == b"0" or not doc_id.startswith(b"0")) for doc_id in encoded_ids):
+            return None
+        ids = np.array([int(doc_id) for doc_id in encoded_ids], dtype=np.int64)
+        size = int(ids.max()) + 1 if len(ids) else 0
+        if size > 4 * len(ids) + 1024:
+            return None
+        table = np.full(size, -1, dtype=np.int32)
+        table[ids] = np.arange(len(ids), dtype=np.int32)
+        return table
+
+    def __len__(self) -> int:
+        return self._base_size + len(self._appended) - len(self._dead)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return self.position(doc_id) is not None
+
+    def _live_positions(self) -> Iterator[int]:
+        for pos in range(self._base_size + len(self._appended)):
+            if pos not in self._dead:
+                yield pos
+
+    def ids(self) -> List[str]:
+        return [self._string(pos, 0) for pos in self._live_positions()]
+
+    def position(self, doc_id: str) -> Optional[int]:
+        if doc_id in self._overrides:
+            return self._overrides[doc_id]
+        if self.id_positions is not None:
+            # Only canonical decimal ids, so "07" does not alias "7".
+            if not doc_id.isdigit() or (doc_id != "0" and doc_id.startswith("0")):
+                return None
+            i = int(doc_id)
+            pos = int(self.id_positions[i]) if i < len(self.id_positions) else -1
+            return pos if pos >= 0 else None
+
+        if self._positions is None:
+            self._positions = {self._string(pos, 0): pos for pos in range(self._base_size)}
+        return self._positions.get(doc_id)
+
+    def _string(self, pos: int, field: int) -> str:
+        if pos >= self._base_size:
+            return self._appended[pos - self._base_size][field] or ""
+        i = pos * len(STRING_FIELDS) + field
+        start, end = self.string_offsets[i], self.string_offsets[i + 1]
+        return self.strings[start:end].tobytes().decode('utf-8')
+
+    def title(self, pos: int) -> str:
+        title = self._string(pos, 1)
+        return "" if title == NAN_TITLE else title
+
+    def overview(self, pos: int) -> str:
+        return self._string(pos, 2)
+
+    def _genre_list(self, pos: int) -> List[str]:
+        if pos >= self._base_size:
+            return list(self._appended[pos - self._base_size][4])
+        ids = self.genre_ids[self.genre_offsets[pos]:self.genre_offsets[pos + 1]]
+        return [self.genre_names[i] for i in ids]
+
+    def genres(self, pos: int) -> Union[List[str], str]:
+        names = self._genre_list(pos)
+        return 'NULL' if names == [NULL_GENRES] else names
+
+    def _numeric_values(self, pos: int) -> Tuple[float, ...]:
+        if pos >= self._base_size:
+            return self._appended[pos - self._base_size][5]
+        row = self.numeric[pos]
+        return tuple(float(row[name]) for name in NUMERIC_FIELDS)
+
+    def metadata(self, pos: int) -> Dict[str, Any]:
+        """The metadata dict `create_documents` attaches to a movie."""
+        title = self._string(pos, 1)
+        metadata = {
+            'title': float('nan') if title == NAN_TITLE else title,
+            'genres': self.genres(pos),
+            'belongs_to_collection': self._string(pos, 3) or None
+        }
+        metadata.update(zip(NUMERIC_FIELDS, self._numeric_values(pos)))
+        return metadata
+
+    def get(self, doc_id: str) -> Optional[Document]:
+        """Materialize one Document, or None if the id is unknown."""
+        pos = self.position(doc_id)
+        if pos is None:
+            return None
+        return Document(id_=doc_id, text=self.overview(pos), metadata=self.metadata(pos))
+
+    def get_many(self, doc_ids: Iterable[str]) -> List[Optional[Document]]:
+        return [self.get(doc_id) for doc_id in doc_ids]
+
+    def _records(self, skip: Iterable[str] = ()) -> Iterator[Record]:
+        skip = set(skip)
+        for pos in self._live_positions():
+            doc_id = self._string(pos, 0)
+            if doc_id in skip:
+                continue
+            yield (
+                doc_id,
+                self._string(pos, 1),
+                self.overview(pos),
+                self._string(pos, 3) or None,
+                self._genre_list(pos),
+                self._numeric_values(pos)
+            )
+
+    def _changed(self) -> 'DocumentStore':
+        # Shares the arrays; only the overlay is copied.
+        store = copy.copy(self)
+        store._appended = list(self._appended)
+        store._overrides = dict(self._overrides)
+        store._dead = set(self._dead)
+        return store
+
+    def upsert(self, documents: List[Document]) -> 'DocumentStore':
+        """Return a new store with `documents` added or replacing same-id entries."""
+        store = self.delete(doc.id_ for doc in documents)
+        for doc in documents:
+            store._overrides[doc.id_] = store._base_size + len(store._appended)
+            store._appended.append(_document_record(doc))
+        return store
+
+    def delete(self, doc_ids: Iterable[str]) -> 'DocumentStore':
+        """Return a new store without `doc_ids`; unknown ids are ignored."""
+        store = self._changed()
+        for doc_id in doc_ids:
+            pos = store.position(doc_id)
+            if pos is not None:
+                store._dead.add(pos)
+                store._overrides[doc_id] = None
+        return store
+
+    def compacted(self) -> 'DocumentStore':
+        """The same documents with the overlay folded into fresh arrays."""
+        if not (self._appended or self._dead):
+            return self
+        return self._from_records(self._records())
+
+    def save(self, directory: Path):
+        """Write the store; the previous copy is replaced only once the new one is complete."""
+        store = self.compacted()
+        directory = Path(directory)
+        tmp = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        np.save(tmp / "numeric.npy", store.numeric)
+        np.save(tmp / "genre_offsets.npy", store.genre_offsets)
+        np.save(tmp / "genre_ids.npy", store.genre_ids)
+        np.save(tmp / "string_offsets.npy", store.string_offsets)
+        store.strings.tofile(tmp / "strings.bin")
+        if store.id_positions is not None:
+            np.save(tmp / "id_positions.npy", store.id_positions)
+        (tmp / "meta.json").write_text(json.dumps({
+            'version': FORMAT_VERSION,
+            'documents': len(store),
+            'genres': store.genre_names,
+            'string_fields': STRING_FIELDS
+        }))
+
+        shutil.rmtree(directory, ignore_errors=True)
+        tmp.rename(directory)
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> Optional['DocumentStore']:
+        """Open a saved store, memory-mapping its arrays; None if missing or from another format version."""
+        directory = Path(directory)
+        meta_path = directory / "meta.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        if meta.get('version') != FORMAT_VERSION:
+            logger.warning("Ignoring document store with format version %s", meta.get('version'))
+            return None
+
+        mmap_mode = 'r' if mmap else None
+        id_positions_path = directory / "id_positions.npy"
+        strings_path = directory / "strings.bin"
+        if strings_path.stat().st_size == 0:
+            strings = np.empty(0, dtype=np.uint8)
+        elif mmap:
+            strings = np.memmap(strings_path, dtype=np.uint8, mode='r')
+        else:
+            strings = np.fromfile(strings_path, dtype=np.uint8)
+        return cls(
+            np.load(directory / "numeric.npy", mmap_mode=mmap_mode),
+            np.load(directory / "genre_offsets.npy", mmap_mode=mmap_mode),
+            np.load(directory / "genre_ids.npy", mmap_mode=mmap_mode),
+            meta['genres'],
+            np.load(directory / "string_offsets.npy", mmap_mode=mmap_mode),
+            strings,
+            np.load(id_positions_path, mmap_mode=mmap_mode) if id_positions_path.exists() else None
+        )
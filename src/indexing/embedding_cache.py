@@ -0,0 +1,211 @@
+import hashlib
+import logging
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from llama_index.bridge.pydantic import PrivateAttr
+from llama_index.embeddings.base import BaseEmbedding
+
+from .embeddings import embed_queries
+
+logger = logging.getLogger(__name__)
+
+KEY_SIZE = 16
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed store of text embeddings.
+
+    Vectors live in an append-only float32 file that is memory-mapped for
+    reads; `keys.bin` holds one fixed-size digest per row in the same order.
+    Rows are only considered valid once their key has been written, so an
+    interrupted append never exposes a half-written vector.
+    """
+
+    def __init__(self, cache_dir: Path, dimension: int):
+        self.cache_dir = Path(cache_dir)
+        self.dimension = dimension
+        self.vectors_path = self.cache_dir / "vectors.f32"
+        self.keys_path = self.cache_dir / "keys.bin"
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._rows: Dict[bytes, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._load()
+
+    @staticmethod
+    def key(model_name: str, text: str) -> bytes:
+        """Content address of a text under a given embedding model."""
+        digest = hashlib.blake2b(digest_size=KEY_SIZE)
+        digest.update(model_name.encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return digest.digest()
+
+    def _load(self):
+        if not self.keys_path.exists() or not self.vectors_path.exists():
+            return
+
+        keys = self.keys_path.read_bytes()
+        row_bytes = self.dimension * 4
+        rows = min(len(keys) // KEY_SIZE, self.vectors_path.stat().st_size // row_bytes)
+        self._rows = {keys[i * KEY_SIZE:(i + 1) * KEY_SIZE]: i for i in range(rows)}
+        self._remap()
+
+    def _remap(self):
+        rows = len(self._rows)
+        self._vectors = np.memmap(
+            self.vectors_path, dtype='float32', mode='r', shape=(rows, self.dimension)
+        ) if rows else None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Look up vectors by key, returning None for misses."""
+        with self._lock:
+            results = []
+            for key in keys:
+                row = self._rows.get(key)
+                results.append(None if row is None else np.array(self._vectors[row]))
+            found = sum(r is not None for r in results)
+            self.hits += found
+            self.misses += len(keys) - found
+            return results
+
+    def put_many(self, keys: List[bytes], vectors: np.ndarray):
+        """Append new vectors; keys that are already cached are skipped."""
+        vectors = np.asarray(vectors, dtype='float32').reshape(len(keys), self.dimension)
+        with self._lock:
+            new_keys, new_rows, seen = [], [], set()
+            for key, vector in zip(keys, vectors):
+                if key in self._rows or key in seen:
+                    continue
+                seen.add(key)
+                new_keys.append(key)
+                new_rows.append(vector)
+            if not new_keys:
+                return
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._truncate_to_valid_rows()
+            with open(self.vectors_path, 'ab') as f:
+                f.write(np.stack(new_rows).tobytes())
+            with open(self.keys_path, 'ab') as f:
+                f.write(b"".join(new_keys))
+
+            start = len(self._rows)
+            for offset, key in enumerate(new_keys):
+                self._rows[key] = start + offset
+            self._remap()
+
+    def _truncate_to_valid_rows(self):
+        """Drop any tail left by an interrupted append before writing more."""
+        rows = len(self._rows)
+        for path, size in ((self.vectors_path, rows * self.dimension * 4),
+                           (self.keys_path, rows * KEY_SIZE)):
+            if path.exists() and path.stat().st_size != size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+
+    def compact(self, live_keys: Optional[Iterable[bytes]] = None) -> int:
+        """
+        Rewrite the cache keeping only `live_keys` (or every valid row).
+
+        Returns:
+            Number of evicted entries
+        """
+        with self._lock:
+            keep = list(self._rows) if live_keys is None else [
+                key for key in dict.fromkeys(live_keys) if key in self._rows
+            ]
+            evicted = len(self._rows) - len(keep)
+            if not self._rows:
+                return 0
+
+            rows = np.array([self._rows[key] for key in keep], dtype=np.int64)
+            vectors = np.array(self._vectors[rows]) if len(rows) else np.empty((0, self.dimension), 'float32')
+            self._vectors = None
+
+            tmp_vectors = self.vectors_path.with_suffix('.tmp')
+            tmp_keys = self.keys_path.with_suffix('.tmp')
+            tmp_vectors.write_bytes(vectors.tobytes())
+            tmp_keys.write_bytes(b"".join(keep))
+            tmp_vectors.replace(self.vectors_path)
+            tmp_keys.replace(self.keys_path)
+
+            self._rows = {key: i for i, key in enumerate(keep)}
+            self._remap()
+
+        logger.info("Compacted embedding cache: kept %d, evicted %d", len(keep), evicted)
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._rows),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'bytes': len(self._rows) * (self.dimension * 4 + KEY_SIZE)
+        }
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Embedding model wrapper that only embeds texts missing from an EmbeddingCache."""
+
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, embed_model: BaseEmbedding, cache: EmbeddingCache, **kwargs: Any):
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            **kwargs
+        )
+        self._embed_model = embed_model
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def cache_keys(self, texts: Iterable[str]) -> List[bytes]:
+        return [EmbeddingCache.key(self.model_name, text) for text in texts]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed_model.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await self._embed_model.aget_query_embedding(query)
+
+    def get_query_embedding_batch(self, queries: List[str]) -> List[List[float]]:
+        return embed_queries(self._embed_model, queries).tolist()
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def get_text_embedding_batch(self, texts: List[str], show_progress: bool = False, **kwargs: Any) -> List[List[float]]:
+        # One cache pass for the whole request; the wrapped model does its own batching.
+        return self._get_text_embeddings(texts)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        keys = self.cache_keys(texts)
+        cached = self._cache.get_many(keys)
+
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            fresh = self._embed_model.get_text_embedding_batch([texts[i] for i in missing])
+            self._cache.put_many([keys[i] for i in missing], np.array(fresh, dtype='float32'))
+            for i, vector in zip(missing, fresh):
+                cached[i] = vector
+
+        return [np.asarray(vector, dtype='float32').tolist() for vector in cached]
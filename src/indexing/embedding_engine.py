@@ -0,0 +1,249 @@
+import logging
+import multiprocessing
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+from llama_index.bridge.pydantic import PrivateAttr
+from llama_index.embeddings.base import BaseEmbedding
+from llama_index.embeddings.huggingface_utils import format_query, format_text, get_pooling_mode
+
+from ..config.settings import (
+    EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_LENGTH,
+    EMBEDDING_PRECISION,
+    EMBEDDING_THREADS,
+    EMBEDDING_WORKERS,
+    EMBEDDING_PARALLEL_THRESHOLD,
+    DEVICE
+)
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ('fp32', 'int8', 'onnx')
+
+# Workers are spawned rather than forked: forking a process that has
+# already initialised torch's thread pools can deadlock.
+_POOL_CONTEXT = 'spawn'
+
+
+class _Encoder:
+    """Tokenizer and transformer for one process."""
+
+    def __init__(self, model_name: str, device: str, precision: str, max_length: int, threads: int):
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The embedding engine requires torch and transformers: "
+                "pip install torch transformers"
+            ) from e
+
+        torch.set_num_threads(max(1, threads))
+        self.torch = torch
+        self.device = device
+        self.max_length = max_length
+        self.cls_pooling = get_pooling_mode(model_name) == 'cls'
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        if precision == 'onnx':
+            try:
+                from optimum.onnxruntime import ORTModelForFeatureExtraction
+            except ImportError as e:
+                raise ImportError("ONNX inference requires optimum: pip install optimum[onnxruntime]") from e
+            self.device = 'cpu'
+            self.model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        else:
+            self.model = AutoModel.from_pretrained(model_name).to(device).eval()
+            if precision == 'int8':
+                self.device = 'cpu'
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model.to('cpu'), {torch.nn.Linear}, dtype=torch.qint8
+                )
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        torch = self.torch
+        with torch.inference_mode():
+            inputs = self.tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors='pt'
+            )
+            inputs.pop('token_type_ids', None)
+            inputs = {key: value.to(self.device) for key, value in inputs.items()}
+            hidden = self.model(**inputs)[0]
+
+            if self.cls_pooling:
+                embeddings = hidden[:, 0]
+            else:
+                mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                embeddings = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+        return embeddings.cpu().numpy().astype('float32')
+
+
+_worker_encoder: Optional[_Encoder] = None
+
+
+def _init_worker(config: Dict[str, Any]):
+    global _worker_encoder
+    _worker_encoder = _Encoder(**config)
+    _worker_encoder.encode(["warmup"])
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return _worker_encoder.encode(texts)
+
+
+class EmbeddingEngine(BaseEmbedding):
+    """
+    CPU-oriented sentence embedder for the BGE family.
+
+    Texts are sorted by length before batching so each batch pads to
+    similar lengths, then scattered back into input order. Large
+    requests are spread over a pool of worker processes, and the model can
+    run as fp32, dynamically quantized int8, or ONNX Runtime.
+    """
+
+    device: str = DEVICE
+    precision: str = EMBEDDING_PRECISION
+    max_length: int = EMBEDDING_MAX_LENGTH
+    threads: int = EMBEDDING_THREADS
+    workers: int = EMBEDDING_WORKERS
+    parallel_threshold: int = EMBEDDING_PARALLEL_THRESHOLD
+
+    _model_id: str = PrivateAttr()
+    _encoder: Optional[_Encoder] = PrivateAttr(default=None)
+    _pool: Optional[ProcessPoolExecutor] = PrivateAttr(default=None)
+    _stats: Dict[str, float] = PrivateAttr()
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        precision: str = EMBEDDING_PRECISION,
+        embed_batch_size: int = EMBEDDING_BATCH_SIZE,
+        warmup: bool = True,
+        **kwargs: Any
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+        # Quantized models produce slightly different vectors, so they get
+        # their own identity in index manifests and the embedding cache.
+        super().__init__(
+            model_name=model_name if precision == 'fp32' else f"{model_name}@{precision}",
+            precision=precision,
+            embed_batch_size=embed_batch_size,
+            **kwargs
+        )
+        self._model_id = model_name
+        self._stats = {'texts': 0, 'seconds': 0.0, 'queries': 0, 'query_seconds': 0.0}
+        self._encoder = _Encoder(**self._encoder_config(self.threads))
+        if warmup:
+            self.warmup()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "EmbeddingEngine"
+
+    def _encoder_config(self, threads: int) -> Dict[str, Any]:
+        return {
+            'model_name': self._model_id,
+            'device': self.device,
+            'precision': self.precision,
+            'max_length': self.max_length,
+            'threads': threads
+        }
+
+    def warmup(self):
+        """Run one encode so the first real request does not pay for lazy initialisation."""
+        start = time.perf_counter()
+        self._encoder.encode(["warmup"])
+        logger.info("Embedding model %s warmed up in %.2fs", self.model_name, time.perf_counter() - start)
+
+    def _batches(self, texts: List[str]) -> List[np.ndarray]:
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        return [order[i:i + self.embed_batch_size] for i in range(0, len(order), self.embed_batch_size)]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(_POOL_CONTEXT),
+                initializer=_init_worker,
+                initargs=(self._encoder_config(max(1, self.threads // self.workers)),)
+            )
+        return self._pool
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts (already formatted) in length-sorted batches, preserving input order."""
+        vectors = np.empty((len(texts), 0), dtype='float32')
+        if not texts:
+            return vectors
+
+        start = time.perf_counter()
+        batches = self._batches(texts)
+        if self.workers > 1 and len(texts) >= self.parallel_threshold:
+            encoded = self._get_pool().map(_encode_in_worker, [[texts[i] for i in batch] for batch in batches])
+        else:
+            encoded = (self._encoder.encode([texts[i] for i in batch]) for batch in batches)
+
+        for batch, batch_vectors in zip(batches, encoded):
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), batch_vectors.shape[1]), dtype='float32')
+            vectors[batch] = batch_vectors
+
+        seconds = time.perf_counter() - start
+        self._stats['texts'] += len(texts)
+        self._stats['seconds'] += seconds
+        metrics.increment('embedded_texts', len(texts))
+        logger.debug("Embedded %d texts in %.2fs (%.0f texts/s)", len(texts), seconds, len(texts) / seconds)
+        return vectors
+
+    def get_text_embedding_batch(self, texts: List[str], show_progress: bool = False, **kwargs: Any) -> List[List[float]]:
+        # The base class slices into embed_batch_size chunks first, which
+        # would defeat length sorting and the worker pool.
+        return self._get_text_embeddings(texts)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self.encode([format_text(text, self._model_id) for text in texts]).tolist()
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def get_query_embedding_batch(self, queries: List[str]) -> List[List[float]]:
+        return self.encode([format_query(query, self._model_id) for query in queries]).tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        start = time.perf_counter()
+        vector = self._encoder.encode([format_query(query, self._model_id)])[0]
+        seconds = time.perf_counter() - start
+        self._stats['queries'] += 1
+        self._stats['query_seconds'] += seconds
+        metrics.observe('query_encode', seconds)
+        return vector.tolist()
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def stats(self) -> Dict[str, float]:
+        """Throughput of text embedding and mean latency of single-query encodes."""
+        texts, seconds = self._stats['texts'], self._stats['seconds']
+        queries, query_seconds = self._stats['queries'], self._stats['query_seconds']
+        return {
+            'texts': texts,
+            'texts_per_second': texts / seconds if seconds else 0.0,
+            'queries': queries,
+            'mean_query_latency': query_seconds / queries if queries else 0.0
+        }
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
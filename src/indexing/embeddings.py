@@ -0,0 +1,32 @@
+import numpy as np
+from typing import List
+from llama_index.embeddings import HuggingFaceEmbedding
+from llama_index.embeddings.base import BaseEmbedding
+from llama_index.embeddings.huggingface_utils import format_query
+
+
+def embed_queries(embed_model: BaseEmbedding, queries: List[str]) -> np.ndarray:
+    """
+    Embed many queries with as few forward passes as the model allows.
+
+    llama_index only exposes single-query embedding, so models that can
+    batch (ours via `get_query_embedding_batch`, HuggingFace via `_embed`)
+    are fed `embed_batch_size` queries at a time.
+    """
+    batch_size = max(1, embed_model.embed_batch_size)
+    if hasattr(embed_model, 'get_query_embedding_batch'):
+        encode = embed_model.get_query_embedding_batch
+    elif isinstance(embed_model, HuggingFaceEmbedding):
+        def encode(batch: List[str]) -> List[List[float]]:
+            return embed_model._embed([
+                format_query(query, embed_model.model_name, embed_model.query_instruction)
+                for query in batch
+            ])
+    else:
+        def encode(batch: List[str]) -> List[List[float]]:
+            return [embed_model.get_query_embedding(query) for query in batch]
+
+    vectors = []
+    for start in range(0, len(queries), batch_size):
+        vectors.extend(encode(queries[start:start + batch_size]))
+    return np.array(vectors, dtype='float32').reshape(len(queries), -1)
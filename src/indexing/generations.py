@@ -0,0 +1,77 @@
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+GENERATIONS_DIR = "generations"
+# Holds the live generation's directory, relative to the index root.
+CURRENT_FILE = "CURRENT"
+
+_GENERATION_NAME = re.compile(r"^gen-(\d+)$")
+
+
+def _generations(root: Path) -> List[Path]:
+    """Generation directories under `root`, oldest first."""
+    directory = Path(root) / GENERATIONS_DIR
+    if not directory.exists():
+        return []
+    found = [(int(match.group(1)), path) for path in directory.iterdir()
+             if path.is_dir() and (match := _GENERATION_NAME.match(path.name))]
+    return [path for _, path in sorted(found)]
+
+
+def current_generation(root: Path) -> Path:
+    """
+    Directory of the live index generation.
+
+    Indexes built before generations existed live directly in `root`, which
+    stays the live directory until a rebuild writes the pointer.
+    """
+    root = Path(root)
+    pointer = root / CURRENT_FILE
+    if pointer.exists():
+        path = root / pointer.read_text().strip()
+        if path.is_dir():
+            return path
+        logger.warning("%s points to missing %s; using %s", pointer, path, root)
+    return root
+
+
+def new_generation(root: Path) -> Path:
+    """Create the directory for the next generation."""
+    existing = _generations(root)
+    number = int(_GENERATION_NAME.match(existing[-1].name).group(1)) + 1 if existing else 1
+    path = Path(root) / GENERATIONS_DIR / f"gen-{number:06d}"
+    path.mkdir(parents=True)
+    return path
+
+
+def set_current_generation(root: Path, path: Path):
+    """Atomically point `root` at a generation."""
+    root = Path(root)
+    tmp = root / f"{CURRENT_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(str(Path(path).relative_to(root)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, root / CURRENT_FILE)
+
+
+def collect_generations(root: Path, keep: int) -> List[Path]:
+    """
+    Delete all but the live generation and the `keep - 1` newest others.
+
+    Returns:
+        The deleted directories
+    """
+    live = current_generation(root).resolve()
+    others = [path for path in _generations(root) if path.resolve() != live]
+    removed = others[:max(0, len(others) - max(0, keep - 1))]
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info("Removed index generation %s", path.name)
+    return removed
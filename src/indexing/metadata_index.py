@@ -0,0 +1,124 @@
+import numpy as np
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+NUMERIC_FIELDS = ('vote_average', 'vote_count', 'budget', 'runtime', 'popularity')
+
+Range = Tuple[Optional[float], Optional[float]]
+
+
+class MetadataIndex:
+    """
+    Precomputed filter structures over FAISS rows.
+
+    Genres are kept as one boolean row mask per genre and each numeric field
+    as a sorted value array, so a filter resolves to the allowed row ids with
+    a few mask operations and binary searches instead of a table scan.
+    """
+
+    def __init__(self, row_metadata: List[Dict[str, Any]]):
+        self.size = len(row_metadata)
+
+        genre_rows: Dict[str, List[int]] = defaultdict(list)
+        for row, metadata in enumerate(row_metadata):
+            genres = metadata.get('genres')
+            if isinstance(genres, list):
+                for genre in genres:
+                    genre_rows[genre].append(row)
+
+        self.genre_masks: Dict[str, np.ndarray] = {}
+        for genre, rows in genre_rows.items():
+            mask = np.zeros(self.size, dtype=bool)
+            mask[rows] = True
+            self.genre_masks[genre] = mask
+
+        self.columns: Dict[str, np.ndarray] = {}
+        self.sorted_rows: Dict[str, np.ndarray] = {}
+        self.sorted_values: Dict[str, np.ndarray] = {}
+        for field in NUMERIC_FIELDS:
+            values = np.array(
+                [float(metadata.get(field) or 0.0) for metadata in row_metadata],
+                dtype='float64'
+            )
+            order = np.argsort(values, kind='stable')
+            self.columns[field] = values
+            self.sorted_rows[field] = order
+            self.sorted_values[field] = values[order]
+
+    def extended(self, row_metadata: List[Dict[str, Any]]) -> 'MetadataIndex':
+        """
+        A new index with rows appended after the existing ones.
+
+        The sorted arrays are merged rather than re-sorted and nothing is
+        read back from the existing rows' metadata. The index itself is left
+        untouched for searches still using it.
+        """
+        extended = MetadataIndex([])
+        n_new = len(row_metadata)
+        new_rows = np.arange(self.size, self.size + n_new, dtype=np.int64)
+        extended.size = self.size + n_new
+
+        appended = MetadataIndex(row_metadata)
+        for genre in self.genre_masks.keys() | appended.genre_masks.keys():
+            old = self.genre_masks.get(genre, np.zeros(self.size, dtype=bool))
+            new = appended.genre_masks.get(genre, np.zeros(n_new, dtype=bool))
+            extended.genre_masks[genre] = np.concatenate([old, new])
+
+        for field in NUMERIC_FIELDS:
+            new_values = appended.sorted_values[field]
+            at = np.searchsorted(self.sorted_values[field], new_values, side='right')
+            extended.columns[field] = np.concatenate([self.columns[field], appended.columns[field]])
+            extended.sorted_values[field] = np.insert(self.sorted_values[field], at, new_values)
+            extended.sorted_rows[field] = np.insert(self.sorted_rows[field], at, new_rows[appended.sorted_rows[field]])
+        return extended
+
+    def genre_mask(self, genres: Iterable[str]) -> np.ndarray:
+        """Rows tagged with any of the given genres."""
+        mask = np.zeros(self.size, dtype=bool)
+        for genre in genres:
+            if genre in self.genre_masks:
+                mask |= self.genre_masks[genre]
+        return mask
+
+    def range_mask(self, field: str, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Rows whose `field` lies in the inclusive range [low, high]."""
+        if field not in self.sorted_values:
+            raise ValueError(f"No numeric index for '{field}', expected one of {NUMERIC_FIELDS}")
+
+        values = self.sorted_values[field]
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        end = len(values) if high is None else np.searchsorted(values, high, side='right')
+
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.sorted_rows[field][start:end]] = True
+        return mask
+
+    def select(
+        self,
+        genres: Optional[Iterable[str]] = None,
+        ranges: Optional[Dict[str, Range]] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Resolve a filter to the sorted array of allowed row ids.
+
+        Args:
+            genres: Keep rows with at least one of these genres
+            ranges: Mapping of numeric field to an inclusive (low, high) range;
+                None or infinite bounds are open
+
+        Returns:
+            Allowed row ids, or None when no filter applies
+        """
+        mask = None
+        if genres:
+            mask = self.genre_mask(genres)
+
+        for field, (low, high) in (ranges or {}).items():
+            low = None if low is None or np.isneginf(low) else low
+            high = None if high is None or np.isposinf(high) else high
+            if low is None and high is None:
+                continue
+            field_mask = self.range_mask(field, low, high)
+            mask = field_mask if mask is None else mask & field_mask
+
+        return None if mask is None else np.flatnonzero(mask).astype(np.int64)
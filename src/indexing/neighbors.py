@@ -0,0 +1,112 @@
+import json
+import logging
+import time
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def compute_neighbors(
+    vectors: np.ndarray,
+    n_neighbors: int = 20,
+    max_block_bytes: int = 256 << 20
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-N inner-product neighbours of every row, excluding the row itself.
+
+    Rows are processed in blocks sized so the block-by-corpus score matrix
+    stays under `max_block_bytes`.
+
+    Returns:
+        Tuple of (int32 neighbour rows, float16 scores), each of shape (n, N)
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    n = len(vectors)
+    n_neighbors = min(n_neighbors, max(n - 1, 0))
+    ids = np.empty((n, n_neighbors), dtype=np.int32)
+    scores = np.empty((n, n_neighbors), dtype=np.float16)
+    if n_neighbors == 0:
+        return ids, scores
+
+    block = max(1, max_block_bytes // (n * 4))
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        sims = vectors[start:end] @ vectors.T
+        sims[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+        top = np.argpartition(-sims, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        ids[start:end] = np.take_along_axis(top, order, axis=1)
+        scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+
+    return ids, scores
+
+
+class NeighborGraph:
+    """
+    Precomputed nearest-neighbour table over FAISS rows.
+
+    `key` describes the index the table was computed from (see
+    `MovieVectorStore.neighbor_graph_key`); a saved table is only valid for
+    an index with an equal key.
+    """
+
+    def __init__(self, ids: np.ndarray, scores: np.ndarray, key: Optional[Dict[str, Any]] = None):
+        self.ids = ids
+        self.scores = scores
+        self.key = key or {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_neighbors: int = 20, key: Optional[Dict[str, Any]] = None) -> 'NeighborGraph':
+        start = time.perf_counter()
+        ids, scores = compute_neighbors(vectors, n_neighbors)
+        logger.info(
+            "Computed %d neighbours for %d movies in %.2fs",
+            ids.shape[1], len(ids), time.perf_counter() - start
+        )
+        return cls(ids, scores, key)
+
+    def save(self, directory: Path):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "ids.npy", self.ids)
+        np.save(directory / "scores.npy", self.scores)
+        (directory / "meta.json").write_text(json.dumps({
+            'key': self.key,
+            'n_neighbors': int(self.ids.shape[1])
+        }))
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional['NeighborGraph']:
+        """Memory-map a saved graph, or return None if there is none."""
+        directory = Path(directory)
+        if not (directory / "meta.json").exists():
+            return None
+        meta = json.loads((directory / "meta.json").read_text())
+        return cls(
+            np.load(directory / "ids.npy", mmap_mode='r'),
+            np.load(directory / "scores.npy", mmap_mode='r'),
+            meta.get('key')
+        )
+
+    def neighbors(self, row: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k neighbour rows and scores of `row`."""
+        return self.ids[row, :k], self.scores[row, :k].astype('float32')
+
+
+if __name__ == "__main__":
+    from .vector_store import MovieVectorStore
+
+    logging.basicConfig(level=logging.INFO)
+    # Through the store, so the graph is saved in the live generation with
+    # the key the store checks on load.
+    store = MovieVectorStore()
+    store.initialize_index()
+    store.build_neighbor_graph()
+    store.cleanup()
@@ -0,0 +1,37 @@
+from typing import Dict, List, Optional, TYPE_CHECKING
+from llama_index.retrievers import BaseRetriever
+from llama_index.schema import NodeWithScore, QueryBundle
+
+from .metadata_index import Range
+
+if TYPE_CHECKING:
+    from .vector_store import MovieVectorStore
+
+
+class MovieRetriever(BaseRetriever):
+    """llama_index retriever that searches through MovieVectorStore with optional filters."""
+
+    def __init__(
+        self,
+        vector_store: "MovieVectorStore",
+        top_k: int = 3,
+        genres: Optional[List[str]] = None,
+        ranges: Optional[Dict[str, Range]] = None,
+        backend: str = 'flat'
+    ):
+        super().__init__()
+        self.vector_store = vector_store
+        self.top_k = top_k
+        self.genres = genres
+        self.ranges = ranges
+        self.backend = backend
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        query = query_bundle.embedding or query_bundle.query_str
+        return self.vector_store.retrieve(
+            query,
+            self.top_k,
+            genres=self.genres,
+            ranges=self.ranges,
+            backend=self.backend
+        )
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Normalized components are rounded to multiples of 1 / _QUANT_SCALE, so
+# embeddings that differ only by float noise share a key.
+_QUANT_SCALE = 4096
+
+# Rough per-entry bookkeeping cost (key, tuple, OrderedDict slot) on top of
+# the result arrays themselves.
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+def vector_key(vector) -> bytes:
+    """Digest of a query vector after L2 normalization and quantization."""
+    vector = np.asarray(vector, dtype='float32').ravel()
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector = vector / norm
+    quantized = np.round(vector * _QUANT_SCALE).astype(np.int16)
+    return hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
+
+
+def rows_key(rows: Optional[np.ndarray]) -> Optional[bytes]:
+    """Digest of an allowed-row set, or None when the search is unfiltered."""
+    if rows is None:
+        return None
+    rows = np.ascontiguousarray(rows, dtype=np.int64)
+    return hashlib.blake2b(rows.tobytes(), digest_size=16).digest()
+
+
+class SearchCache:
+    """
+    Memory-bounded LRU cache of FAISS search results.
+
+    Keys are built by the caller (query vector digest, k, backend, filters)
+    and values are (scores, rows) arrays. Entries are evicted least recently
+    used first once their combined size exceeds `max_bytes`. Cached arrays are
+    read-only so callers cannot corrupt them.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[np.ndarray, np.ndarray, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: Hashable, scores: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Cache a result and return the read-only arrays that were stored."""
+        scores = np.array(scores, copy=True)
+        rows = np.array(rows, copy=True)
+        scores.setflags(write=False)
+        rows.setflags(write=False)
+        size = scores.nbytes + rows.nbytes + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return scores, rows
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes_used -= previous[2]
+            self._entries[key] = (scores, rows, size)
+            self.bytes_used += size
+
+            while self.bytes_used > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes_used -= evicted_size
+                self.evictions += 1
+        return scores, rows
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes_used,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,271 @@
+import faiss
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+import zlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS = ('hash', 'genre')
+SHARD_FILE = "vectors.faiss"
+SHARD_META = "meta.json"
+
+# Spawned for the same reason as the embedding workers: forking after
+# FAISS has started its OpenMP threads can deadlock.
+_POOL_CONTEXT = 'spawn'
+
+
+def shard_assignments(
+    doc_ids: Sequence[str],
+    n_shards: int,
+    partition: str = 'hash',
+    genres: Optional[Sequence[Any]] = None
+) -> np.ndarray:
+    """
+    Shard of each FAISS row.
+
+    'hash' spreads rows evenly by a stable hash of the document id. 'genre'
+    keeps movies sharing a first genre on one shard, which is uneven but
+    lets genre-filtered searches skip shards; movies without genres fall
+    back to their id.
+    """
+    if partition not in PARTITIONS:
+        raise ValueError(f"Unknown shard partition '{partition}', expected one of {PARTITIONS}")
+    if partition == 'genre' and genres is None:
+        raise ValueError("Genre partitioning needs the genres of every row")
+
+    keys = []
+    for row, doc_id in enumerate(doc_ids):
+        key = doc_id
+        if partition == 'genre' and isinstance(genres[row], list) and genres[row]:
+            key = genres[row][0]
+        keys.append(zlib.crc32(str(key).encode()) % n_shards)
+    return np.array(keys, dtype=np.int32)
+
+
+def _fingerprint(rows: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(rows, dtype=np.int64).tobytes()).hexdigest()
+
+
+def _read_shard(path: Path) -> faiss.Index:
+    flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    try:
+        return faiss.read_index(str(path), flags)
+    except RuntimeError:
+        return faiss.read_index(str(path))
+
+
+def _empty_results(n_queries: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    return np.full((n_queries, k), -np.inf, dtype='float32'), np.full((n_queries, k), -1, dtype=np.int64)
+
+
+# Shard indexes loaded by this worker process: directory -> (fingerprint, index)
+_worker_shards: Dict[str, Tuple[str, faiss.Index]] = {}
+
+
+def _init_worker(threads: int):
+    # One search loop per worker; parallelism comes from the pool.
+    faiss.omp_set_num_threads(max(1, threads))
+
+
+def _search_shard(
+    directory: str,
+    fingerprint: str,
+    queries: np.ndarray,
+    k: int,
+    allowed_rows: Optional[np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Search one shard, (re)loading it when its fingerprint changed since this process last read it."""
+    cached = _worker_shards.get(directory)
+    if cached is None or cached[0] != fingerprint:
+        cached = (fingerprint, _read_shard(Path(directory) / SHARD_FILE))
+        _worker_shards[directory] = cached
+    index = cached[1]
+
+    if index.ntotal == 0:
+        return _empty_results(len(queries), k)
+    if allowed_rows is None:
+        return index.search(queries, k)
+    params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed_rows))
+    return index.search(queries, k, params=params)
+
+
+def merge_results(results: List[Tuple[np.ndarray, np.ndarray]], n_queries: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge per-shard (scores, rows) into the global top-k per query; missing results have row -1."""
+    if not results:
+        return _empty_results(n_queries, k)
+    scores = np.concatenate([s for s, _ in results], axis=1)
+    rows = np.concatenate([r for _, r in results], axis=1)
+    scores = np.where(rows >= 0, scores, -np.inf)
+
+    k_found = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k_found - 1, axis=1)[:, :k_found]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+
+    merged_scores, merged_rows = _empty_results(n_queries, k)
+    merged_scores[:, :k_found] = np.take_along_axis(scores, top, axis=1)
+    merged_rows[:, :k_found] = np.take_along_axis(rows, top, axis=1)
+    merged_rows[~np.isfinite(merged_scores)] = -1
+    return merged_scores, merged_rows
+
+
+class ShardedIndex:
+    """
+    FAISS rows partitioned into shards and searched in parallel worker processes.
+
+    Each shard is an `IndexIDMap` over a flat inner-product index whose ids
+    are the store's global FAISS rows, so merged results plug into the
+    row-aligned metadata, reranker and node lookup unchanged. Shards live in
+    their own directories with a fingerprint of their row set and are
+    rebuilt independently: only shards whose rows changed are rewritten.
+
+    A search is scattered to every shard (only those holding allowed rows
+    when filtered) and the per-shard top-k merged by score. Workers
+    memory-map the shard files, so they share the OS page cache, and reload
+    a shard when its fingerprint changes.
+    """
+
+    def __init__(self, directory: Path, n_shards: int, partition: str = 'hash', workers: Optional[int] = None):
+        if n_shards < 1:
+            raise ValueError("n_shards must be at least 1")
+        if partition not in PARTITIONS:
+            raise ValueError(f"Unknown shard partition '{partition}', expected one of {PARTITIONS}")
+        self.directory = Path(directory)
+        self.n_shards = n_shards
+        self.partition = partition
+        self.workers = min(n_shards, os.cpu_count() or 1) if workers is None else workers
+        self.row_shards = np.empty(0, dtype=np.int32)
+        self.fingerprints: List[Optional[str]] = [None] * n_shards
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def shard_dir(self, shard: int) -> Path:
+        return self.directory / f"shard-{shard:03d}"
+
+    def _read_meta(self, shard: int) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self.shard_dir(shard) / SHARD_META).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write_shard(self, shard: int, rows: np.ndarray, vectors: np.ndarray, fingerprint: str):
+        index = faiss.IndexIDMap(faiss.IndexFlatIP(vectors.shape[1]))
+        if len(rows):
+            index.add_with_ids(np.ascontiguousarray(vectors, dtype='float32'), rows.astype(np.int64))
+
+        directory = self.shard_dir(shard)
+        directory.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so workers never read a partial shard.
+        tmp_path = directory / f"{SHARD_FILE}.tmp"
+        faiss.write_index(index, str(tmp_path))
+        os.replace(tmp_path, directory / SHARD_FILE)
+        (directory / SHARD_META).write_text(json.dumps({
+            'shard': shard,
+            'n_shards': self.n_shards,
+            'partition': self.partition,
+            'rows': int(len(rows)),
+            'fingerprint': fingerprint
+        }))
+
+    def sync(self, row_shards: np.ndarray, get_vectors: Callable[[np.ndarray], np.ndarray]) -> List[int]:
+        """
+        Bring the persisted shards in line with the store's rows.
+
+        Args:
+            row_shards: Output of `shard_assignments` for every FAISS row;
+                rows assigned -1 are left out of every shard
+            get_vectors: Returns the vectors of the given rows
+
+        Returns:
+            The shards that had to be rebuilt
+        """
+        rebuilt = []
+        for shard in range(self.n_shards):
+            rows = np.flatnonzero(row_shards == shard).astype(np.int64)
+            fingerprint = _fingerprint(rows)
+            if self.fingerprints[shard] == fingerprint:
+                continue
+            meta = self._read_meta(shard)
+            if meta is None or meta.get('fingerprint') != fingerprint or not (self.shard_dir(shard) / SHARD_FILE).exists():
+                start = time.perf_counter()
+                self._write_shard(shard, rows, get_vectors(rows), fingerprint)
+                logger.info("Built shard %d/%d (%d rows) in %.2fs", shard, self.n_shards, len(rows), time.perf_counter() - start)
+                rebuilt.append(shard)
+            self.fingerprints[shard] = fingerprint
+        self.row_shards = row_shards
+        return rebuilt
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(_POOL_CONTEXT),
+                initializer=_init_worker,
+                initargs=(1,)
+            )
+        return self._pool
+
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        allowed_rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scatter a batch of queries to the shards and merge the top-k.
+
+        Args:
+            query_vectors: Array of shape (n, dimension)
+            k: Results per query
+            allowed_rows: Global rows the results must come from
+
+        Returns:
+            Tuple of (scores, rows) of shape (n, k), best first; missing
+            results have row -1
+        """
+        queries = np.ascontiguousarray(query_vectors, dtype='float32')
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+
+        tasks = []
+        for shard in range(self.n_shards):
+            shard_rows = None
+            if allowed_rows is not None:
+                shard_rows = allowed_rows[self.row_shards[allowed_rows] == shard]
+                if len(shard_rows) == 0:
+                    continue
+            tasks.append((str(self.shard_dir(shard)), self.fingerprints[shard], queries, k, shard_rows))
+
+        if self.workers > 0 and tasks:
+            pool = self._get_pool()
+            futures = [pool.submit(_search_shard, *task) for task in tasks]
+            results = [future.result() for future in futures]
+        else:
+            results = [_search_shard(*task) for task in tasks]
+        return merge_results(results, len(queries), k)
+
+    def warmup(self, dimension: int):
+        """Start the workers and have them map the shards before the first real query."""
+        for _ in range(max(1, self.workers)):
+            self.search(np.zeros((1, dimension), dtype='float32'), 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'n_shards': self.n_shards,
+            'partition': self.partition,
+            'workers': self.workers,
+            'rows': np.bincount(self.row_shards[self.row_shards >= 0], minlength=self.n_shards).tolist()
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
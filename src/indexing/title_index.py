@@ -0,0 +1,87 @@
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    decomposed = unicodedata.normalize('NFKD', str(title))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', stripped.lower()).strip()
+
+
+def trigrams(normalized: str) -> List[str]:
+    padded = f"  {normalized} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class TitleIndex:
+    """
+    Title lookup built once over the catalog.
+
+    Exact matches go through a normalized-title hash map; everything else
+    falls back to trigram similarity. Duplicate titles are ordered by
+    popularity so the best-known movie wins.
+    """
+
+    def __init__(self, movie_data: pd.DataFrame, title_column: str = 'original_title'):
+        order = np.argsort(-movie_data['popularity'].fillna(0.0).to_numpy(dtype='float64'), kind='stable')
+        self.ids = movie_data.index.to_numpy()[order].tolist()
+        self.titles = [normalize_title(t) for t in movie_data[title_column].to_numpy()[order]]
+
+        self.exact: Dict[str, List[int]] = defaultdict(list)
+        postings: Dict[str, List[int]] = defaultdict(list)
+        self.trigram_counts = np.zeros(len(self.titles), dtype=np.int32)
+        for position, title in enumerate(self.titles):
+            self.exact[title].append(position)
+            grams = trigrams(title)
+            self.trigram_counts[position] = len(grams)
+            for gram in grams:
+                postings[gram].append(position)
+
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def lookup(self, title: str, limit: int = 5, min_score: float = 0.4) -> List[Tuple[Any, float]]:
+        """
+        Rank catalog ids by title similarity.
+
+        Args:
+            title: Title as typed by the user
+            limit: Maximum number of candidates
+            min_score: Minimum Dice coefficient over trigrams for fuzzy matches
+
+        Returns:
+            (movie id, score) pairs, best first; exact matches score 1.0
+        """
+        normalized = normalize_title(title)
+        exact = self.exact.get(normalized)
+        if exact:
+            return [(self.ids[position], 1.0) for position in exact[:limit]]
+
+        grams = [gram for gram in trigrams(normalized) if gram in self.postings]
+        if not grams:
+            return []
+
+        shared = np.bincount(
+            np.concatenate([self.postings[gram] for gram in grams]),
+            minlength=len(self.titles)
+        )
+        scores = 2.0 * shared / (len(trigrams(normalized)) + self.trigram_counts)
+        candidates = np.flatnonzero(scores >= min_score)
+        if len(candidates) == 0:
+            return []
+
+        # Positions are already in popularity order, so a stable sort on
+        # score breaks ties in favour of the more popular movie.
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')][:limit]
+        return [(self.ids[position], float(scores[position])) for position in ranked]
+
+    def best_match(self, title: str, min_score: float = 0.4) -> Optional[Any]:
+        """Return the id of the best matching movie, if any."""
+        matches = self.lookup(title, limit=1, min_score=min_score)
+        return matches[0][0] if matches else None
@@ -0,0 +1,131 @@
+import base64
+import json
+import logging
+import os
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+from llama_index import Document
+from llama_index.schema import BaseNode
+from llama_index.storage.docstore.utils import doc_to_json, json_to_doc
+
+logger = logging.getLogger(__name__)
+
+
+def upsert_record(document: Document, nodes: List[BaseNode], vectors: np.ndarray) -> Dict[str, Any]:
+    """Log record for a document with its nodes and their vectors, so replay does not re-embed."""
+    return {
+        'op': 'upsert',
+        'id': document.id_,
+        'document': {'id_': document.id_, 'text': document.text, 'metadata': document.metadata},
+        'nodes': [doc_to_json(node) for node in nodes],
+        'vectors': base64.b64encode(np.ascontiguousarray(vectors, dtype='float32').tobytes()).decode('ascii')
+    }
+
+
+def delete_record(doc_id: str) -> Dict[str, Any]:
+    return {'op': 'delete', 'id': doc_id}
+
+
+def decode_upsert(record: Dict[str, Any]) -> Tuple[Document, List[BaseNode], np.ndarray]:
+    nodes = [json_to_doc(node) for node in record['nodes']]
+    vectors = np.frombuffer(base64.b64decode(record['vectors']), dtype='float32').reshape(len(nodes), -1)
+    return Document(**record['document']), nodes, vectors
+
+
+class UpdateLog:
+    """
+    Append-only write-ahead log of document upserts and deletes.
+
+    One JSON record per line, each with an increasing sequence number. A
+    batch is written and fsynced before the index applies it, so an
+    acknowledged change survives a crash. A snapshot records the last
+    sequence number it contains; replay applies only later records, and
+    `truncate` drops the folded ones (see `advance`). A torn final line from a crash
+    mid-write is cut off when the log is opened.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.last_seq = 0
+        self._records = 0
+        self._lock = threading.Lock()
+        self._repair()
+
+    def __len__(self) -> int:
+        return self._records
+
+    def _repair(self):
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            logger.warning("Dropping a torn record at the end of %s", self.path)
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+                os.fsync(f.fileno())
+        for line in data[:end].splitlines():
+            self.last_seq = json.loads(line)['seq']
+            self._records += 1
+
+    def advance(self, seq: int):
+        """
+        Number new records after `seq`.
+
+        A truncated log no longer holds the sequence numbers folded into the
+        snapshot, so the store seeds them from its manifest; otherwise new
+        records would reuse numbers that replay skips.
+        """
+        with self._lock:
+            self.last_seq = max(self.last_seq, seq)
+
+    def append(self, records: List[Dict[str, Any]]) -> int:
+        """Durably append records; returns the sequence number of the last one."""
+        if not records:
+            return self.last_seq
+        with self._lock:
+            lines = []
+            for record in records:
+                self.last_seq += 1
+                lines.append(json.dumps({'seq': self.last_seq, **record}))
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._records += len(records)
+            return self.last_seq
+
+    def read(self, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """Records with a sequence number above `after_seq`, oldest first."""
+        if not self.path.exists():
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record['seq'] > after_seq:
+                    yield record
+
+    def truncate(self, through_seq: int):
+        """Drop records up to `through_seq` (folded into a snapshot), keeping any appended since."""
+        with self._lock:
+            if not self.path.exists():
+                return
+            with open(self.path, encoding='utf-8') as f:
+                kept = [line for line in f if json.loads(line)['seq'] > through_seq]
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(kept)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._records = len(kept)
+
+    def reset(self):
+        """Forget every record, e.g. after a full rebuild."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self.last_seq = 0
+            self._records = 0
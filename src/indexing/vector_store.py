@@ -1,149 +1,1442 @@
 import faiss
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
 import numpy as np
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Optional, Dict, Set
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 from datetime import datetime
-from functools import lru_cache
 from llama_index import Document
+from llama_index.data_structs.data_structs import IndexDict
 from llama_index.vector_stores import FaissVectorStore
-from llama_index import VectorStoreIndex, StorageContext
+from llama_index import StorageContext, ServiceContext, load_index_from_storage
+from llama_index.vector_stores.simple import DEFAULT_VECTOR_STORE, NAMESPACE_SEP
+from llama_index.vector_stores.types import DEFAULT_PERSIST_FNAME
+from llama_index.query_engine import RetrieverQueryEngine
+from llama_index.schema import BaseNode, MetadataMode, NodeRelationship, NodeWithScore, RelatedNodeInfo, TextNode
+from llama_index.storage.docstore import SimpleDocumentStore
+from llama_index.storage.index_store import SimpleIndexStore
 
-from ..config.settings import INDEX_DIR, EMBEDDING_DIMENSION
+from ..config.settings import (
+    INDEX_DIR,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_CACHE_DIR,
+    ANN_BACKEND,
+    ANN_PARAMS,
+    NEIGHBOR_GRAPH_SIZE,
+    SEARCH_CACHE_BYTES,
+    CONTEXT_TOKEN_BUDGET,
+    SHARD_COUNT,
+    SHARD_PARTITION,
+    SHARD_WORKERS,
+    COMPACTION_THRESHOLD,
+    INDEX_GENERATIONS_KEPT,
+    REBUILD_SAMPLE_SIZE,
+    REBUILD_RECALL_K,
+    REBUILD_MIN_RECALL,
+    REBUILD_MAX_SHRINK
+)
 from ..models.movie import Movie
+from ..utils.metrics import metrics, timed, timer
+from ..utils.rwlock import ReadWriteLock
+from .ann import build_index, configure_index, evaluate_backends
+from .context_builder import ContextBuilder
+from .document_store import DocumentStore
+from .embedding_cache import CachedEmbedding, EmbeddingCache
+from .embedding_engine import EmbeddingEngine
+from .embeddings import embed_queries
+from .generations import collect_generations, current_generation, new_generation, set_current_generation
+from .metadata_index import MetadataIndex, Range
+from .neighbors import NeighborGraph
+from .retriever import MovieRetriever
+from .search_cache import SearchCache, rows_key, vector_key
+from .sharding import ShardedIndex, shard_assignments
+from .update_log import UpdateLog, decode_upsert, delete_record, upsert_record
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+FAISS_FILE = f"{DEFAULT_VECTOR_STORE}{NAMESPACE_SEP}{DEFAULT_PERSIST_FNAME}"
+NEIGHBORS_DIR = "neighbors"
+SHARDS_DIR = "shards"
+DOCUMENTS_DIR = "documents"
+ROWS_FILE = "rows.json"
+LEGACY_LOOKUP_FILE = "document_lookup.npy"
+UPDATE_LOG_FILE = "updates.log"
+# A compacted snapshot is staged here and marked complete before it is
+# moved into place.
+COMPACTION_DIR = "compaction"
+COMPACTION_DONE = "COMPLETE"
+
+# Everything that belongs to one index generation; a rebuild swaps these
+# over from the store that built the new generation.
+GENERATION_STATE = (
+    'index_path', 'index', 'index_mmapped', 'corpus_hash', 'documents', 'pending_updates',
+    'update_log', 'dead_rows', '_dead_selector', 'index_configs', 'current_config',
+    '_row_node_ids', '_row_doc_ids', '_row_spans', '_doc_rows', '_metadata_index',
+    '_neighbor_graph', '_neighbor_graph_loaded', 'shards', '_shards_synced'
+)
+
+
+def _write_rows(directory: Path, doc_ids: List[str], spans: List[Tuple[int, Optional[int]]]):
+    (directory / ROWS_FILE).write_text(json.dumps({'doc_ids': doc_ids, 'spans': spans}))
+
+
+def _reading(method):
+    """Run a store method on one index generation: a swap waits for it to return."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._guard.reading():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class MovieVectorStore:
-    def __init__(self, cache_size: int = 1000):
-        self.index_path = Path(INDEX_DIR)
+    def __init__(
+        self,
+        search_cache_bytes: int = SEARCH_CACHE_BYTES,
+        service_context: Optional[ServiceContext] = None,
+        use_embedding_cache: bool = True,
+        index_dir: Optional[Path] = None,
+        n_shards: int = SHARD_COUNT,
+        compaction_threshold: int = COMPACTION_THRESHOLD
+    ):
+        self.index_root = Path(index_dir or INDEX_DIR)
+        self.index_path = current_generation(self.index_root)
+        self.n_shards = n_shards
+        self.compaction_threshold = compaction_threshold
         self.dimension = EMBEDDING_DIMENSION
+        self.service_context = service_context or ServiceContext.from_defaults(
+            embed_model=EmbeddingEngine()
+        )
+        self.embedding_model = self.service_context.embed_model.model_name
+        self.embedding_engine: Optional[EmbeddingEngine] = None
+        if isinstance(self.service_context.embed_model, EmbeddingEngine):
+            self.embedding_engine = self.service_context.embed_model
+
+        self.embedding_cache = None
+        if use_embedding_cache:
+            self.embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, self.dimension)
+            self.service_context = ServiceContext.from_service_context(
+                self.service_context,
+                embed_model=CachedEmbedding(self.service_context.embed_model, self.embedding_cache)
+            )
         self.index = None
-        self.cache_size = cache_size
-        self.document_lookup: Dict[str, Document] = {}
+        self.index_mmapped = False
+        self.corpus_hash: Optional[str] = None
+        self.search_cache = SearchCache(search_cache_bytes)
+        self.documents = DocumentStore.empty()
         self.last_modified = datetime.now()
-        self.pending_updates: Set[str] = set()
+        # Documents changed since the snapshot on disk: id -> hash, None if deleted
+        self.pending_updates: Dict[str, Optional[str]] = {}
+        self.update_log = UpdateLog(self.index_path / UPDATE_LOG_FILE)
+        # FAISS rows are never reused or moved between snapshots: replaced
+        # and deleted documents leave dead rows that searches skip until
+        # the next compaction.
+        self.dead_rows: Set[int] = set()
+        self._dead_selector: Optional[faiss.IDSelector] = None
+        self._write_lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        # Readers pin the live generation; updates and swaps take the write side.
+        self._guard = ReadWriteLock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self.rebuild_status: Dict[str, Any] = {'state': 'idle'}
         
-        self.index_configs = {
-            'flat': faiss.IndexFlatIP(self.dimension),
-            'ivf': self._create_ivf_index(),
-        }
+        # 'flat' is the persisted ground truth; approximate backends are
+        # derived from its vectors on demand.
+        self.index_configs: Dict[str, faiss.Index] = {'flat': faiss.IndexFlatIP(self.dimension)}
+        self.ann_params = {backend: dict(params) for backend, params in ANN_PARAMS.items()}
+        self.current_config = 'flat'
+        self._row_node_ids: Optional[List[str]] = None
+        # Source document and character span of the node at each FAISS row.
+        # Nodes are built from these and the document store on demand, so
+        # llama_index's docstore is kept empty.
+        self._row_doc_ids: List[str] = []
+        self._row_spans: List[Tuple[int, Optional[int]]] = []
+        self._doc_rows: Optional[Dict[str, List[int]]] = None
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._neighbor_graph: Optional[NeighborGraph] = None
+        self._neighbor_graph_loaded = False
+        self.shards: Optional[ShardedIndex] = None
+        self._shards_synced = False
+
+    def reading(self):
+        """
+        Pin the live index generation across several calls.
+
+        Rows, metadata and nodes from calls made inside the block all come
+        from the same generation; a rebuild swaps only once it is left.
+        """
+        return self._guard.reading()
+
+    @_reading
+    def get_document(self, doc_id: str) -> Optional[Document]:
+        """Materialize the indexed Document for a movie id."""
+        return self.documents.get(doc_id)
+
+    @_reading
+    def row_metadata(self, rows: Iterable[int]) -> List[Tuple[str, Dict[str, Any]]]:
+        """(document id, metadata) for FAISS rows, read from the document store without building nodes."""
+        results = []
+        for row in rows:
+            doc_id = self.row_doc_ids[row]
+            results.append((doc_id, self.documents.metadata(self.documents.position(doc_id))))
+        return results
+
+    @_reading
+    def get_vectors(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the stored document vectors in FAISS row order, or only those of `rows`."""
+        flat_index = self.index_configs['flat']
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            if len(rows) == 0:
+                return np.empty((0, self.dimension), dtype='float32')
+            return flat_index.reconstruct_batch(rows)
+        if flat_index.ntotal == 0:
+            return np.empty((0, self.dimension), dtype='float32')
+        return flat_index.reconstruct_n(0, flat_index.ntotal)
+
+    def use_backend(self, backend: str, **params) -> faiss.Index:
+        """
+        Select the search backend, building it from the stored vectors if needed.
+
+        Args:
+            backend: One of 'flat', 'ivf' or 'hnsw'
+            **params: Overrides for `ANN_PARAMS`, e.g. `nprobe=16`
+
+        Returns:
+            The populated FAISS index for that backend
+        """
+        if backend != 'flat':
+            settings = self.ann_params.setdefault(backend, {})
+            rebuild = any(key not in ('nprobe', 'ef_search') and settings.get(key) != value
+                          for key, value in params.items())
+            settings.update(params)
+
+            if rebuild or backend not in self.index_configs:
+                logger.info("Building %s index over %d vectors", backend, self.index_configs['flat'].ntotal)
+                self.index_configs[backend] = build_index(backend, self.get_vectors(), settings)
+            else:
+                configure_index(self.index_configs[backend], settings)
+
+        self.current_config = backend
+        return self.index_configs[backend]
+
+    def _invalidate_backends(self):
+        """Drop derived ANN indexes and row metadata after the underlying vectors change."""
+        self.index_configs = {'flat': self.index_configs['flat']}
+        self._dead_selector = None
         self.current_config = 'flat'
+        self._row_node_ids = None
+        self._doc_rows = None
+        self._metadata_index = None
+        # Rows added since the graph was built have no neighbour lists yet.
+        self._neighbor_graph = None
+        self._neighbor_graph_loaded = True
+        self._shards_synced = False
+        self.search_cache.clear()
+
+    @property
+    def content_version(self) -> str:
+        """
+        Identifies what the index holds and in which row order.
+
+        Built from the live generation, the snapshot's corpus hash and the
+        last logged change applied on top, so it survives restarts of an
+        unchanged index and changes with every update, compaction and swap.
+        """
+        return f"{self.index_path.name}:{self.corpus_hash}:{self.update_log.last_seq}"
+
+    @property
+    def row_node_ids(self) -> List[str]:
+        """Node id stored at each FAISS row."""
+        if self._row_node_ids is None:
+            nodes_dict = self.index.index_struct.nodes_dict
+            self._row_node_ids = [nodes_dict[str(row)] for row in range(len(nodes_dict))]
+        return self._row_node_ids
+
+    @property
+    def row_doc_ids(self) -> List[str]:
+        """Source document id stored at each FAISS row."""
+        return self._row_doc_ids
+
+    def _set_rows(self, nodes: Iterable[BaseNode]):
+        """Record the source document and span of each node, in FAISS row order."""
+        self._row_doc_ids = []
+        self._row_spans = []
+        self._append_rows(nodes)
+
+    def _append_rows(self, nodes: Iterable[BaseNode]):
+        for node in nodes:
+            self._row_doc_ids.append(node.ref_doc_id)
+            if node.start_char_idx is None or node.end_char_idx is None:
+                self._row_spans.append((0, None))
+            else:
+                self._row_spans.append((node.start_char_idx, node.end_char_idx))
+
+    def _read_rows(self) -> bool:
+        rows_path = self.index_path / ROWS_FILE
+        if not rows_path.exists():
+            return False
+        rows = json.loads(rows_path.read_text())
+        self._row_doc_ids = rows['doc_ids']
+        self._row_spans = [tuple(span) for span in rows['spans']]
+        return True
+
+    def _row_node(self, row: int) -> TextNode:
+        """The node stored at a live FAISS row, built from the document store."""
+        doc_id = self._row_doc_ids[row]
+        pos = self.documents.position(doc_id)
+        start, end = self._row_spans[row]
+        return TextNode(
+            id_=self.row_node_ids[row],
+            text=self.documents.overview(pos)[start:end],
+            metadata=self.documents.metadata(pos),
+            start_char_idx=start,
+            end_char_idx=end,
+            relationships={NodeRelationship.SOURCE: RelatedNodeInfo(node_id=doc_id)}
+        )
+
+    def _rows_metadata(self) -> List[Dict[str, Any]]:
+        """Metadata of every FAISS row's document; empty for rows of deleted documents."""
+        positions = (self.documents.position(doc_id) for doc_id in self._row_doc_ids)
+        return [{} if pos is None else self.documents.metadata(pos) for pos in positions]
+
+    @property
+    def doc_rows(self) -> Dict[str, List[int]]:
+        """Live FAISS rows of each document, in row order."""
+        if self._doc_rows is None:
+            self._doc_rows = {}
+            for row, doc_id in enumerate(self.row_doc_ids):
+                if row not in self.dead_rows:
+                    self._doc_rows.setdefault(doc_id, []).append(row)
+        return self._doc_rows
+
+    def _live_selector(self) -> Optional[faiss.IDSelector]:
+        """Selector excluding dead rows, or None when every row is live."""
+        if not self.dead_rows:
+            return None
+        if self._dead_selector is None:
+            dead = np.fromiter(self.dead_rows, dtype=np.int64, count=len(self.dead_rows))
+            self._dead_selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(dead))
+        return self._dead_selector
+
+    def _live_rows(self, rows: np.ndarray) -> np.ndarray:
+        if not self.dead_rows:
+            return rows
+        dead = np.fromiter(self.dead_rows, dtype=np.int64, count=len(self.dead_rows))
+        return rows[~np.isin(rows, dead)]
+
+    @property
+    def metadata_index(self) -> MetadataIndex:
+        """Genre and numeric filter structures aligned with FAISS rows."""
+        if self._metadata_index is None:
+            self._metadata_index = MetadataIndex(self._rows_metadata())
+        return self._metadata_index
+
+    def neighbor_graph_key(self) -> Dict[str, Any]:
+        """What a neighbour table depends on: the corpus, the embedding space and the FAISS row order."""
+        row_order = hashlib.sha256("\n".join(self.row_node_ids).encode()).hexdigest()
+        return {
+            'corpus_hash': self.corpus_hash,
+            'embedding_model': self.embedding_model,
+            'dimension': self.dimension,
+            'rows': self.index_configs['flat'].ntotal,
+            'row_order': row_order
+        }
+
+    @property
+    def neighbor_graph(self) -> Optional[NeighborGraph]:
+        """Persisted neighbour table, if one was built for the current index."""
+        if not self._neighbor_graph_loaded:
+            graph = NeighborGraph.load(self.index_path / NEIGHBORS_DIR)
+            if graph is not None and graph.key == self.neighbor_graph_key():
+                self._neighbor_graph = graph
+            self._neighbor_graph_loaded = True
+        return self._neighbor_graph
+
+    def build_neighbor_graph(self, n_neighbors: int = NEIGHBOR_GRAPH_SIZE) -> NeighborGraph:
+        """Precompute and persist the top-N neighbours of every movie."""
+        if not self.index:
+            raise ValueError("Index not initialized. Call initialize_index first.")
+
+        graph = NeighborGraph.build(self.get_vectors(), n_neighbors, self.neighbor_graph_key())
+        graph.save(self.index_path / NEIGHBORS_DIR)
+        self._neighbor_graph = graph
+        self._neighbor_graph_loaded = True
+        return graph
+
+    def enable_sharding(
+        self,
+        n_shards: int,
+        partition: str = SHARD_PARTITION,
+        workers: Optional[int] = SHARD_WORKERS
+    ) -> ShardedIndex:
+        """
+        Serve default-backend searches from a sharded copy of the flat index.
+
+        Shards are persisted under `<index>/shards/<partition>-<n>/`; existing
+        shards whose rows have not changed are reused as they are.
+
+        Args:
+            n_shards: Number of shards
+            partition: 'hash' (even split by document id) or 'genre'
+            workers: Search processes; 0 searches the shards in this process
+
+        Returns:
+            The synced sharded index
+        """
+        if not self.index:
+            raise ValueError("Index not initialized. Call initialize_index first.")
+
+        self.disable_sharding()
+        self.shards = ShardedIndex(
+            self.index_path / SHARDS_DIR / f"{partition}-{n_shards}",
+            n_shards,
+            partition,
+            workers
+        )
+        self._shards_synced = False
+        self._sync_shards()
+        self.search_cache.clear()
+        return self.shards
+
+    def disable_sharding(self):
+        """Go back to searching the in-process index."""
+        if self.shards is not None:
+            self.shards.close()
+            self.shards = None
+            self.search_cache.clear()
+
+    def _sync_shards(self):
+        """Rebuild the shards whose rows changed since they were written."""
+        if self.shards is None or self._shards_synced:
+            return
+        with timer('shard_sync'):
+            genres = None
+            if self.shards.partition == 'genre':
+                genres = [metadata.get('genres') for metadata in self._rows_metadata()]
+            row_shards = shard_assignments(self.row_doc_ids, self.shards.n_shards, self.shards.partition, genres)
+            # Dead rows are left out of every shard.
+            row_shards[list(self.dead_rows)] = -1
+            self.shards.sync(row_shards, self.get_vectors)
+        self._shards_synced = True
+
+    @_reading
+    def search_batch(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        backend: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search many queries in a single FAISS call.
+
+        Returns:
+            Tuple of (scores, row ids) arrays of shape (len(query_vectors), k);
+            missing results have row id -1
+        """
+        queries = np.ascontiguousarray(query_vectors, dtype='float32').reshape(-1, self.dimension)
+        if backend is None and self.shards is not None:
+            self._sync_shards()
+            return self.shards.search(queries, k)
+        
+        backend = backend or self.current_config
+        if backend not in self.index_configs:
+            self.use_backend(backend)
+        index = self.index_configs[backend]
+        selector = self._live_selector()
+        if selector is None:
+            return index.search(queries, k)
+        return index.search(queries, k, params=self._search_params(index, selector))
+
+    @_reading
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        k: int,
+        backend: Optional[str] = None
+    ) -> List[List[NodeWithScore]]:
+        """Retrieve the top-k nodes for many queries with one embedding pass and one search."""
+        if not self.index:
+            raise ValueError("Index not initialized. Call initialize_index first.")
+        if not queries:
+            return []
 
-    def _create_ivf_index(self, nlist: int = 100) -> faiss.Index:
-        """Create an IVF index for faster approximate search."""
-        quantizer = faiss.IndexFlatIP(self.dimension)
-        index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
-        return index
+        query_vectors = embed_queries(self.service_context.embed_model, queries)
+        scores, rows = self.search_batch(query_vectors, k, backend)
 
-    @lru_cache(maxsize=1000)
-    def _cached_similarity_search(self, query_vector: tuple) -> List[int]:
-        """Cache similarity search results for frequent queries."""
-        query_vector_array = np.array(query_vector).reshape(1, -1)
-        D, I = self.index_configs[self.current_config].search(query_vector_array, self.cache_size)
-        return I[0].tolist()
+        results = []
+        for query_scores, query_rows in zip(scores, rows):
+            found = query_rows >= 0
+            results.append(self.nodes_for_rows(query_rows[found], query_scores[found]))
+        return results
+
+    @_reading
+    def similar_nodes(self, doc_id: str, k: int) -> List[NodeWithScore]:
+        """
+        Movies most similar to an indexed movie, by overview embedding.
+
+        Answers from the neighbour graph when available and falls back to a
+        search with the movie's own stored vector.
+        """
+        if not self.index:
+            raise ValueError("Index not initialized. Call initialize_index first.")
+
+        doc_rows = self.doc_rows.get(doc_id)
+        if not doc_rows:
+            return []
+        row = doc_rows[0]
+
+        graph = self.neighbor_graph
+        if graph is not None and row < len(graph):
+            rows, scores = graph.neighbors(row, k + 1)
+        else:
+            vector = self.index_configs['flat'].reconstruct(int(row))
+            scores, rows = self.search(vector, k + 1, backend='flat')
+
+        keep = [i for i, r in enumerate(rows) if self.row_doc_ids[r] != doc_id and r not in self.dead_rows][:k]
+        return self.nodes_for_rows(np.asarray(rows)[keep], np.asarray(scores)[keep])
+
+    @_reading
+    def nodes_for_rows(self, rows: np.ndarray, scores: np.ndarray) -> List[NodeWithScore]:
+        """Scored nodes for FAISS rows, e.g. from `search`."""
+        with timer('node_fetch'):
+            nodes = [self._row_node(row) for row in rows]
+        return [NodeWithScore(node=node, score=float(score)) for node, score in zip(nodes, scores)]
+
+    def _search_params(self, index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+        if isinstance(index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+        if isinstance(index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+        return faiss.SearchParameters(sel=selector)
+
+    @_reading
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        allowed_rows: Optional[np.ndarray] = None,
+        backend: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search FAISS, optionally restricted to a set of rows.
+
+        Args:
+            query_vector: Query embedding
+            k: Number of results
+            allowed_rows: Row ids the results must come from
+            backend: Index to search; defaults to the shards when sharding
+                is enabled, else the current backend
+
+        Returns:
+            Tuple of (scores, row ids), best first
+        """
+        sharded = backend is None and self.shards is not None
+        if sharded:
+            backend = 'sharded'
+        else:
+            backend = backend or self.current_config
+            if backend not in self.index_configs:
+                self.use_backend(backend)
+        query = np.asarray(query_vector, dtype='float32').reshape(1, -1)
+
+        cache_key = (
+            vector_key(query), k, backend,
+            tuple(sorted(self.ann_params.get(backend, {}).items())),
+            rows_key(allowed_rows)
+        )
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if allowed_rows is not None:
+            allowed_rows = self._live_rows(np.asarray(allowed_rows, dtype=np.int64))
+            if len(allowed_rows) == 0:
+                return np.empty(0, dtype='float32'), np.empty(0, dtype=np.int64)
+        if sharded:
+            self._sync_shards()
+            scores, rows = self.shards.search(query, k, allowed_rows)
+        elif allowed_rows is None:
+            index = self.index_configs[backend]
+            selector = self._live_selector()
+            if selector is None:
+                scores, rows = index.search(query, k)
+            else:
+                scores, rows = index.search(query, k, params=self._search_params(index, selector))
+        else:
+            index = self.index_configs[backend]
+            selector = faiss.IDSelectorBatch(allowed_rows)
+            scores, rows = index.search(query, k, params=self._search_params(index, selector))
+            # Approximate backends can miss sparse filters; fall back to exact search.
+            if backend != 'flat' and (rows[0] >= 0).sum() < min(k, len(allowed_rows)):
+                flat_index = self.index_configs['flat']
+                scores, rows = flat_index.search(query, k, params=self._search_params(flat_index, selector))
+
+        found = rows[0] >= 0
+        return self.search_cache.put(cache_key, scores[0][found], rows[0][found])
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query string with the store's embedding model."""
+        return self.service_context.embed_model.get_query_embedding(query)
+
+    @_reading
+    def retrieve(
+        self,
+        query: Union[str, List[float]],
+        k: int,
+        genres: Optional[List[str]] = None,
+        ranges: Optional[Dict[str, Range]] = None,
+        backend: Optional[str] = None
+    ) -> List[NodeWithScore]:
+        """
+        Retrieve the top-k nodes for a query, pushing metadata filters into the search.
+
+        Args:
+            query: Query text or a precomputed query embedding
+            k: Number of nodes to return
+            genres: Keep movies with at least one of these genres
+            ranges: Inclusive (low, high) bounds on vote_average, vote_count, budget, runtime or popularity
+            backend: Index to search; defaults to the current backend
+
+        Returns:
+            Scored nodes, best first
+        """
+        if not self.index:
+            raise ValueError("Index not initialized. Call initialize_index first.")
+
+        if isinstance(query, str):
+            with timer('embed_query'):
+                query = self.embed_query(query)
+
+        allowed_rows = None
+        if genres or ranges:
+            with timer('metadata_filter'):
+                allowed_rows = self.metadata_index.select(genres, ranges)
+        with timer('faiss_search'):
+            scores, rows = self.search(query, k, allowed_rows, backend)
+        return self.nodes_for_rows(rows, scores)
 
     def initialize_index(self, documents: Optional[List[Document]] = None):
-        """Initialize or load the FAISS index with optimized settings."""
-        if self.index_path.exists() and not documents:
+        """
+        Initialize or load the FAISS index with optimized settings.
+
+        When documents are given, the persisted index is reused as long as it
+        holds the same corpus, once the changes logged since its last
+        snapshot are replayed, and was embedded with the same model;
+        otherwise the corpus is embedded from scratch. With `n_shards` above 1 the rows are
+        then split into shards (see `enable_sharding`).
+        """
+        if not documents:
+            if not self.index_path.exists():
+                raise ValueError("Documents required for new index creation")
             self._load_existing_index()
+        elif self._manifest_matches(self._build_manifest(documents)):
+            logger.info("Persisted index matches the corpus, skipping embedding")
+            self._load_existing_index(documents=documents)
         else:
             self._create_new_index(documents)
 
-    def _load_existing_index(self):
-        """Load existing index with optimizations."""
+        if self.n_shards > 1 and self.shards is None:
+            self.enable_sharding(self.n_shards)
+
+    def _build_manifest(self, documents: Iterable[Document]) -> Dict[str, Any]:
+        """Describe the corpus and embedding space an index was built from."""
+        return self._manifest_for_hashes({doc.id_: doc.hash for doc in documents})
+
+    def _manifest_for_hashes(self, hashes: Dict[str, str]) -> Dict[str, Any]:
+        corpus_hash = hashlib.sha256()
+        for doc_id in sorted(hashes):
+            corpus_hash.update(f"{doc_id}:{hashes[doc_id]}\n".encode())
+
+        return {
+            'embedding_model': self.embedding_model,
+            'dimension': self.dimension,
+            'index_type': 'flat',
+            'corpus_hash': corpus_hash.hexdigest(),
+            'documents': hashes
+        }
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        manifest_path = self.index_path / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
         try:
-            self.index = VectorStoreIndex.load_from_disk(
-                str(self.index_path),
-                store_loading_fn=lambda: FaissVectorStore.from_persist_dir(str(self.index_path))
-            )
-            
-            cache_path = self.index_path / "document_lookup.npy"
-            if cache_path.exists():
-                self.document_lookup = np.load(cache_path, allow_pickle=True).item()
+            return json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
 
-        except Exception as e:
-            raise ValueError(f"Error loading index: {e}")
+    def _manifest_matches(self, manifest: Dict[str, Any]) -> bool:
+        """Check whether the persisted index, with its logged changes replayed, holds the same corpus and model."""
+        with self._write_lock:
+            self._finish_compaction()
+            persisted = self._read_manifest()
+            if persisted is None or not (self.index_path / FAISS_FILE).exists():
+                return False
+            records = list(self.update_log.read(persisted.get('log_seq', 0)))
+
+        if records:
+            hashes = dict(persisted['documents'])
+            for record in records:
+                if record['op'] == 'delete':
+                    hashes.pop(record['id'], None)
+                else:
+                    hashes[record['id']] = Document(**record['document']).hash
+            persisted = {**persisted, 'corpus_hash': self._manifest_for_hashes(hashes)['corpus_hash']}
 
+        keys = ('embedding_model', 'dimension', 'index_type', 'corpus_hash')
+        return all(persisted.get(key) == manifest[key] for key in keys)
+
+    def _read_faiss_index(self, mmap: bool = True) -> faiss.Index:
+        """Read the persisted FAISS index, memory-mapping it when supported."""
+        path = str(self.index_path / FAISS_FILE)
+        if mmap:
+            flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+            try:
+                index = faiss.read_index(path, flags)
+                self.index_mmapped = True
+                return index
+            except RuntimeError:
+                logger.debug("Memory-mapped read not supported for %s", path)
+
+        self.index_mmapped = False
+        return faiss.read_index(path)
+
+    @timed('index_load')
+    def _load_existing_index(
+        self,
+        load_documents: bool = True,
+        mmap: bool = True,
+        documents: Optional[List[Document]] = None
+    ):
+        """
+        Load the persisted snapshot and replay the update log on top of it.
+
+        Args:
+            load_documents: Also load the document store
+            mmap: Memory-map the FAISS index; ignored when there are logged
+                changes to apply
+            documents: Corpus to build the document store from if none was
+                persisted
+        """
+        with self._write_lock, self._guard.writing():
+            self._finish_compaction()
+            log_seq = (self._read_manifest() or {}).get('log_seq', 0)
+            self.update_log.advance(log_seq)
+            records = list(self.update_log.read(log_seq))
+            try:
+                self._load_snapshot(load_documents, mmap and not records, documents)
+            except Exception as e:
+                raise ValueError(f"Error loading index: {e}")
+            if records:
+                self._replay(records)
+                logger.info("Replayed %d logged updates", len(records))
+
+    def _load_snapshot(self, load_documents: bool, mmap: bool, documents: Optional[List[Document]]):
+        faiss_index = self._read_faiss_index(mmap=mmap)
+        storage_context = StorageContext.from_defaults(
+            vector_store=FaissVectorStore(faiss_index=faiss_index),
+            persist_dir=str(self.index_path)
+        )
+        self.index = load_index_from_storage(
+            storage_context,
+            service_context=self.service_context
+        )
+        self.dead_rows = set()
+        self.pending_updates = {}
+        self._invalidate_backends()
+        self.index_configs = {'flat': faiss_index}
+        if not self._read_rows():
+            # Snapshots from before the row table keep every node in the
+            # docstore; it stays loaded until the next snapshot replaces it.
+            logger.info("No %s in %s; reading rows from the docstore", ROWS_FILE, self.index_path)
+            self._set_rows(self.index.docstore.get_nodes(self.row_node_ids))
+        self.corpus_hash = (self._read_manifest() or {}).get('corpus_hash')
+        manifest_path = self.index_path / MANIFEST_FILE
+        if manifest_path.exists():
+            self.last_modified = datetime.fromtimestamp(manifest_path.stat().st_mtime)
+        self._neighbor_graph_loaded = False
+
+        if load_documents:
+            self.documents = DocumentStore.load(self.index_path / DOCUMENTS_DIR, mmap=mmap)
+            if self.documents is None:
+                self.documents = DocumentStore.from_documents(documents or [])
+                if documents:
+                    self.documents.save(self.index_path / DOCUMENTS_DIR)
+            if (self.index_path / LEGACY_LOOKUP_FILE).exists():
+                logger.info("Ignoring pickled %s; it is removed on the next save", LEGACY_LOOKUP_FILE)
+
+    def _ensure_writable(self):
+        """Memory-mapped indexes are read-only; reload an owned copy before mutating."""
+        if self.index_mmapped:
+            self._load_existing_index(load_documents=False, mmap=False)
+
+    @timed('index_build')
     def _create_new_index(self, documents: List[Document]):
         """Create new index with optimizations."""
         if not documents:
             raise ValueError("Documents required for new index creation")
 
-        self.document_lookup = {doc.id_: doc for doc in documents}
+        self.documents = DocumentStore.from_documents(documents)
+        # The new snapshot supersedes every logged change and derived file.
+        self.update_log.reset()
+        shutil.rmtree(self.index_path / NEIGHBORS_DIR, ignore_errors=True)
+        self.dead_rows = set()
+        self.pending_updates = {}
 
-        vector_store = FaissVectorStore(faiss_index=self.index_configs[self.current_config])
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
+        # Embedded in batches and added to FAISS in one call. The index
+        # struct maps rows to node ids; the nodes themselves are rebuilt
+        # from the document store, so the docstore is left empty.
+        start = time.perf_counter()
+        nodes = self.service_context.node_parser.get_nodes_from_documents(documents, show_progress=True)
+        vectors = np.asarray(
+            self.service_context.embed_model.get_text_embedding_batch(
+                [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes],
+                show_progress=True
+            ),
+            dtype='float32'
+        ).reshape(-1, self.dimension)
 
-        batch_size = 1000
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            if i == 0:
-                self.index = VectorStoreIndex.from_documents(
-                    documents=batch,
-                    storage_context=storage_context,
-                    show_progress_bar=True
-                )
-            else:
-                self.index.refresh_ref_docs(batch)
+        flat_index = faiss.IndexFlatIP(self.dimension)
+        flat_index.add(vectors)
+        index_struct = IndexDict()
+        for row, node in enumerate(nodes):
+            index_struct.nodes_dict[str(row)] = node.node_id
+        index_store = SimpleIndexStore()
+        index_store.add_index_struct(index_struct)
+        storage_context = StorageContext.from_defaults(
+            docstore=SimpleDocumentStore(),
+            index_store=index_store,
+            vector_store=FaissVectorStore(faiss_index=flat_index)
+        )
+        self.index = load_index_from_storage(storage_context, service_context=self.service_context)
+        self.index_configs = {'flat': flat_index}
+        self._invalidate_backends()
+        self._set_rows(nodes)
+        seconds = time.perf_counter() - start
+        logger.info(
+            "Indexed %d documents in %.2fs (%.0f docs/s)",
+            len(documents), seconds, len(documents) / seconds
+        )
+
+        self._save_index(self._build_manifest(documents))
 
-        self._save_index()
+    def _updated_manifest(self, documents: DocumentStore, changes: Dict[str, Optional[str]], log_seq: int) -> Dict[str, Any]:
+        """Manifest for a snapshot folding `changes` into the persisted one, without materializing other documents."""
+        persisted = self._read_manifest()
+        if persisted is None:
+            hashes = {doc_id: documents.get(doc_id).hash for doc_id in documents.ids()}
+        else:
+            hashes = dict(persisted['documents'])
+            for doc_id, doc_hash in changes.items():
+                if doc_hash is None:
+                    hashes.pop(doc_id, None)
+                else:
+                    hashes[doc_id] = doc_hash
+        return {**self._manifest_for_hashes(hashes), 'log_seq': log_seq}
 
-    def _save_index(self):
-        """Save index and related data with error handling."""
+    def _save_index(self, manifest: Dict[str, Any]):
+        """Save a freshly built index and related data with error handling."""
         try:
             self.index_path.parent.mkdir(exist_ok=True)
             self.index.storage_context.persist(str(self.index_path))
+            _write_rows(self.index_path, self._row_doc_ids, self._row_spans)
+
+            self.documents.save(self.index_path / DOCUMENTS_DIR)
+            (self.index_path / LEGACY_LOOKUP_FILE).unlink(missing_ok=True)
 
-            cache_path = self.index_path / "document_lookup.npy"
-            np.save(cache_path, self.document_lookup)
+            manifest = {**manifest, 'log_seq': self.update_log.last_seq}
+            (self.index_path / MANIFEST_FILE).write_text(json.dumps(manifest))
+            self.corpus_hash = manifest['corpus_hash']
 
             self.last_modified = datetime.now()
         except Exception as e:
             raise ValueError(f"Error saving index: {e}")
 
-    def get_query_engine(self, top_k: int = 3, use_approximate: bool = False):
-        """Get optimized query engine based on query requirements."""
+    def get_retriever(
+        self,
+        top_k: int = 3,
+        use_approximate: bool = False,
+        genres: Optional[List[str]] = None,
+        ranges: Optional[Dict[str, Range]] = None
+    ) -> MovieRetriever:
+        """Get a retriever over the selected backend with optional metadata filters."""
         if not self.index:
             raise ValueError("Index not initialized. Call initialize_index first.")
 
-        self.current_config = 'ivf' if use_approximate else 'flat'
-        
-        return self.index.as_query_engine(
-            similarity_top_k=top_k,
-            vector_store_kwargs={'vector_store': FaissVectorStore(self.index_configs[self.current_config])}
+        # Derived backends keep the flat index's row order, so every backend
+        # shares the same row -> node mapping.
+        backend = ANN_BACKEND if use_approximate else 'flat'
+        self.use_backend(backend)
+        return MovieRetriever(self, top_k=top_k, genres=genres, ranges=ranges, backend=backend)
+
+    def get_query_engine(
+        self,
+        top_k: int = 3,
+        use_approximate: bool = False,
+        genres: Optional[List[str]] = None,
+        ranges: Optional[Dict[str, Range]] = None,
+        context_budget: Optional[int] = CONTEXT_TOKEN_BUDGET
+    ):
+        """
+        Get optimized query engine based on query requirements.
+
+        Retrieved nodes are packed into `context_budget` prompt tokens by a
+        `ContextBuilder`; pass None to send them unchanged.
+        """
+        retriever = self.get_retriever(top_k, use_approximate, genres, ranges)
+        postprocessors = [ContextBuilder(self, token_budget=context_budget)] if context_budget else []
+        return RetrieverQueryEngine.from_args(
+            retriever,
+            service_context=self.service_context,
+            node_postprocessors=postprocessors
         )
 
+    @timed('index_update')
     def update_documents(self, documents: List[Document], batch_size: int = 100):
-        """Update index with new documents using batched processing."""
+        """
+        Add documents or replace indexed ones with the same id.
+
+        Unchanged documents are skipped. Each batch is embedded, written to
+        the update log and then applied in memory: the documents' old rows
+        are marked dead and the new vectors appended. The cost follows the
+        size of the change, not of the catalog; the log is folded into a new
+        snapshot by `compact`, in the background once it holds
+        `compaction_threshold` records.
+        """
         if not self.index:
             self.initialize_index(documents)
             return
 
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            
-            for doc in batch:
-                self.document_lookup[doc.id_] = doc
-                self.pending_updates.add(doc.id_)
+        with self._write_lock:
+            self._ensure_writable()
+            # The last version of a document given twice wins.
+            latest = {doc.id_: doc for doc in documents}.values()
+            changed = []
+            for doc in latest:
+                current = self.documents.get(doc.id_)
+                if current is None or current.hash != doc.hash:
+                    changed.append(doc)
+
+            for i in range(0, len(changed), batch_size):
+                batch = changed[i:i + batch_size]
+                nodes = self.service_context.node_parser.get_nodes_from_documents(batch)
+                texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+                vectors = np.asarray(
+                    self.service_context.embed_model.get_text_embedding_batch(texts),
+                    dtype='float32'
+                ).reshape(-1, self.dimension)
+
+                node_positions = defaultdict(list)
+                for j, node in enumerate(nodes):
+                    node_positions[node.ref_doc_id].append(j)
+                self.update_log.append([
+                    upsert_record(doc, [nodes[j] for j in node_positions[doc.id_]], vectors[node_positions[doc.id_]])
+                    for doc in batch
+                ])
+                self.doc_rows  # built outside the write side, which blocks searches
+                with self._guard.writing():
+                    self._apply_upserts(batch, nodes, vectors)
+
+        self._maybe_compact()
+
+    @timed('index_update')
+    def delete_documents(self, doc_ids: Iterable[str]) -> int:
+        """
+        Remove documents from the index.
+
+        Logged like `update_documents`; the documents' rows stay in FAISS,
+        excluded from every search, until the next compaction.
 
-            self.index.refresh_ref_docs(batch)
+        Returns:
+            Number of documents that were indexed and are now removed
+        """
+        if not self.index:
+            raise ValueError("Index not initialized. Call initialize_index first.")
+
+        with self._write_lock:
+            self._ensure_writable()
+            doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id in self.documents]
+            if doc_ids:
+                self.update_log.append([delete_record(doc_id) for doc_id in doc_ids])
+                self.doc_rows
+                with self._guard.writing():
+                    self._apply_deletes(doc_ids)
+
+        self._maybe_compact()
+        return len(doc_ids)
+
+    def _tombstone(self, doc_ids: Iterable[str]):
+        for doc_id in doc_ids:
+            self.dead_rows.update(self.doc_rows.pop(doc_id, ()))
+        self._dead_selector = None
+
+    def _rows_changed(self):
+        # Rows added since the graph was built have no neighbour lists yet.
+        self._neighbor_graph = None
+        self._neighbor_graph_loaded = True
+        self._shards_synced = False
+        self.search_cache.clear()
+        self.last_modified = datetime.now()
+
+    def _apply_upserts(self, documents: List[Document], nodes: List[BaseNode], vectors: np.ndarray):
+        """Mark the documents' current rows dead and append rows for their new nodes."""
+        self._tombstone(doc.id_ for doc in documents)
+
+        start = self.index_configs['flat'].ntotal
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        # Derived backends share the flat index's row numbering, so they
+        # take the same appends instead of being rebuilt.
+        for index in self.index_configs.values():
+            index.add(vectors)
+        for row, node in enumerate(nodes, start):
+            self.index.index_struct.add_node(node, text_id=str(row))
+        for doc in documents:
+            self.pending_updates[doc.id_] = doc.hash
+        self.documents = self.documents.upsert(documents)
+
+        if self._row_node_ids is not None:
+            self._row_node_ids.extend(node.node_id for node in nodes)
+        self._append_rows(nodes)
+        if self._doc_rows is not None:
+            for row, node in enumerate(nodes, start):
+                self._doc_rows.setdefault(node.ref_doc_id, []).append(row)
+        if self._metadata_index is not None:
+            self._metadata_index = self._metadata_index.extended([node.metadata for node in nodes])
+        self._rows_changed()
+
+    def _apply_deletes(self, doc_ids: List[str]):
+        self._tombstone(doc_ids)
+        self.documents = self.documents.delete(doc_ids)
+        self.pending_updates.update((doc_id, None) for doc_id in doc_ids)
+        self._rows_changed()
+
+    def _replay(self, records: List[Dict[str, Any]]):
+        """Apply logged changes in order, batching consecutive upserts of distinct documents."""
+        documents, nodes, vectors = [], [], []
+
+        def flush():
+            if documents:
+                self._apply_upserts(documents, nodes, np.concatenate(vectors))
+                documents.clear()
+                nodes.clear()
+                vectors.clear()
+
+        for record in records:
+            if record['op'] == 'delete':
+                flush()
+                self._apply_deletes([record['id']])
+                continue
+            if any(doc.id_ == record['id'] for doc in documents):
+                flush()
+            document, doc_nodes, doc_vectors = decode_upsert(record)
+            documents.append(document)
+            nodes.extend(doc_nodes)
+            vectors.append(doc_vectors)
+        flush()
+
+    def _maybe_compact(self):
+        """Start a background compaction once the log is over the threshold."""
+        if len(self.update_log) < self.compaction_threshold:
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self._background_compact, name="index-compaction", daemon=True)
+        self._compaction_thread.start()
+
+    def _background_compact(self):
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Error compacting index: {e}")
+
+    def compact(self) -> bool:
+        """
+        Fold the update log into a new snapshot without dead rows.
+
+        The state is captured under the write lock; the compacted FAISS
+        index, row table and document store are then built and written
+        without it, so updates keep flowing. The snapshot is staged in
+        `<index>/compaction/`, marked complete and moved into place with the
+        manifest last; a crash mid-move is finished on the next load. Changes
+        logged meanwhile stay in the log. If there were none, the store
+        switches to the compacted state in memory as well.
+
+        Returns:
+            Whether a snapshot was written
+        """
+        with self._compaction_lock:
+            with self._write_lock:
+                if not self.index or not len(self.update_log):
+                    return False
+                log_seq = self.update_log.last_seq
+                ntotal = self.index_configs['flat'].ntotal
+                live = np.setdiff1d(np.arange(ntotal, dtype=np.int64), np.fromiter(self.dead_rows, dtype=np.int64))
+                vectors = self.get_vectors(live)
+                node_ids = [self.row_node_ids[row] for row in live]
+                row_doc_ids = [self._row_doc_ids[row] for row in live]
+                row_spans = [self._row_spans[row] for row in live]
+                index_id = self.index.index_struct.index_id
+                documents = self.documents
+                changes = dict(self.pending_updates)
+
+            with timer('index_compaction'):
+                index_struct = IndexDict(index_id=index_id)
+                for row, node_id in enumerate(node_ids):
+                    index_struct.nodes_dict[str(row)] = node_id
+                flat_index = faiss.IndexFlatIP(self.dimension)
+                flat_index.add(vectors)
+                index_store = SimpleIndexStore()
+                index_store.add_index_struct(index_struct)
+                storage_context = StorageContext.from_defaults(
+                    docstore=SimpleDocumentStore(),
+                    index_store=index_store,
+                    vector_store=FaissVectorStore(faiss_index=flat_index)
+                )
+                documents = documents.compacted()
+                manifest = self._updated_manifest(documents, changes, log_seq)
 
-        if len(self.pending_updates) >= batch_size:
-            self._save_index()
-            self.pending_updates.clear()
+                staging = self.index_path / COMPACTION_DIR
+                shutil.rmtree(staging, ignore_errors=True)
+                staging.mkdir(parents=True)
+                storage_context.persist(str(staging))
+                _write_rows(staging, row_doc_ids, row_spans)
+                documents.save(staging / DOCUMENTS_DIR)
+                (staging / MANIFEST_FILE).write_text(json.dumps(manifest))
+                (staging / COMPACTION_DONE).touch()
+
+            with self._write_lock, self._guard.writing():
+                self._finish_compaction()
+                self.update_log.truncate(log_seq)
+                logger.info("Compacted index to %d rows (%d dead rows dropped)", len(node_ids), ntotal - len(node_ids))
+                if self.update_log.last_seq == log_seq:
+                    self.index = load_index_from_storage(storage_context, service_context=self.service_context)
+                    self.index_configs = {'flat': flat_index}
+                    self.dead_rows = set()
+                    self.pending_updates = {}
+                    self._invalidate_backends()
+                    self._row_doc_ids = row_doc_ids
+                    self._row_spans = row_spans
+                    self.documents = documents
+                    self.corpus_hash = manifest['corpus_hash']
+                    self.last_modified = datetime.now()
+            return True
+
+    def _finish_compaction(self):
+        """Move a completely staged snapshot into place, the manifest last; an incomplete one is left to `compact`."""
+        staging = self.index_path / COMPACTION_DIR
+        if not (staging / COMPACTION_DONE).exists():
+            return
+        # Compaction renumbers the FAISS rows the neighbour table refers to.
+        shutil.rmtree(self.index_path / NEIGHBORS_DIR, ignore_errors=True)
+        paths = sorted(staging.iterdir(), key=lambda path: path.name == MANIFEST_FILE)
+        for path in paths:
+            if path.name == COMPACTION_DONE:
+                continue
+            target = self.index_path / path.name
+            if path.is_dir():
+                shutil.rmtree(target, ignore_errors=True)
+                path.rename(target)
+            else:
+                os.replace(path, target)
+        (self.index_path / LEGACY_LOOKUP_FILE).unlink(missing_ok=True)
+        shutil.rmtree(staging)
+
+    def rebuild(self, documents: List[Document], wait: bool = False) -> threading.Thread:
+        """
+        Build a new index generation from `documents` in the background and swap it in.
+
+        The generation is built by a second store in a worker thread, into
+        its own directory under `<index>/generations/`, while this one keeps
+        serving. It must pass `validate_generation` before the swap. Changes
+        logged here meanwhile are carried over, and derived backends, the
+        neighbour graph and shards are rebuilt ahead of the swap. The swap
+        itself waits for in-flight reads and then replaces every
+        per-generation attribute at once. Old generations beyond
+        `INDEX_GENERATIONS_KEPT` are then deleted. Progress and failures are
+        reported in `rebuild_status`.
+
+        Args:
+            documents: The full corpus for the new generation
+            wait: Block until the rebuild has finished
+
+        Returns:
+            The rebuild thread
+        """
+        if not self.index:
+            raise ValueError("Index not initialized. Call initialize_index first.")
+        if not documents:
+            raise ValueError("Documents required for new index creation")
+
+        def running() -> bool:
+            return self._rebuild_thread is not None and self._rebuild_thread.is_alive()
+
+        with self._write_lock:
+            if running():
+                raise RuntimeError("An index rebuild is already running")
+        # Held by the rebuild until its swap, so no compaction truncates the
+        # log before the changes made from here on are carried over. Taken
+        # here rather than in the thread so none of them is missed.
+        self._compaction_lock.acquire()
+        try:
+            with self._write_lock:
+                if running():
+                    raise RuntimeError("An index rebuild is already running")
+                self.rebuild_status = {'state': 'building', 'started': time.time()}
+                self._rebuild_thread = threading.Thread(
+                    target=self._rebuild,
+                    args=(documents, self.update_log.last_seq),
+                    name="index-rebuild",
+                    daemon=True
+                )
+                self._rebuild_thread.start()
+        except BaseException:
+            self._compaction_lock.release()
+            raise
+        if wait:
+            self._rebuild_thread.join()
+        return self._rebuild_thread
+
+    def _rebuild(self, documents: List[Document], start_seq: int):
+        generation = None
+        swapped = False
+        try:
+            generation = new_generation(self.index_root)
+            self.rebuild_status['generation'] = generation.name
+            start = time.perf_counter()
+            with timer('index_rebuild'):
+                # Shares the embedding model and cache: unchanged documents
+                # are not embedded again.
+                builder = MovieVectorStore(
+                    search_cache_bytes=0,
+                    service_context=self.service_context,
+                    use_embedding_cache=False,
+                    index_dir=generation,
+                    n_shards=0,
+                    compaction_threshold=self.compaction_threshold
+                )
+                builder._create_new_index(documents)
+
+                self.rebuild_status['state'] = 'validating'
+                self.rebuild_status.update(self.validate_generation(builder, documents))
+                self._prepare_generation(builder)
+                self._swap_generation(builder, start_seq)
+                swapped = True
+
+            removed = collect_generations(self.index_root, INDEX_GENERATIONS_KEPT)
+            self.rebuild_status.update(state='swapped', seconds=time.perf_counter() - start, removed=[path.name for path in removed])
+            metrics.increment('index_rebuilds')
+            logger.info("Swapped in index generation %s (%d documents)", generation.name, len(self.documents))
+        except Exception as e:
+            logger.error(f"Index rebuild failed: {e}")
+            self.rebuild_status.update(state='failed', error=str(e))
+            metrics.increment('index_rebuild_failures')
+            if generation is not None and not swapped:
+                shutil.rmtree(generation, ignore_errors=True)
+        finally:
+            self._compaction_lock.release()
+
+    def validate_generation(self, builder: 'MovieVectorStore', documents: List[Document]) -> Dict[str, Any]:
+        """
+        Check a freshly built generation before it replaces the live one.
+
+        Every document must be indexed with one node per FAISS row, the
+        catalog may not shrink by more than `REBUILD_MAX_SHRINK`, and exact
+        searches of the new generation must agree with exact searches of the
+        live one (see `generation_recall`) at least `REBUILD_MIN_RECALL` of
+        the time.
+
+        Returns:
+            Dict with the document count and sample recall
+
+        Raises:
+            ValueError: If a check fails
+        """
+        expected = len({doc.id_ for doc in documents})
+        if len(builder.documents) != expected:
+            raise ValueError(f"New generation holds {len(builder.documents)} documents, expected {expected}")
+        ntotal = builder.index_configs['flat'].ntotal
+        if ntotal != len(builder.row_node_ids):
+            raise ValueError(f"New generation has {ntotal} vectors for {len(builder.row_node_ids)} nodes")
+        if expected < (1 - REBUILD_MAX_SHRINK) * len(self.documents):
+            raise ValueError(f"New generation would shrink the catalog from {len(self.documents)} to {expected} documents")
+
+        recall = self.generation_recall(builder, {doc.id_: doc.hash for doc in documents})
+        if recall is not None and recall < REBUILD_MIN_RECALL:
+            raise ValueError(f"New generation recall@{REBUILD_RECALL_K} against the live one is {recall:.3f}, below {REBUILD_MIN_RECALL}")
+        return {'documents': expected, 'sample_recall': recall}
+
+    def generation_recall(self, builder: 'MovieVectorStore', hashes: Dict[str, str]) -> Optional[float]:
+        """
+        Recall@`REBUILD_RECALL_K` of another generation against this one.
+
+        Queries are the normalized midpoints of `REBUILD_SAMPLE_SIZE` random
+        pairs of live documents, so neither index holds them verbatim. Both
+        generations are searched exactly over the documents indexed unchanged
+        in both; the results here are the ground truth for those there.
+
+        Args:
+            builder: The other generation
+            hashes: Document id -> hash of the other generation's corpus
+
+        Returns:
+            The recall, or None when the generations share no unchanged documents
+        """
+        with self.reading():
+            return self._generation_recall(builder, hashes)
+
+    def _generation_recall(self, builder: 'MovieVectorStore', hashes: Dict[str, str]) -> Optional[float]:
+        live_rows = self._live_rows(np.arange(self.index_configs['flat'].ntotal))
+        if len(live_rows) < 2:
+            return None
+        persisted = (self._read_manifest() or {}).get('documents', {})
+        live_hashes = {**persisted, **self.pending_updates}
+
+        def shared_rows(store: 'MovieVectorStore', rows: np.ndarray) -> np.ndarray:
+            keep = [
+                row for row in rows
+                if live_hashes.get(store.row_doc_ids[row]) is not None
+                and live_hashes.get(store.row_doc_ids[row]) == hashes.get(store.row_doc_ids[row])
+            ]
+            return np.asarray(keep, dtype=np.int64)
+
+        expected_rows = shared_rows(self, live_rows)
+        found_rows = shared_rows(builder, builder._live_rows(np.arange(builder.index_configs['flat'].ntotal)))
+        if not len(expected_rows) or not len(found_rows):
+            return None
+
+        rng = np.random.default_rng(0)
+        pairs = rng.choice(live_rows, size=(REBUILD_SAMPLE_SIZE, 2))
+        queries = self.get_vectors(pairs.ravel()).reshape(len(pairs), 2, -1).sum(axis=1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        np.divide(queries, norms, out=queries, where=norms > 0)
+
+        def search(store: 'MovieVectorStore', rows: np.ndarray) -> List[set]:
+            index = store.index_configs['flat']
+            selector = faiss.IDSelectorBatch(rows)
+            _, results = index.search(queries, REBUILD_RECALL_K, params=faiss.SearchParameters(sel=selector))
+            return [{store.row_doc_ids[row] for row in result if row >= 0} for result in results]
+
+        hits = total = 0
+        for truth, found in zip(search(self, expected_rows), search(builder, found_rows)):
+            hits += len(truth & found)
+            total += len(truth)
+        return hits / total if total else None
+
+    def _prepare_generation(self, builder: 'MovieVectorStore'):
+        """Build what the live generation serves from, so the first queries after the swap are not slow."""
+        for backend in self.index_configs:
+            if backend != 'flat':
+                builder.use_backend(backend, **self.ann_params.get(backend, {}))
+        builder.current_config = self.current_config if self.current_config in builder.index_configs else 'flat'
+        if self._neighbor_graph is not None:
+            builder.build_neighbor_graph()
+        if self.shards is not None:
+            builder.enable_sharding(self.shards.n_shards, self.shards.partition, self.shards.workers)
+            builder.shards.warmup(builder.dimension)
+
+    def _swap_generation(self, builder: 'MovieVectorStore', start_seq: int):
+        with self._write_lock:
+            # Updates made while the generation was built.
+            records = list(self.update_log.read(start_seq))
+            if records:
+                builder.update_log.append([{key: value for key, value in record.items() if key != 'seq'} for record in records])
+                builder._replay(records)
+                logger.info("Carried %d logged updates over to the new generation", len(records))
+
+            old_shards = self.shards
+            with self._guard.writing():
+                for name in GENERATION_STATE:
+                    setattr(self, name, getattr(builder, name))
+                set_current_generation(self.index_root, self.index_path)
+                self.search_cache.clear()
+                self.last_modified = datetime.now()
+            if old_shards is not None:
+                old_shards.close()
 
     def optimize_index(self):
         """Optimize the index for better performance."""
         if not self.index:
             return
 
-        if self.current_config == 'ivf':
-            training_vectors = np.random.random((10000, self.dimension)).astype('float32')
-            self.index_configs['ivf'].train(training_vectors)
+        if self.current_config != 'flat':
+            backend = self.current_config
+            self.index_configs.pop(backend, None)
+            self.use_backend(backend)
+
+        self.search_cache.clear()
+
+    def evaluate_backends(
+        self,
+        queries: Optional[List[str]] = None,
+        configs: Optional[List[Dict[str, Any]]] = None,
+        k: int = 10,
+        sample_size: int = 200
+    ) -> List[Dict[str, Any]]:
+        """
+        Report recall@k against flat search and p50/p99 latency per ANN setting.
+
+        Args:
+            queries: Query strings to embed; defaults to a sample of corpus vectors
+            configs: Backend settings to try; defaults to an nprobe/efSearch sweep
+            k: Cut-off for recall
+            sample_size: Number of corpus vectors used when no queries are given
+
+        Returns:
+            One report dict per configuration
+        """
+        vectors = self.get_vectors()
+        if len(vectors) == 0:
+            raise ValueError("Index not initialized. Call initialize_index first.")
+
+        if queries:
+            embed_model = self.service_context.embed_model
+            query_vectors = np.array([embed_model.get_query_embedding(q) for q in queries], dtype='float32')
+        else:
+            rng = np.random.default_rng(0)
+            sample = rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)
+            query_vectors = vectors[sample]
+
+        if configs is None:
+            ivf, hnsw = self.ann_params.get('ivf', {}), self.ann_params.get('hnsw', {})
+            configs = [{'backend': 'flat'}]
+            configs += [{'backend': 'ivf', 'nlist': ivf.get('nlist', 100), 'nprobe': n} for n in (1, 4, 8, 16, 32)]
+            configs += [{'backend': 'hnsw', 'M': hnsw.get('M', 32), 'ef_search': ef} for ef in (16, 32, 64, 128)]
+
+        reports = evaluate_backends(vectors, query_vectors, configs, k=k)
+        for report in reports:
+            logger.info("ANN %s", report)
+        return reports
+
+    def compact_embedding_cache(self) -> int:
+        """Evict cached embeddings that no longer belong to any indexed node."""
+        if not self.embedding_cache or not self.index:
+            return 0
 
-        self._cached_similarity_search.cache_clear()
+        with self.reading():
+            live_rows = self._live_rows(np.arange(self.index_configs['flat'].ntotal))
+            texts = [self._row_node(row).get_content(metadata_mode=MetadataMode.EMBED) for row in live_rows]
+        live_keys = self.service_context.embed_model.cache_keys(texts)
+        return self.embedding_cache.compact(live_keys)
 
     def cleanup(self):
-        """Cleanup resources and save pending changes."""
-        if self.pending_updates:
-            self._save_index()
-        self._cached_similarity_search.cache_clear()
+        """Cleanup resources and fold logged changes into a snapshot."""
+        if self._rebuild_thread is not None:
+            self._rebuild_thread.join()
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        if len(self.update_log):
+            self.compact()
+        self.disable_sharding()
+        self.search_cache.clear()
+        if self.embedding_engine is not None:
+            self.embedding_engine.close()
         
\ No newline at end of file
@@ -1 +1,2 @@
-from .movie import Movie
\ No newline at end of file
+from .movie import BaseMovie, CatalogMovie, Movie
+from .catalog import MovieCatalog
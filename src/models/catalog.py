@@ -0,0 +1,237 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..config.settings import WEIGHTED_RATING_QUANTILE
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = ('budget', 'revenue', 'runtime', 'vote_average', 'vote_count', 'popularity')
+SCORE_COLUMNS = ('roi', 'engagement_score', 'is_successful', 'weighted_rating')
+
+# Votes at which a movie's own rating gets full weight in the engagement score.
+ENGAGEMENT_VOTE_SCALE = 1000.0
+SUCCESS_MIN_ROI = 0.5
+SUCCESS_MIN_ENGAGEMENT = 5.0
+
+
+def roi(budget: np.ndarray, revenue: np.ndarray) -> np.ndarray:
+    """(revenue - budget) / budget, or 0 where the budget is unknown."""
+    budget = np.asarray(budget, dtype=np.float64)
+    revenue = np.asarray(revenue, dtype=np.float64)
+    out = np.zeros(np.broadcast(budget, revenue).shape)
+    np.divide(revenue - budget, budget, out=out, where=budget != 0)
+    return out
+
+
+def engagement_score(vote_average: np.ndarray, vote_count: np.ndarray, popularity: np.ndarray) -> np.ndarray:
+    """Mean of popularity and the rating, the rating discounted below 1000 votes."""
+    vote_weight = np.minimum(np.asarray(vote_count, dtype=np.float64) / ENGAGEMENT_VOTE_SCALE, 1.0)
+    return (np.asarray(vote_average, dtype=np.float64) * vote_weight + popularity) / 2
+
+
+def is_successful(roi_values: np.ndarray, engagement: np.ndarray) -> np.ndarray:
+    return (roi_values > SUCCESS_MIN_ROI) & (engagement > SUCCESS_MIN_ENGAGEMENT)
+
+
+def weighted_rating(
+    vote_average: np.ndarray,
+    vote_count: np.ndarray,
+    quantile: float = WEIGHTED_RATING_QUANTILE
+) -> np.ndarray:
+    """
+    IMDB-style Bayesian rating: v/(v+m) * R + m/(v+m) * C.
+
+    `m` is the `quantile` of the catalog's vote counts and `C` its mean
+    rating, so a movie with few votes is pulled towards the catalog average.
+    """
+    vote_average = np.asarray(vote_average, dtype=np.float64)
+    vote_count = np.asarray(vote_count, dtype=np.float64)
+    if vote_count.size == 0:
+        return np.zeros(0)
+
+    m = float(np.quantile(vote_count, quantile))
+    c = float(vote_average.mean())
+    total = vote_count + m
+    out = np.full(vote_count.shape, c)
+    np.divide(vote_count * vote_average + m * c, total, out=out, where=total > 0)
+    return out
+
+
+def score_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Derived score columns for a set of numeric columns."""
+    roi_values = roi(columns['budget'], columns['revenue'])
+    engagement = engagement_score(columns['vote_average'], columns['vote_count'], columns['popularity'])
+    return {
+        'roi': roi_values,
+        'engagement_score': engagement,
+        'is_successful': is_successful(roi_values, engagement),
+        'weighted_rating': weighted_rating(columns['vote_average'], columns['vote_count'])
+    }
+
+
+class MovieCatalog:
+    """
+    The catalog as parallel NumPy columns, with per-movie scores computed once.
+
+    Positions are row numbers; `ids[pos]` is the movie's document id.
+    `CatalogMovie` objects are read-only views onto a position.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        titles: Sequence[str],
+        overviews: Sequence[str],
+        genres: Sequence[Any],
+        collections: Sequence[Optional[str]],
+        numeric: Dict[str, np.ndarray],
+        original_languages: Optional[Sequence[str]] = None,
+        adult: Optional[np.ndarray] = None
+    ):
+        n = len(ids)
+        self.ids = np.asarray(ids, dtype=object)
+        self.titles = np.asarray(titles, dtype=object)
+        self.overviews = np.asarray(overviews, dtype=object)
+        self.genres = np.empty(n, dtype=object)
+        self.genres[:] = [g if isinstance(g, list) else [] for g in genres]
+        self.collections = np.asarray(
+            [None if c in (None, 'NULL') or pd.isnull(c) else c for c in collections],
+            dtype=object
+        )
+        self.original_languages = np.asarray(
+            original_languages if original_languages is not None else ['en'] * n,
+            dtype=object
+        )
+        self.adult = np.asarray(adult if adult is not None else np.zeros(n, dtype=bool), dtype=bool)
+
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.nan_to_num(np.asarray(numeric[name], dtype=np.float64)) for name in NUMERIC_COLUMNS
+        }
+        self.columns.update(score_columns(self.columns))
+        self._genre_masks: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'MovieCatalog':
+        """Build from the preprocessed DataFrame `MovieDataLoader` returns."""
+        title_column = 'original_title' if 'original_title' in df.columns else 'title'
+        adult = df['adult'] if 'adult' in df.columns else None
+        return cls(
+            ids=df.index.astype(str).tolist(),
+            titles=df[title_column].fillna('').tolist(),
+            overviews=df['overview'].fillna('').tolist(),
+            genres=df['genres'].tolist(),
+            collections=df['belongs_to_collection'].tolist(),
+            numeric={name: pd.to_numeric(df[name], errors='coerce').to_numpy() for name in NUMERIC_COLUMNS},
+            original_languages=(
+                df['original_language'].fillna('en').tolist() if 'original_language' in df.columns else None
+            ),
+            adult=None if adult is None else adult.astype(str).str.lower().eq('true').to_numpy()
+        )
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'MovieCatalog':
+        """Build from dicts shaped like `Movie.to_dict` (score keys are ignored)."""
+        return cls(
+            ids=[r['id'] for r in records],
+            titles=[r['title'] for r in records],
+            overviews=[r['overview'] for r in records],
+            genres=[r['genres'] for r in records],
+            collections=[r.get('collection') for r in records],
+            numeric={name: np.array([r[name] for r in records], dtype=np.float64) for name in NUMERIC_COLUMNS},
+            original_languages=[r.get('original_language', 'en') for r in records],
+            adult=np.array([bool(r.get('adult', False)) for r in records], dtype=bool)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def genre_mask(self, genre: str) -> np.ndarray:
+        """Boolean mask of movies tagged with `genre`, built once per genre."""
+        mask = self._genre_masks.get(genre)
+        if mask is None:
+            mask = np.fromiter((genre in g for g in self.genres), dtype=bool, count=len(self))
+            self._genre_masks[genre] = mask
+        return mask
+
+    def rank(
+        self,
+        by: str = 'weighted_rating',
+        k: int = 10,
+        genre: Optional[str] = None,
+        min_votes: float = 0.0,
+        successful_only: bool = False,
+        mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Positions of the `k` highest-scoring movies, best first.
+
+        Args:
+            by: Any numeric or score column, e.g. 'roi' or 'engagement_score'
+            k: Number of movies to return
+            genre: Only consider movies with this genre
+            min_votes: Only consider movies with at least this many votes
+            successful_only: Only consider movies flagged as successful
+            mask: Extra boolean mask of allowed positions
+        """
+        if by not in self.columns:
+            raise ValueError(f"Unknown ranking column '{by}', expected one of {sorted(self.columns)}")
+
+        allowed = np.ones(len(self), dtype=bool) if mask is None else mask.copy()
+        if genre:
+            allowed &= self.genre_mask(genre)
+        if min_votes:
+            allowed &= self.columns['vote_count'] >= min_votes
+        if successful_only:
+            allowed &= self.columns['is_successful']
+
+        candidates = np.flatnonzero(allowed)
+        if k <= 0 or len(candidates) == 0:
+            return candidates[:0]
+
+        values = self.columns[by][candidates].astype(np.float64)
+        if k < len(candidates):
+            top = np.argpartition(-values, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        # Stable sort on the small top-k keeps ties in catalog order.
+        return candidates[top[np.argsort(-values[top], kind='stable')]]
+
+    def movie(self, pos: int) -> 'CatalogMovie':
+        from .movie import CatalogMovie
+        return CatalogMovie(self, int(pos))
+
+    def movies(self, positions: Sequence[int]) -> List['CatalogMovie']:
+        from .movie import CatalogMovie
+        return [CatalogMovie(self, int(pos)) for pos in positions]
+
+    def to_dicts(self, positions: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Serialize many movies at once: `Movie.to_dict` plus the
+        `is_successful` flag and `weighted_rating`.
+
+        Each column is sliced and converted with a single `tolist()`, so
+        this costs one pass per column rather than one attribute access per
+        field per movie.
+        """
+        index = np.arange(len(self)) if positions is None else np.asarray(positions, dtype=np.int64)
+        fields = {
+            'id': self.ids[index].tolist(),
+            'title': self.titles[index].tolist(),
+            'genres': self.genres[index].tolist(),
+            'overview': self.overviews[index].tolist(),
+            **{name: self.columns[name][index].tolist() for name in NUMERIC_COLUMNS},
+            'collection': self.collections[index].tolist(),
+            'original_language': self.original_languages[index].tolist(),
+            'adult': self.adult[index].tolist(),
+            'roi': self.columns['roi'][index].tolist(),
+            'popularity_score': self.columns['engagement_score'][index].tolist(),
+            'is_successful': self.columns['is_successful'][index].tolist(),
+            'weighted_rating': self.columns['weighted_rating'][index].tolist()
+        }
+        names = list(fields)
+        return [dict(zip(names, values)) for values in zip(*fields.values())]
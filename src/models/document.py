@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Any, Optional
 from datetime import datetime
 
@@ -12,7 +12,7 @@ class MovieDocument:
     text: str  # The movie overview/description
     metadata: Dict[str, Any]
     embedding: Optional[list] = None
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = field(default_factory=datetime.now)
 
     def to_llama_doc(self) -> Dict[str, Any]:
         """Convert to LlamaIndex Document format."""
@@ -1,9 +1,73 @@
 from dataclasses import dataclass
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-@dataclass
-class Movie:
+from .catalog import ENGAGEMENT_VOTE_SCALE, SUCCESS_MIN_ENGAGEMENT, SUCCESS_MIN_ROI, MovieCatalog
+
+
+class BaseMovie:
+    """
+    The read-only interface shared by `Movie` records and `CatalogMovie` views.
+
+    Subclasses provide the fields and the `roi`, `popularity_score`,
+    `is_successful` and `weighted_rating` scores.
+    """
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary format"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'genres': self.genres,
+            'overview': self.overview,
+            'budget': self.budget,
+            'revenue': self.revenue,
+            'runtime': self.runtime,
+            'vote_average': self.vote_average,
+            'vote_count': self.vote_count,
+            'popularity': self.popularity,
+            'collection': self.collection,
+            'original_language': self.original_language,
+            'adult': self.adult,
+            'roi': self.roi,
+            'popularity_score': self.popularity_score
+        }
+
+    @staticmethod
+    def to_dicts(movies: List['BaseMovie']) -> List[Dict[str, Any]]:
+        """
+        Serialize many movies in `MovieCatalog.to_dicts` format: `to_dict`
+        plus `is_successful` and `weighted_rating`.
+
+        Catalog views are serialized in one bulk pass per catalog.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(movies)
+        groups: Dict[int, List[int]] = {}
+        for i, movie in enumerate(movies):
+            if isinstance(movie, CatalogMovie):
+                groups.setdefault(id(movie._catalog), []).append(i)
+            else:
+                results[i] = {
+                    **movie.to_dict(),
+                    'is_successful': movie.is_successful,
+                    'weighted_rating': movie.weighted_rating
+                }
+        for indices in groups.values():
+            catalog = movies[indices[0]]._catalog
+            for i, data in zip(indices, catalog.to_dicts([movies[i]._pos for i in indices])):
+                results[i] = data
+        return results
+
+
+@dataclass(slots=True)
+class Movie(BaseMovie):
+    """
+    A single, mutable movie record.
+
+    Movies taken from a catalog (`MovieCatalog.movie`) are read-only
+    `CatalogMovie` views onto its columns instead.
+    """
     id: str
     title: str
     genres: List[str]
@@ -20,39 +84,28 @@ class Movie:
 
     @property
     def roi(self) -> float:
-        """Calculate Return on Investment"""
+        """Return on Investment"""
         if self.budget == 0:
             return 0.0
         return (self.revenue - self.budget) / self.budget
 
     @property
     def popularity_score(self) -> float:
-        """Calculate normalized popularity score"""
-        vote_weight = min(self.vote_count / 1000, 1.0)
+        """Normalized popularity score"""
+        vote_weight = min(self.vote_count / ENGAGEMENT_VOTE_SCALE, 1.0)
         return (self.vote_average * vote_weight + self.popularity) / 2
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary format"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'genres': self.genres,
-            'overview': self.overview,
-            'budget': self.budget,
-            'revenue': self.revenue,
-            'runtime': self.runtime,
-            'vote_average': self.vote_average,
-            'vote_count': self.vote_count,
-            'popularity': self.popularity,
-            'collection': self.collection,
-            'original_language': self.original_language,
-            'adult': self.adult,
-            'roi': self.roi,
-            'popularity_score': self.popularity_score
-        }
+    @property
+    def is_successful(self) -> bool:
+        return self.roi > SUCCESS_MIN_ROI and self.popularity_score > SUCCESS_MIN_ENGAGEMENT
+
+    @property
+    def weighted_rating(self) -> float:
+        """The movie's own rating: a record has no catalog mean to shrink it towards"""
+        return float(self.vote_average)
 
     @classmethod
-    def from_dict(cls, data: dict) -> 'Movie':
+    def from_dict(cls, data: Dict[str, Any]) -> 'Movie':
         """Create Movie instance from dictionary"""
         return cls(
             id=data['id'],
@@ -68,4 +121,102 @@ class Movie:
             collection=data.get('collection'),
             original_language=data.get('original_language', 'en'),
             adult=data.get('adult', False)
-        )
\ No newline at end of file
+        )
+
+
+class CatalogMovie(BaseMovie):
+    """
+    A read-only movie backed by one row of a `MovieCatalog`.
+
+    Creating one costs two slots and no copying; fields and scores are read
+    from the catalog's columns, so the weighted rating is the catalog's.
+    """
+
+    __slots__ = ('_catalog', '_pos')
+
+    def __init__(self, catalog: MovieCatalog, pos: int):
+        self._catalog = catalog
+        self._pos = pos
+
+    @property
+    def id(self) -> str:
+        return self._catalog.ids[self._pos]
+
+    @property
+    def title(self) -> str:
+        return self._catalog.titles[self._pos]
+
+    @property
+    def genres(self) -> List[str]:
+        return self._catalog.genres[self._pos]
+
+    @property
+    def overview(self) -> str:
+        return self._catalog.overviews[self._pos]
+
+    @property
+    def collection(self) -> Optional[str]:
+        return self._catalog.collections[self._pos]
+
+    @property
+    def original_language(self) -> str:
+        return self._catalog.original_languages[self._pos]
+
+    @property
+    def adult(self) -> bool:
+        return bool(self._catalog.adult[self._pos])
+
+    def _column(self, name: str) -> float:
+        return float(self._catalog.columns[name][self._pos])
+
+    @property
+    def budget(self) -> float:
+        return self._column('budget')
+
+    @property
+    def revenue(self) -> float:
+        return self._column('revenue')
+
+    @property
+    def runtime(self) -> float:
+        return self._column('runtime')
+
+    @property
+    def vote_average(self) -> float:
+        return self._column('vote_average')
+
+    @property
+    def vote_count(self) -> float:
+        return self._column('vote_count')
+
+    @property
+    def popularity(self) -> float:
+        return self._column('popularity')
+
+    @property
+    def roi(self) -> float:
+        return self._column('roi')
+
+    @property
+    def popularity_score(self) -> float:
+        return self._column('engagement_score')
+
+    @property
+    def is_successful(self) -> bool:
+        return bool(self._catalog.columns['is_successful'][self._pos])
+
+    @property
+    def weighted_rating(self) -> float:
+        """Rating shrunk towards the catalog mean for movies with few votes"""
+        return self._column('weighted_rating')
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CatalogMovie):
+            return NotImplemented
+        return self._catalog is other._catalog and self._pos == other._pos
+
+    def __hash__(self) -> int:
+        return hash((id(self._catalog), self._pos))
+
+    def __repr__(self) -> str:
+        return f"CatalogMovie(id={self.id!r}, title={self.title!r})"
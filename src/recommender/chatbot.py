@@ -1,10 +1,53 @@
-from typing import List, Dict, Any
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Dict, Any, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
-from llama_index import Document
+from llama_index import Document, ServiceContext
+from llama_index.llms import LLM
+from llama_index.schema import NodeWithScore
 
-from ..config.settings import TOP_K_RECOMMENDATIONS
+from ..config.settings import (
+    TOP_K_RECOMMENDATIONS,
+    FAST_RETRIEVAL_OVERSAMPLE,
+    LLM_MAX_CONCURRENCY,
+    SEARCH_THREADS,
+    RESPONSE_CACHE_DIR,
+    PERSIST_RESPONSE_CACHE,
+    SESSION_CANDIDATES,
+    SESSION_SAME_INTENT_THRESHOLD
+)
+from ..indexing.embedding_engine import EmbeddingEngine
+from ..indexing.metadata_index import MetadataIndex, Range
 from ..indexing.vector_store import MovieVectorStore
-from .query_engine import MovieQueryEngine
+from ..models.catalog import MovieCatalog
+from ..utils.llm import create_llm, retry_with_backoff, aretry_with_backoff
+from ..utils.metrics import metrics, timer
+from .query_engine import MovieQueryEngine, RESPONSE_HEADER, RESPONSE_FOOTER, SYNTHESIS_PROMPT_VERSION
+from .refinement import genre_aliases, parse_refinement
+from .reranker import ScoreFusionReranker
+from .semantic_cache import SemanticCache
+from .session import CandidateSet, Session, SessionStore, DEFAULT_SESSION
+from .streaming import AsyncResponseStream, ResponseStream
+
+logger = logging.getLogger(__name__)
+
+def _session_filters(session: Session) -> Optional[Dict[str, Any]]:
+    """A session's constraints in response-cache form, or None if it has none."""
+    if not session.has_filters:
+        return None
+    return {
+        'ranges': session.ranges,
+        'genres': sorted(session.genres),
+        'exclude_genres': sorted(session.exclude_genres)
+    }
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / norm if norm else 0.0
 
 class MovieRecommendationBot:
     def __init__(
@@ -12,7 +55,13 @@ class MovieRecommendationBot:
         documents: List[Document],
         movie_data: pd.DataFrame,
         azure_credentials: Dict[str, str],
-        top_k: int = TOP_K_RECOMMENDATIONS
+        top_k: int = TOP_K_RECOMMENDATIONS,
+        llm: Optional[LLM] = None,
+        service_context: Optional[ServiceContext] = None,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        use_response_cache: bool = True,
+        catalog: Optional[MovieCatalog] = None,
+        fusion_weights: Optional[Dict[str, float]] = None
     ):
         """
         Initialize the movie recommendation chatbot.
@@ -22,15 +71,69 @@ class MovieRecommendationBot:
             movie_data: DataFrame containing movie information
             azure_credentials: Dictionary containing Azure OpenAI credentials
             top_k: Number of recommendations to return
+            llm: LLM for response synthesis; defaults to `create_llm(azure_credentials)`
+            service_context: Embedding/LLM context for the vector store
+            max_concurrency: Maximum number of concurrent LLM calls in async mode
+            use_response_cache: Serve near-duplicate queries from a semantic response cache
+            catalog: Scored catalog from `MovieDataLoader`; built from `movie_data` if omitted
+            fusion_weights: Overrides for the retrieval-only re-ranking weights
+                ('similarity', 'rating', 'popularity')
         """
         self.movie_data = movie_data
+        self.catalog = catalog if catalog is not None else MovieCatalog.from_frame(movie_data)
         self.top_k = top_k
+        self.max_concurrency = max_concurrency
         
-        self.vector_store = MovieVectorStore()
+        if service_context is None:
+            service_context = ServiceContext.from_defaults(
+                llm=llm or create_llm(azure_credentials),
+                embed_model=EmbeddingEngine()
+            )
+        elif llm is not None:
+            service_context = ServiceContext.from_service_context(service_context, llm=llm)
+        
+        self.vector_store = MovieVectorStore(service_context=service_context)
         self.vector_store.initialize_index(documents)
         
         vector_engine = self.vector_store.get_query_engine(top_k=top_k)
-        self.query_engine = MovieQueryEngine(vector_engine, movie_data)
+        self.query_engine = MovieQueryEngine(vector_engine, movie_data, self.vector_store, top_k)
+        
+        self.reranker = ScoreFusionReranker(fusion_weights)
+        
+        self._search_executor = ThreadPoolExecutor(max_workers=SEARCH_THREADS)
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        self.response_cache = SemanticCache(
+            self.vector_store.dimension,
+            persist_path=RESPONSE_CACHE_DIR if PERSIST_RESPONSE_CACHE else None
+        ) if use_response_cache else None
+        
+        self.sessions = SessionStore()
+        self._alias_index: Optional[MetadataIndex] = None
+        self._aliases: Dict[str, str] = {}
+
+    def _index_version(self) -> str:
+        # Responses depend on the prompt as much as on the index.
+        return f"{self.vector_store.content_version}/prompt-v{SYNTHESIS_PROMPT_VERSION}"
+
+    def _cached_response(self, retrieval_query: str) -> Tuple[Optional[List[float]], Optional[str]]:
+        if self.response_cache is None:
+            return None, None
+        with timer('response_cache_lookup'):
+            query_vector = self.vector_store.embed_query(retrieval_query)
+            cached = self.response_cache.lookup(query_vector, version=self._index_version())
+        if cached is not None:
+            metrics.increment('response_cache_hits')
+        return query_vector, cached
+
+    def _cache_response(self, query_vector: Optional[List[float]], response: str, compute_seconds: float):
+        if query_vector is not None:
+            self.response_cache.store(query_vector, response, compute_seconds, version=self._index_version())
+
+    def _retrieve(self, retrieval_query: str, query_vector: Optional[List[float]]) -> List[NodeWithScore]:
+        # The cache lookup already embedded the retrieval query; reuse it.
+        return self.vector_store.retrieve(query_vector if query_vector is not None else retrieval_query, self.top_k)
 
     def get_recommendation(self, query: str) -> str:
         """
@@ -42,31 +145,501 @@ class MovieRecommendationBot:
         Returns:
             Formatted response with movie recommendations
         """
-        enhanced_query = self.query_engine.enhance_query(query)
-        response = self.query_engine.engine.query(enhanced_query)
-        formatted_response = self.query_engine.format_response(response.response)
+        metrics.increment('recommendation_requests')
+        with timer('recommendation'):
+            start = time.perf_counter()
+            retrieval_query = self.query_engine.retrieval_query(query)
+            query_vector, cached = self._cached_response(retrieval_query)
+            if cached is not None:
+                return cached
+            
+            nodes = self._retrieve(retrieval_query, query_vector)
+            response = retry_with_backoff(lambda: self.query_engine.explain(query.strip(), nodes))
+            formatted_response = self.query_engine.format_response(response)
+            
+            self._cache_response(query_vector, formatted_response, time.perf_counter() - start)
+            return formatted_response
+
+    def fast_recommendations(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        genres: Optional[List[str]] = None,
+        ranges: Optional[Dict[str, Range]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ranked movies for a query without calling the LLM.
+        
+        Oversamples candidates from FAISS and re-ranks them by a blend of
+        similarity, vote-weighted rating and popularity (see
+        `ScoreFusionReranker`). Meant for autocomplete and carousels; use
+        `get_recommendation` when an explanation is needed.
+        
+        Args:
+            query: User's request, embedded as-is
+            k: Number of movies; defaults to the bot's top_k
+            genres: Keep movies with at least one of these genres
+            ranges: Inclusive (low, high) bounds on numeric metadata
+            
+        Returns:
+            Movie dicts with the fused `score` and each signal, best first
+        """
+        k = k or self.top_k
+        metrics.increment('fast_recommendation_requests')
+        with timer('fast_recommendation'):
+            with timer('embed_query'):
+                query_vector = self.vector_store.embed_query(query)
+            # Rows, metadata and filters must all come from one index generation.
+            with self.vector_store.reading():
+                metadata_index = self.vector_store.metadata_index
+                allowed_rows = None
+                if genres or ranges:
+                    with timer('metadata_filter'):
+                        allowed_rows = metadata_index.select(genres, ranges)
+                with timer('faiss_search'):
+                    scores, rows = self.vector_store.search(query_vector, k * FAST_RETRIEVAL_OVERSAMPLE, allowed_rows)
+                with timer('rerank'):
+                    rows, fused, signals = self.reranker.rerank(metadata_index, scores, rows, k)
+                
+                results = []
+                for i, (doc_id, metadata) in enumerate(self.vector_store.row_metadata(rows)):
+                    results.append({
+                        'id': doc_id,
+                        'title': metadata['title'],
+                        'genres': metadata['genres'] if isinstance(metadata['genres'], list) else [],
+                        'vote_average': metadata['vote_average'],
+                        'vote_count': metadata['vote_count'],
+                        'popularity': metadata['popularity'],
+                        'score': float(fused[i]),
+                        **{name: float(values[i]) for name, values in signals.items()}
+                    })
+                return results
+
+    def get_fast_recommendation(self, query: str, k: Optional[int] = None) -> str:
+        """`fast_recommendations`, formatted like the other responses."""
+        movies = self.fast_recommendations(query, k)
+        return self.query_engine.format_response(self.query_engine.format_ranked_movies(movies, 'score'))
+
+    async def afast_recommendations(self, query: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        """Async version of `fast_recommendations`, run on the search thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor,
+            lambda: self.fast_recommendations(query, **kwargs)
+        )
+
+    def _genre_aliases(self, metadata_index: MetadataIndex) -> Dict[str, str]:
+        # The vector store replaces its metadata index whenever rows change.
+        if metadata_index is not self._alias_index:
+            self._aliases = genre_aliases(metadata_index.genre_masks)
+            self._alias_index = metadata_index
+        return self._aliases
+
+    def _candidate_set(self, query_vector: np.ndarray, allowed_rows: Optional[np.ndarray] = None) -> CandidateSet:
+        """Oversampled FAISS candidates with the vectors and metadata needed to refine them in memory."""
+        metadata_index = self.vector_store.metadata_index
+        with timer('faiss_search'):
+            scores, rows = self.vector_store.search(query_vector, SESSION_CANDIDATES, allowed_rows)
+        rows = np.asarray(rows, dtype=np.int64)
+        
+        genre_masks = {}
+        for genre, mask in metadata_index.genre_masks.items():
+            candidate_mask = mask[rows]
+            if candidate_mask.any():
+                genre_masks[genre] = candidate_mask
+        return CandidateSet(
+            rows=rows,
+            vectors=self.vector_store.get_vectors(rows),
+            similarity=np.asarray(scores, dtype='float32'),
+            columns={name: values[rows] for name, values in metadata_index.columns.items()},
+            genre_masks=genre_masks,
+            version=self._index_version()
+        )
+
+    def _session_allowed_rows(self, session: Session) -> Optional[np.ndarray]:
+        metadata_index = self.vector_store.metadata_index
+        allowed_rows = metadata_index.select(session.genres, session.ranges)
+        if session.exclude_genres:
+            if allowed_rows is None:
+                allowed_rows = np.arange(metadata_index.size, dtype=np.int64)
+            allowed_rows = allowed_rows[~metadata_index.genre_mask(session.exclude_genres)[allowed_rows]]
+        return allowed_rows
+
+    def _session_nodes(self, session: Session) -> List[NodeWithScore]:
+        """The session's best `top_k` candidates under its filters, searching again only if too few pass."""
+        candidates = session.candidates
+        keep = np.flatnonzero(candidates.mask(session.ranges, session.genres, session.exclude_genres))
+        if len(keep) < self.top_k and session.has_filters:
+            metrics.increment('session_filtered_searches')
+            with timer('metadata_filter'):
+                allowed_rows = self._session_allowed_rows(session)
+            candidates = session.candidates = self._candidate_set(session.query_vector, allowed_rows)
+            keep = np.arange(len(candidates.rows))
+        
+        k = min(self.top_k, len(keep))
+        if 0 < k < len(keep):
+            keep = keep[np.argpartition(-candidates.similarity[keep], k - 1)[:k]]
+        top = keep[np.argsort(-candidates.similarity[keep], kind='stable')]
+        session.shown_rows = candidates.rows[top]
+        return self.vector_store.nodes_for_rows(candidates.rows[top], candidates.similarity[top])
+
+    def _session_turn(
+        self,
+        session_id: str,
+        query: str
+    ) -> Tuple[str, List[NodeWithScore], Optional[Tuple[np.ndarray, Optional[Dict[str, Any]]]]]:
+        """
+        Update a session with one user turn and pick the movies to show.
+        
+        A turn that only adds constraints ("something shorter", "only ones
+        rated above 7") filters the session's candidates in memory. A turn
+        close in meaning to the current request re-scores the same
+        candidates. Anything else starts a new request with a fresh search.
+        
+        Returns:
+            Tuple of (query for synthesis, nodes to show, and for a turn that
+            started a new request its query vector and constraints, else None)
+        """
+        fresh = None
+        session = self.sessions.get(session_id)
+        with session.lock, self.vector_store.reading():
+            session.turns += 1
+            metadata_index = self.vector_store.metadata_index
+            refinement = parse_refinement(query, self._genre_aliases(metadata_index))
+            current = session.candidates is not None and session.candidates.version == self._index_version()
+            
+            if current and refinement.is_refinement:
+                metrics.increment('session_refinements')
+                shown = {name: metadata_index.columns[name][session.shown_rows] for name, _ in refinement.relative}
+                session.refine(refinement, shown, text=query)
+            else:
+                with timer('embed_query'):
+                    query_vector = np.asarray(
+                        self.vector_store.embed_query(self.query_engine.retrieval_query(query)),
+                        dtype='float32'
+                    )
+                if current and _cosine(query_vector, session.query_vector) >= SESSION_SAME_INTENT_THRESHOLD:
+                    metrics.increment('session_rephrases')
+                    session.intent = query.strip()
+                    session.query_vector = query_vector
+                    session.candidates.rescore(query_vector)
+                else:
+                    metrics.increment('session_searches')
+                    session.start(query.strip(), query_vector)
+                    session.candidates = self._candidate_set(query_vector)
+                    # A new request can carry its own constraints ("horror under 90 minutes").
+                    session.refine(refinement, {})
+                    fresh = query_vector, _session_filters(session)
+            
+            with timer('session_filter'):
+                nodes = self._session_nodes(session)
+            synthesis_query = session.synthesis_query()
+        
+        self.sessions.save(session)
+        return synthesis_query, nodes, fresh
+
+    def chat(self, query: str, session_id: str = DEFAULT_SESSION, explain: bool = True) -> str:
+        """
+        One turn of a multi-turn conversation.
+        
+        Follow-ups refine the session's previous request without a new
+        search: "something shorter", "only ones rated above 7", "no horror".
+        Sessions expire after `SESSION_TTL_SECONDS` of inactivity.
+        
+        Args:
+            query: The user's message
+            session_id: Conversation the turn belongs to
+            explain: Have the LLM explain the picks instead of listing them
+            
+        Returns:
+            Formatted response
+        """
+        metrics.increment('chat_turns')
+        with timer('chat_turn'):
+            synthesis_query, nodes, _ = self._session_turn(session_id, query)
+            if not explain:
+                return self.query_engine.format_response(self.query_engine.format_movies(nodes))
+            response = retry_with_backoff(lambda: self.query_engine.explain(synthesis_query, nodes))
+            return self.query_engine.format_response(response)
+
+    def _stream_explain(self, query: str, nodes: List[NodeWithScore]) -> Iterator[str]:
+        yield from self.query_engine.stream_explain(query, nodes)
+
+    def stream_chat(self, query: str, session_id: str = DEFAULT_SESSION) -> ResponseStream:
+        """
+        Streaming version of `chat`.
+        
+        A turn that starts a new request is served from the response cache,
+        keyed on its constraints; without any it shares the entries of
+        `stream_recommendation`, which shows the same movies. A cached
+        response is returned whole, and a streamed one is stored once the
+        stream finishes. Follow-ups depend on the conversation and are never
+        cached.
+        """
+        metrics.increment('chat_turns')
+        synthesis_query, nodes, fresh = self._session_turn(session_id, query)
+        if fresh is None or self.response_cache is None:
+            return ResponseStream(RESPONSE_HEADER, self._stream_explain(synthesis_query, nodes), RESPONSE_FOOTER)
+        
+        query_vector, filters = fresh
+        version = self._index_version()
+        with timer('response_cache_lookup'):
+            cached = self.response_cache.lookup(query_vector, filters=filters, version=version)
+        if cached is not None:
+            metrics.increment('response_cache_hits')
+            return ResponseStream("", iter([cached]), "")
+        return ResponseStream(
+            RESPONSE_HEADER,
+            self._stream_explain(synthesis_query, nodes),
+            RESPONSE_FOOTER,
+            on_complete=lambda text, seconds: self.response_cache.store(
+                query_vector, text, seconds, filters=filters, version=version
+            )
+        )
+
+    async def achat(self, query: str, session_id: str = DEFAULT_SESSION, explain: bool = True) -> str:
+        """Async version of `chat`; the session update runs on the search thread pool."""
+        metrics.increment('chat_turns')
+        loop = asyncio.get_running_loop()
+        synthesis_query, nodes, _ = await loop.run_in_executor(
+            self._search_executor,
+            self._session_turn,
+            session_id,
+            query
+        )
+        if not explain:
+            return self.query_engine.format_response(self.query_engine.format_movies(nodes))
+        
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._llm_semaphore:
+            response = await aretry_with_backoff(
+                lambda: self.query_engine.aexplain(synthesis_query, nodes)
+            )
+        return self.query_engine.format_response(response)
+
+    def end_session(self, session_id: str) -> bool:
+        """Forget a conversation; returns whether it existed."""
+        return self.sessions.drop(session_id)
+
+    def _stream_tokens(self, query: str, retrieval_query: str, query_vector: Optional[List[float]]) -> Iterator[str]:
+        nodes = self._retrieve(retrieval_query, query_vector)
+        yield from self.query_engine.stream_explain(query.strip(), nodes)
+
+    def stream_recommendation(self, query: str) -> ResponseStream:
+        """
+        Streaming version of `get_recommendation`.
+        
+        The returned stream yields the response header immediately, then LLM
+        tokens as they arrive, then the footer; afterwards it exposes
+        `time_to_first_token` and `total_seconds`.
+        
+        Args:
+            query: User's request for movie recommendations
+            
+        Returns:
+            Iterable of response chunks
+        """
+        metrics.increment('recommendation_requests')
+        retrieval_query = self.query_engine.retrieval_query(query)
+        query_vector, cached = self._cached_response(retrieval_query)
+        if cached is not None:
+            return ResponseStream("", iter([cached]), "")
+        
+        return ResponseStream(
+            RESPONSE_HEADER,
+            self._stream_tokens(query, retrieval_query, query_vector),
+            RESPONSE_FOOTER,
+            on_complete=lambda text, seconds: self._cache_response(query_vector, text, seconds)
+        )
+
+    async def astream_recommendation(self, query: str) -> AsyncResponseStream:
+        """Async version of `stream_recommendation`; consume with `async for`."""
+        loop = asyncio.get_running_loop()
+        retrieval_query = self.query_engine.retrieval_query(query)
+        query_vector, cached = await loop.run_in_executor(self._search_executor, self._cached_response, retrieval_query)
+        if cached is not None:
+            return AsyncResponseStream("", iter([cached]), "", self._search_executor)
+        
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(self.max_concurrency)
+        return AsyncResponseStream(
+            RESPONSE_HEADER,
+            self._stream_tokens(query, retrieval_query, query_vector),
+            RESPONSE_FOOTER,
+            self._search_executor,
+            self._llm_semaphore,
+            on_complete=lambda text, seconds: self._cache_response(query_vector, text, seconds)
+        )
+
+    async def aget_recommendation(self, query: str) -> str:
+        """
+        Async version of `get_recommendation` for serving many users.
+        
+        Embedding and FAISS search run on a thread pool, LLM calls are bounded
+        by `max_concurrency` and retried with backoff, and concurrent
+        identical queries share a single upstream call.
+        
+        Args:
+            query: User's request for movie recommendations
+            
+        Returns:
+            Formatted response with movie recommendations
+        """
+        metrics.increment('recommendation_requests')
+        retrieval_query = self.query_engine.retrieval_query(query)
+        
+        inflight = self._inflight.get(retrieval_query)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._arecommend(query, retrieval_query))
+            self._inflight[retrieval_query] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(retrieval_query, None))
+        
+        # Shielded so one cancelled caller does not cancel the shared request.
+        return await asyncio.shield(inflight)
+
+    async def _arecommend(self, query: str, retrieval_query: str) -> str:
+        with timer('recommendation'):
+            start = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            query_vector, cached = await loop.run_in_executor(
+                self._search_executor,
+                self._cached_response,
+                retrieval_query
+            )
+            if cached is not None:
+                return cached
+        
+            nodes = await loop.run_in_executor(self._search_executor, self._retrieve, retrieval_query, query_vector)
+        
+            if self._llm_semaphore is None:
+                self._llm_semaphore = asyncio.Semaphore(self.max_concurrency)
+            async with self._llm_semaphore:
+                response = await aretry_with_backoff(
+                    lambda: self.query_engine.aexplain(query.strip(), nodes)
+                )
+        
+            formatted_response = self.query_engine.format_response(response)
+            self._cache_response(query_vector, formatted_response, time.perf_counter() - start)
+            return formatted_response
+
+    async def aget_similar_movies(self, movie_title: str, explain: bool = False) -> str:
+        """Async version of `get_similar_movies`."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor,
+            self.get_similar_movies,
+            movie_title,
+            explain
+        )
+
+    def get_recommendations_batch(
+        self,
+        queries: List[str],
+        max_concurrency: int = LLM_MAX_CONCURRENCY
+    ) -> List[Union[str, Exception]]:
+        """
+        Get recommendations for many queries at once.
+        
+        All queries are embedded in batched forward passes and searched with a
+        single FAISS call; only LLM synthesis runs per query, on a bounded
+        thread pool.
+        
+        Args:
+            queries: User requests for movie recommendations
+            max_concurrency: Maximum number of concurrent LLM calls
+            
+        Returns:
+            Formatted responses in input order; a query whose synthesis failed
+            gets its exception instead
+        """
+        retrieval_queries = [self.query_engine.retrieval_query(query) for query in queries]
+        retrieved = self.vector_store.retrieve_batch(retrieval_queries, self.top_k)
         
-        return formatted_response
+        def synthesize(i: int) -> str:
+            response = self.query_engine.explain(queries[i].strip(), retrieved[i])
+            return self.query_engine.format_response(response)
+        
+        results: List[Union[str, Exception]] = [None] * len(queries)
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            futures = {executor.submit(synthesize, i): i for i in range(len(queries))}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing batch query {i}: {e}")
+                    results[i] = e
+        
+        return results
 
-    def get_similar_movies(self, movie_title: str) -> str:
+    def get_similar_movies(self, movie_title: str, explain: bool = False) -> str:
         """
         Find movies similar to a given movie title.
         
+        Neighbours come from the vector store's precomputed neighbour graph
+        (or a search with the movie's own vector), not from an embedded prompt.
+        
         Args:
             movie_title: Title of the movie to find similarities for
+            explain: Have the LLM explain the matches instead of listing them
             
         Returns:
             Formatted response with similar movies
         """
-        query = self.query_engine.process_similar_movies_query(movie_title)
-        
-        if query is None:
-            return f"Sorry, I couldn't find the movie '{movie_title}' in my database."
-        
-        response = self.query_engine.engine.query(query)
-        formatted_response = self.query_engine.format_response(response.response)
+        metrics.increment('similar_movies_requests')
+        with timer('similar_movies'):
+            movie = self.query_engine.find_movie(movie_title)
+            
+            if movie is None:
+                return f"Sorry, I couldn't find the movie '{movie_title}' in my database."
+            
+            with timer('neighbor_lookup'):
+                nodes = self.vector_store.similar_nodes(str(movie.name), self.top_k)
+            if explain:
+                query = self.query_engine.process_similar_movies_query(movie_title)
+                response = self.query_engine.explain(query, nodes)
+            else:
+                response = self.query_engine.format_movies(nodes)
+            
+            return self.query_engine.format_response(response)
+
+    def top_movies(
+        self,
+        by: str = 'weighted_rating',
+        k: int = 10,
+        genre: Optional[str] = None,
+        min_votes: float = 0.0,
+        successful_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank the whole catalog by a precomputed score, without retrieval or the LLM.
         
-        return formatted_response
+        Args:
+            by: Score or numeric column: 'weighted_rating', 'roi', 'engagement_score', 'popularity', ...
+            k: Number of movies to return
+            genre: Only rank movies of this genre
+            min_votes: Minimum vote count
+            successful_only: Only rank movies flagged as successful
+            
+        Returns:
+            Movie dicts, best first
+        """
+        metrics.increment('top_movies_requests')
+        with timer('top_movies'):
+            positions = self.catalog.rank(by, k, genre=genre, min_votes=min_votes, successful_only=successful_only)
+            return self.catalog.to_dicts(positions)
+
+    def get_top_movies(self, by: str = 'weighted_rating', k: int = 10, genre: Optional[str] = None) -> str:
+        """`top_movies`, formatted like the other responses."""
+        movies = self.top_movies(by, k, genre=genre)
+        return self.query_engine.format_response(self.query_engine.format_ranked_movies(movies, by))
+
+    def cleanup(self):
+        """Persist caches and pending index changes."""
+        if self.response_cache is not None:
+            self.response_cache.save()
+        self.vector_store.cleanup()
 
     def filter_recommendations(self, 
                              query: str,
@@ -80,18 +653,18 @@ class MovieRecommendationBot:
             query: Base query for recommendations
             min_rating: Minimum rating threshold
             max_budget: Maximum budget threshold
-            genres: List of required genres
+            genres: List of accepted genres
             
         Returns:
-            Filtered and formatted recommendations
+            Top-k matching movies, formatted
         """
-        response = self.get_recommendation(query)
-        
-        filtered_response = self.query_engine.filter_recommendations(
-            response,
-            min_rating=min_rating,
-            max_budget=max_budget,
-            genres=genres
-        )
+        metrics.increment('filter_requests')
+        with timer('filter_recommendations'):
+            filtered_response = self.query_engine.filter_recommendations(
+                query,
+                min_rating=min_rating,
+                max_budget=max_budget,
+                genres=genres
+            )
         
         return filtered_response
\ No newline at end of file
@@ -1,80 +1,211 @@
-from typing import List, Dict, Any
+import logging
+from typing import Iterator, List, Dict, Any, Optional
 import pandas as pd
+from llama_index.prompts import PromptTemplate
+from llama_index.response_synthesizers import BaseSynthesizer, get_response_synthesizer
+from llama_index.schema import NodeWithScore, QueryBundle
+from ..config.settings import TOP_K_RECOMMENDATIONS, CONTEXT_TOKEN_BUDGET
+from ..indexing.context_builder import ContextBuilder
+from ..indexing.title_index import TitleIndex
+from ..indexing.vector_store import MovieVectorStore
 from ..models.movie import Movie
+from ..utils.llm import retry_with_backoff
+from ..utils.metrics import metrics, timed, timer
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_HEADER = "🎬 Movie Recommendations:\n\n"
+RESPONSE_FOOTER = "\n\n💡 Note: Ratings are out of 10, based on user votes."
+
+# The instructions come first and never change, so every synthesis prompt
+# shares the same prefix (which providers can cache); only the context and
+# the request vary. Bump the version whenever the instructions change:
+# cached responses are keyed on it.
+SYNTHESIS_PROMPT_VERSION = 2
+SYNTHESIS_INSTRUCTIONS = """You are a movie recommendation assistant. Recommend movies from the context that match the user's request and explain why they match.
+
+For each recommended movie, provide:
+1. Title
+2. Genres
+3. Average rating and number of votes
+4. A brief explanation of why it matches the request
+5. Any notable aspects (high budget, part of a collection, etc.)
+
+Focus on movies that best match the user's specific preferences and requirements. Only recommend movies from the context."""
+SYNTHESIS_PROMPT_TMPL = (
+    SYNTHESIS_INSTRUCTIONS + "\n\n"
+    "Context information is below.\n"
+    "---------------------\n"
+    "{context_str}\n"
+    "---------------------\n"
+    "User request: {query_str}\n"
+    "Answer: "
+)
+SYNTHESIS_PROMPT = PromptTemplate(SYNTHESIS_PROMPT_TMPL)
+
+SCORE_LABELS = {
+    'roi': "ROI",
+    'engagement_score': "Engagement",
+    'weighted_rating': "Weighted rating",
+    'score': "Match score"
+}
 
 class MovieQueryEngine:
-    def __init__(self, vector_store_engine, movie_data: pd.DataFrame):
+    def __init__(
+        self,
+        vector_store_engine,
+        movie_data: pd.DataFrame,
+        vector_store: Optional[MovieVectorStore] = None,
+        top_k: int = TOP_K_RECOMMENDATIONS,
+        context_budget: Optional[int] = CONTEXT_TOKEN_BUDGET
+    ):
         self.engine = vector_store_engine
+        self.engine.update_prompts({'response_synthesizer:text_qa_template': SYNTHESIS_PROMPT})
         self.movie_data = movie_data
+        self.vector_store = vector_store
+        self.top_k = top_k
+        self.title_index = TitleIndex(movie_data)
+        self._stream_synthesizer: Optional[BaseSynthesizer] = None
+        self.context_builder = ContextBuilder(
+            vector_store,
+            token_budget=context_budget,
+            prompt_template=SYNTHESIS_PROMPT_TMPL
+        ) if context_budget else None
 
-    def enhance_query(self, query: str) -> str:
-        """Enhance the user query to get better recommendations."""
-        return f"""
-        Based on the following user request, recommend movies and explain why they match:
-        {query}
-        
-        For each recommended movie, provide:
-        1. Title and year
-        2. Genres
-        3. Average rating and number of votes
-        4. A brief explanation of why it matches the request
-        5. Any notable aspects (high budget, part of a collection, etc.)
+    @staticmethod
+    def retrieval_query(query: str) -> str:
+        """
+        Normalize a user request for embedding and caching.
         
-        Focus on movies that best match the user's specific preferences and requirements.
+        Only the request itself is embedded; the instructions live in the
+        synthesis prompt. Case and whitespace are folded (the BGE tokenizer
+        is uncased anyway) so trivially different requests share cache entries.
         """
+        return " ".join(query.split()).lower()
+
+    @timed('title_lookup')
+    def find_movie(self, movie_title: str) -> Optional[pd.Series]:
+        """Resolve a user-typed title to a catalog row, tolerating small typos."""
+        movie_id = self.title_index.best_match(movie_title)
+        if movie_id is None:
+            return None
+        return self.movie_data.loc[movie_id]
 
     def process_similar_movies_query(self, movie_title: str) -> str:
         """Create a query to find movies similar to a given title."""
-        movie = self.movie_data[
-            self.movie_data['original_title'].str.lower() == movie_title.lower()
-        ]
+        movie = self.find_movie(movie_title)
         
-        if len(movie) == 0:
+        if movie is None:
             return None
             
-        movie = movie.iloc[0]
-        query = f"""
-        Find movies similar to '{movie_title}' with these characteristics:
-        - Genres: {', '.join(movie['genres'])}
-        - Runtime: {movie['runtime']} minutes
-        - Rating: {movie['vote_average']}
-        
-        Consider both the plot elements and these characteristics.
-        Prioritize movies with similar genres and themes.
-        """
-        return query
+        traits = [f"{movie['runtime']:.0f} minutes", f"rated {movie['vote_average']}"]
+        if isinstance(movie['genres'], list) and movie['genres']:
+            traits.insert(0, ', '.join(movie['genres']))
+        return f"Movies similar to '{movie_title}' ({'; '.join(traits)}) in plot, genres and themes"
 
     def filter_recommendations(self, 
-                             response: str, 
+                             query: str, 
                              min_rating: float = 0.0,
                              max_budget: float = float('inf'),
-                             genres: List[str] = None) -> str:
+                             genres: List[str] = None,
+                             top_k: Optional[int] = None) -> str:
         """
-        Filter and enhance the recommendation response based on criteria.
+        Get the top-k movies for a query that satisfy the given criteria.
+
+        The filters are resolved against the vector store's metadata index and
+        pushed into the FAISS search, so only matching movies are scored.
         """
-        movies = self.movie_data[
-            (self.movie_data['vote_average'] >= min_rating) &
-            (self.movie_data['budget'] <= max_budget)
-        ]
-        
-        if genres:
-            movies = movies[
-                movies['genres'].apply(lambda x: any(genre in x for genre in genres))
-            ]
-        
+        if self.vector_store is None:
+            raise ValueError("Filtered recommendations require a vector store")
+
+        # Ratings are never negative, so a minimum of 0 filters nothing; without
+        # any bound the search skips building a row selector entirely.
+        ranges = {}
+        if min_rating > 0:
+            ranges['vote_average'] = (min_rating, None)
+        if max_budget < float('inf'):
+            ranges['budget'] = (None, max_budget)
+
+        nodes = self.vector_store.retrieve(
+            query,
+            top_k or self.top_k,
+            genres=genres,
+            ranges=ranges or None
+        )
+
+        return self.format_movies(nodes)
+
+    @timed('format_movies')
+    def format_movies(self, nodes: List[NodeWithScore]) -> str:
+        """Render retrieved movies straight from their metadata."""
         results = []
-        for _, movie in movies.iterrows():
+        for node in nodes:
+            movie = node.node.metadata
+            movie_genres = movie['genres'] if isinstance(movie['genres'], list) else []
             results.append(
-                f"{movie['original_title']} ({', '.join(movie['genres'])})"
-                f"\nRating: {movie['vote_average']}/10 ({movie['vote_count']} votes)"
+                f"{movie['title']} ({', '.join(movie_genres)})"
+                f"\nRating: {movie['vote_average']}/10 ({movie['vote_count']:.0f} votes)"
                 f"\nBudget: ${movie['budget']:,.2f}"
             )
             
         return "\n\n".join(results)
 
+    def format_ranked_movies(self, movies: List[Dict[str, Any]], by: str) -> str:
+        """Render `MovieCatalog.to_dicts` output, showing the score it was ranked by."""
+        results = []
+        for rank, movie in enumerate(movies, 1):
+            results.append(
+                f"{rank}. {movie['title']} ({', '.join(movie['genres'])})"
+                f"\nRating: {movie['vote_average']}/10 ({movie['vote_count']:.0f} votes)"
+                f"\n{SCORE_LABELS.get(by, by.replace('_', ' ').capitalize())}: {movie[by]:,.2f}"
+            )
+            
+        return "\n\n".join(results)
+
+    def build_context(self, query: str, nodes: List[NodeWithScore]) -> List[NodeWithScore]:
+        """Pack nodes into the context token budget and record the resulting prompt size."""
+        if self.context_builder is None:
+            return nodes
+        
+        with timer('context_build'):
+            nodes, stats = self.context_builder.build(query, nodes)
+        metrics.record('prompt_tokens', stats.prompt_tokens)
+        metrics.record('context_tokens', stats.context_tokens)
+        logger.debug(
+            "Context: %d/%d movies, %d duplicates, %d sentences dropped, %d context / %d prompt tokens",
+            stats.nodes_kept, stats.nodes_in, stats.duplicates, stats.sentences_dropped,
+            stats.context_tokens, stats.prompt_tokens
+        )
+        return nodes
+
+    def explain(self, query: str, nodes: List[NodeWithScore]) -> str:
+        """Have the LLM write an answer over already-retrieved movies, skipping retrieval."""
+        nodes = self.build_context(query, nodes)
+        with timer('llm_synthesis'):
+            return self.engine.synthesize(QueryBundle(query), nodes).response
+
+    async def aexplain(self, query: str, nodes: List[NodeWithScore]) -> str:
+        """Async version of `explain`."""
+        nodes = self.build_context(query, nodes)
+        with timer('llm_synthesis'):
+            response = await self.engine.asynthesize(QueryBundle(query), nodes)
+        return response.response
+
+    def stream_explain(self, query: str, nodes: List[NodeWithScore]) -> Iterator[str]:
+        """Streaming version of `explain`, yielding response tokens as the LLM produces them."""
+        if self._stream_synthesizer is None:
+            self._stream_synthesizer = get_response_synthesizer(
+                service_context=self.vector_store.service_context,
+                text_qa_template=SYNTHESIS_PROMPT,
+                streaming=True
+            )
+        nodes = self.build_context(query, nodes)
+        # Retries cover starting the stream; a failure mid-stream propagates.
+        with timer('llm_stream_start'):
+            response = retry_with_backoff(lambda: self._stream_synthesizer.synthesize(QueryBundle(query), nodes))
+        return response.response_gen
+
+    @timed('format_response')
     def format_response(self, response: str) -> str:
         """Format the recommendation response for better readability."""
-        formatted = "🎬 Movie Recommendations:\n\n"
-        formatted += response
-        formatted += "\n\n💡 Note: Ratings are out of 10, based on user votes."
-        return formatted
\ No newline at end of file
+        return RESPONSE_HEADER + response + RESPONSE_FOOTER
\ No newline at end of file
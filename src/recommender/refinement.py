@@ -0,0 +1,164 @@
+import re
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple
+
+from ..indexing.metadata_index import Range
+
+# Words that carry no intent of their own in a follow-up like
+# "only ones rated above 7, please".
+FILLER = frozenset(
+    "a about an and any are but can could except film films for give how i is just maybe me "
+    "more movie movies no not now of on one ones only please rated rating show skip some "
+    "something than that the them these those to want what with without".split()
+)
+
+# Leftover words (after constraints and filler are removed) above which a
+# turn is treated as a new request rather than a refinement.
+MAX_LEFTOVER_WORDS = 1
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_SCALES = {'k': 1e3, 'thousand': 1e3, 'm': 1e6, 'mil': 1e6, 'million': 1e6, 'b': 1e9, 'billion': 1e9}
+
+# Comparator phrase -> (direction, inclusive)
+_COMPARATORS = {
+    'above': ('above', False), 'over': ('above', False), 'more than': ('above', False),
+    'greater than': ('above', False), 'higher than': ('above', False), 'at least': ('above', True),
+    'below': ('below', False), 'under': ('below', False), 'less than': ('below', False),
+    'lower than': ('below', False), 'at most': ('below', True), 'no more than': ('below', True)
+}
+_CMP = "(" + "|".join(sorted(_COMPARATORS, key=len, reverse=True)) + ")"
+
+# (pattern, field, unit); groups are comparator, number and, for budgets, scale.
+_ABSOLUTE = [
+    (re.compile(rf"(?:rated|rating|scored?)\s+{_CMP}\s+{_NUMBER}"), 'vote_average', 1.0),
+    (re.compile(rf"{_CMP}\s+{_NUMBER}\s*(?:stars|/\s*10)"), 'vote_average', 1.0),
+    (re.compile(rf"{_CMP}\s+{_NUMBER}\s*votes"), 'vote_count', 1.0),
+    (re.compile(rf"{_CMP}\s+{_NUMBER}\s*(?:hours?|hrs?)\b"), 'runtime', 60.0),
+    (re.compile(rf"{_CMP}\s+{_NUMBER}\s*(?:minutes|mins?)\b"), 'runtime', 1.0),
+    (re.compile(rf"budget\s+(?:of\s+)?{_CMP}\s+\$?{_NUMBER}\s*({'|'.join(_SCALES)})?\b"), 'budget', 1.0),
+]
+
+# Comparisons against the movies shown in the previous turn.
+_RELATIVE = [
+    (re.compile(r"\b(?:shorter|quicker)\b"), 'runtime', 'below'),
+    (re.compile(r"\blonger\b"), 'runtime', 'above'),
+    (re.compile(r"\b(?:better|higher)[- ]rated\b|\bbetter ones\b|\bhigher ratings?\b"), 'vote_average', 'above'),
+    (re.compile(r"\b(?:more popular|better known|well[- ]known)\b"), 'popularity', 'above'),
+    (re.compile(r"\b(?:less popular|lesser[- ]known|obscure|hidden gems?)\b"), 'popularity', 'below'),
+    (re.compile(r"\b(?:cheaper|lower[- ]budget|smaller budget|indie)\b"), 'budget', 'below'),
+    (re.compile(r"\b(?:bigger|higher|larger)[- ]budget\b|\bblockbusters?\b"), 'budget', 'above'),
+]
+
+_EXCLUDE = re.compile(r"\b(?:no|not|without|except|skip|exclude)\s+(?:any\s+)?$")
+# What may separate genres in one list ("horror, comedy or drama"); a
+# negation before the first covers the rest of the list.
+_LIST_JOINER = re.compile(r"(?:[\s,]|\b(?:or|and|nor|any)\b)*")
+
+
+@dataclass
+class Refinement:
+    """Constraints parsed from a follow-up turn."""
+    ranges: Dict[str, Range] = field(default_factory=dict)
+    relative: List[Tuple[str, str]] = field(default_factory=list)
+    genres: Set[str] = field(default_factory=set)
+    exclude_genres: Set[str] = field(default_factory=set)
+    leftover: List[str] = field(default_factory=list)
+
+    @property
+    def has_constraints(self) -> bool:
+        return bool(self.ranges or self.relative or self.genres or self.exclude_genres)
+
+    @property
+    def is_refinement(self) -> bool:
+        """True when the turn only narrows the previous request."""
+        return self.has_constraints and len(self.leftover) <= MAX_LEFTOVER_WORDS
+
+
+def _bound(comparator: str, value: float) -> Range:
+    direction, inclusive = _COMPARATORS[comparator]
+    # Ranges are inclusive, so "above 7" starts just past 7.
+    if direction == 'above':
+        return (value if inclusive else float(np.nextafter(value, np.inf)), None)
+    return (None, value if inclusive else float(np.nextafter(value, -np.inf)))
+
+
+def intersect(a: Range, b: Range) -> Range:
+    """The range satisfying both `a` and `b`; open ends are None."""
+    lows = [low for low in (a[0], b[0]) if low is not None]
+    highs = [high for high in (a[1], b[1]) if high is not None]
+    return (max(lows) if lows else None, min(highs) if highs else None)
+
+
+def genre_aliases(genres: Iterable[str]) -> Dict[str, str]:
+    """Lower-case spellings (singular, plural, common short forms) mapped to catalog genre names."""
+    aliases: Dict[str, str] = {}
+    for genre in genres:
+        name = genre.lower()
+        aliases[name] = genre
+        aliases[name[:-1] + "ies" if name.endswith("y") else name + "s"] = genre
+    for short, name in (('sci-fi', 'Science Fiction'), ('scifi', 'Science Fiction'),
+                        ('romcom', 'Romance'), ('animated', 'Animation')):
+        if name in aliases.values():
+            aliases.setdefault(short, name)
+    return aliases
+
+
+def parse_refinement(text: str, aliases: Dict[str, str]) -> Refinement:
+    """
+    Extract rating, runtime, budget, vote and genre constraints from a turn.
+
+    Args:
+        text: The user's message
+        aliases: Output of `genre_aliases` for the catalog
+
+    Returns:
+        The parsed constraints plus the words nothing accounted for
+    """
+    text = " ".join(text.lower().split())
+    refinement = Refinement()
+    consumed: List[Tuple[int, int]] = []
+
+    def claim(match: re.Match):
+        consumed.append(match.span())
+
+    for pattern, name, unit in _ABSOLUTE:
+        for match in pattern.finditer(text):
+            if any(start <= match.start() < end for start, end in consumed):
+                continue
+            value = float(match.group(2)) * unit
+            if name == 'budget':
+                value *= _SCALES.get(match.group(3) or '', 1.0)
+            bound = _bound(match.group(1), value)
+            refinement.ranges[name] = intersect(refinement.ranges.get(name, (None, None)), bound)
+            claim(match)
+
+    for pattern, name, direction in _RELATIVE:
+        for match in pattern.finditer(text):
+            if name not in refinement.ranges:
+                refinement.relative.append((name, direction))
+            claim(match)
+
+    genre_matches = []
+    for alias in sorted(aliases, key=len, reverse=True):
+        for match in re.finditer(rf"\b{re.escape(alias)}\b", text):
+            if any(start <= match.start() < end for start, end in consumed):
+                continue
+            genre_matches.append((*match.span(), aliases[alias]))
+            claim(match)
+
+    # A negation holds until something other than a list joiner follows a genre.
+    excluding = False
+    previous_end = 0
+    for start, end, genre in sorted(genre_matches):
+        gap = text[previous_end:start]
+        excluding = bool(_EXCLUDE.search(gap)) or (excluding and bool(_LIST_JOINER.fullmatch(gap)))
+        (refinement.exclude_genres if excluding else refinement.genres).add(genre)
+        previous_end = end
+
+    remaining = list(text)
+    for start, end in consumed:
+        remaining[start:end] = " " * (end - start)
+    words = re.findall(r"[a-z0-9']+", "".join(remaining))
+    refinement.leftover = [word for word in words if word not in FILLER]
+    return refinement
@@ -0,0 +1,89 @@
+import logging
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from ..config.settings import FUSION_WEIGHTS
+from ..indexing.metadata_index import MetadataIndex
+from ..models.catalog import weighted_rating
+
+logger = logging.getLogger(__name__)
+
+SIGNALS = ('similarity', 'rating', 'popularity')
+
+
+class ScoreFusionReranker:
+    """
+    Re-rank FAISS candidates by a weighted blend of similarity and movie quality.
+
+    The quality signals are precomputed once per metadata index as arrays
+    aligned with FAISS rows, both scaled to [0, 1]:
+
+    - rating: the vote-weighted rating, divided by 10
+    - popularity: log1p(popularity) over the catalog maximum, because raw
+      popularity is heavy-tailed
+
+    Re-ranking a batch of candidates is a gather, a dot product and an
+    argpartition.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        weights = {**FUSION_WEIGHTS, **(weights or {})}
+        unknown = set(weights) - set(SIGNALS)
+        if unknown:
+            raise ValueError(f"Unknown fusion signals {sorted(unknown)}, expected {SIGNALS}")
+        self.weights = weights
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._rating: Optional[np.ndarray] = None
+        self._popularity: Optional[np.ndarray] = None
+
+    def _priors(self, metadata_index: MetadataIndex) -> Tuple[np.ndarray, np.ndarray]:
+        # The vector store replaces its metadata index whenever rows change,
+        # so identity is enough to know the priors are stale.
+        if metadata_index is not self._metadata_index:
+            columns = metadata_index.columns
+            self._rating = weighted_rating(columns['vote_average'], columns['vote_count']) / 10.0
+            popularity = np.log1p(np.maximum(columns['popularity'], 0.0))
+            peak = popularity.max() if len(popularity) else 0.0
+            self._popularity = popularity / peak if peak > 0 else popularity
+            self._metadata_index = metadata_index
+        return self._rating, self._popularity
+
+    def signals(self, metadata_index: MetadataIndex, scores: np.ndarray, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-candidate value of each signal."""
+        rating, popularity = self._priors(metadata_index)
+        return {
+            'similarity': np.asarray(scores, dtype=np.float64),
+            'rating': rating[rows],
+            'popularity': popularity[rows]
+        }
+
+    def rerank(
+        self,
+        metadata_index: MetadataIndex,
+        scores: np.ndarray,
+        rows: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Pick the best `k` candidates by fused score.
+
+        Args:
+            metadata_index: The vector store's row-aligned metadata
+            scores: FAISS similarity of each candidate
+            rows: FAISS row of each candidate
+            k: Number of results
+
+        Returns:
+            Tuple of (rows, fused scores, per-signal values), best first
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        signals = self.signals(metadata_index, scores, rows)
+        fused = sum(self.weights.get(name, 0.0) * values for name, values in signals.items())
+
+        k = max(0, min(k, len(rows)))
+        if 0 < k < len(rows):
+            top = np.argpartition(-fused, k - 1)[:k]
+        else:
+            top = np.arange(k)
+        top = top[np.argsort(-fused[top], kind='stable')]
+        return rows[top], fused[top], {name: values[top] for name, values in signals.items()}
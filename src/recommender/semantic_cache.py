@@ -0,0 +1,202 @@
+import json
+import logging
+import threading
+import time
+import faiss
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..config.settings import (
+    RESPONSE_CACHE_THRESHOLD,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Neighbours inspected per lookup; near-duplicates with other filters can
+# outrank the entry that actually matches.
+_CANDIDATES = 8
+
+
+@dataclass
+class CacheEntry:
+    filters_key: str
+    response: str
+    created: float
+    compute_seconds: float
+
+
+def filters_key(filters: Optional[Dict[str, Any]]) -> str:
+    """Canonical string form of the active filters."""
+    return json.dumps(filters or {}, sort_keys=True, default=str)
+
+
+class SemanticCache:
+    """
+    Response cache keyed on query embeddings.
+
+    A lookup hits when a cached query with the same filters lies within
+    `threshold` cosine similarity. Entries expire after `ttl_seconds`, the
+    least recently used entry is evicted beyond `max_entries`, and the whole
+    cache is dropped when the index version changes.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        threshold: float = RESPONSE_CACHE_THRESHOLD,
+        max_entries: int = RESPONSE_CACHE_SIZE,
+        ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+        persist_path: Optional[Path] = None
+    ):
+        self.dimension = dimension
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.version: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+
+        if self.persist_path:
+            self.load()
+
+    def _normalize(self, vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype='float32').reshape(1, self.dimension)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: Optional[str]):
+        if version != self.version:
+            if self._entries:
+                logger.info("Index changed, dropping %d cached responses", len(self._entries))
+            self._clear()
+            self.version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._vectors.clear()
+        self._index.reset()
+
+    def _remove(self, entry_id: int):
+        self._entries.pop(entry_id, None)
+        self._vectors.pop(entry_id, None)
+        self._index.remove_ids(np.array([entry_id], dtype=np.int64))
+
+    def lookup(self, vector, filters: Optional[Dict[str, Any]] = None, version: Optional[str] = None) -> Optional[str]:
+        """Return a cached response for a semantically equivalent query, if any."""
+        key = filters_key(filters)
+        query = self._normalize(vector)
+        now = time.time()
+
+        with self._lock:
+            self._check_version(version)
+            if self._index.ntotal:
+                scores, ids = self._index.search(query, min(_CANDIDATES, self._index.ntotal))
+                for score, entry_id in zip(scores[0], ids[0]):
+                    if entry_id < 0 or score < self.threshold:
+                        break
+                    entry = self._entries.get(int(entry_id))
+                    if entry is None:
+                        continue
+                    if now - entry.created > self.ttl_seconds:
+                        self._remove(int(entry_id))
+                        continue
+                    if entry.filters_key != key:
+                        continue
+
+                    self._entries.move_to_end(int(entry_id))
+                    self.hits += 1
+                    self.saved_seconds += entry.compute_seconds
+                    return entry.response
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        vector,
+        response: str,
+        compute_seconds: float,
+        filters: Optional[Dict[str, Any]] = None,
+        version: Optional[str] = None,
+        created: Optional[float] = None
+    ):
+        """Cache a response, evicting the least recently used entry when full."""
+        query = self._normalize(vector)
+        with self._lock:
+            self._check_version(version)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = CacheEntry(
+                filters_key(filters), response, created or time.time(), compute_seconds
+            )
+            self._vectors[entry_id] = query[0]
+            self._index.add_with_ids(query, np.array([entry_id], dtype=np.int64))
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'saved_llm_seconds': self.saved_seconds
+        }
+
+    def save(self):
+        """Persist live entries so they survive a restart."""
+        if not self.persist_path:
+            return
+
+        with self._lock:
+            now = time.time()
+            live = [(i, e) for i, e in self._entries.items() if now - e.created <= self.ttl_seconds]
+            self.persist_path.mkdir(parents=True, exist_ok=True)
+            vectors = np.stack([self._vectors[i] for i, _ in live]) if live else np.empty((0, self.dimension), 'float32')
+            np.save(self.persist_path / "vectors.npy", vectors)
+            (self.persist_path / "entries.json").write_text(json.dumps({
+                'version': self.version,
+                'entries': [e.__dict__ for _, e in live]
+            }))
+
+    def load(self):
+        """Restore persisted entries; they are dropped on the first lookup if the index changed."""
+        entries_path = self.persist_path / "entries.json"
+        vectors_path = self.persist_path / "vectors.npy"
+        if not entries_path.exists() or not vectors_path.exists():
+            return
+
+        try:
+            data = json.loads(entries_path.read_text())
+            vectors = np.load(vectors_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable response cache: %s", e)
+            return
+
+        with self._lock:
+            self._clear()
+            self.version = data.get('version')
+            for vector, entry in zip(vectors, data.get('entries', [])):
+                entry_id = self._next_id
+                self._next_id += 1
+                self._entries[entry_id] = CacheEntry(**entry)
+                self._vectors[entry_id] = vector
+                self._index.add_with_ids(vector.reshape(1, -1), np.array([entry_id], dtype=np.int64))
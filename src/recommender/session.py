@@ -0,0 +1,244 @@
+import logging
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from ..config.settings import SESSION_MAX_COUNT, SESSION_TTL_SECONDS, SESSION_MAX_BYTES
+from ..indexing.metadata_index import Range
+from .refinement import Refinement, intersect
+
+logger = logging.getLogger(__name__)
+
+# Follow-up texts kept per session for the synthesis prompt.
+MAX_REFINEMENTS = 5
+
+DEFAULT_SESSION = "default"
+
+
+@dataclass
+class CandidateSet:
+    """
+    Oversampled retrieval results for one intent, kept for in-memory refinement.
+
+    Everything is aligned with `rows`: the candidates' FAISS rows, their
+    vectors, their similarity to the current query, numeric metadata and
+    one boolean mask per genre present.
+    """
+    rows: np.ndarray
+    vectors: np.ndarray
+    similarity: np.ndarray
+    columns: Dict[str, np.ndarray]
+    genre_masks: Dict[str, np.ndarray]
+    version: str
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.rows, self.vectors, self.similarity, *self.columns.values(), *self.genre_masks.values()]
+        return sum(array.nbytes for array in arrays)
+
+    def rescore(self, query_vector: np.ndarray):
+        """Re-rank against a rephrased query without searching again."""
+        self.similarity = self.vectors @ np.asarray(query_vector, dtype='float32')
+
+    def mask(self, ranges: Dict[str, Range], genres: Set[str], exclude_genres: Set[str]) -> np.ndarray:
+        """Candidates satisfying every range, at least one of `genres` (if any) and none of `exclude_genres`."""
+        mask = np.ones(len(self.rows), dtype=bool)
+        for name, (low, high) in ranges.items():
+            if low is not None:
+                mask &= self.columns[name] >= low
+            if high is not None:
+                mask &= self.columns[name] <= high
+        if genres:
+            wanted = np.zeros(len(self.rows), dtype=bool)
+            for genre in genres:
+                if genre in self.genre_masks:
+                    wanted |= self.genre_masks[genre]
+            mask &= wanted
+        for genre in exclude_genres:
+            if genre in self.genre_masks:
+                mask &= ~self.genre_masks[genre]
+        return mask
+
+
+@dataclass
+class Session:
+    """Conversation state for one user: the current intent, its candidates and the active filters."""
+    session_id: str
+    intent: str = ""
+    query_vector: Optional[np.ndarray] = None
+    candidates: Optional[CandidateSet] = None
+    ranges: Dict[str, Range] = field(default_factory=dict)
+    genres: Set[str] = field(default_factory=set)
+    exclude_genres: Set[str] = field(default_factory=set)
+    refinements: List[str] = field(default_factory=list)
+    shown_rows: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    turns: int = 0
+    created: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+    # Turns of one session run one at a time.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def nbytes(self) -> int:
+        size = self.shown_rows.nbytes
+        if self.query_vector is not None:
+            size += self.query_vector.nbytes
+        if self.candidates is not None:
+            size += self.candidates.nbytes
+        return size
+
+    @property
+    def has_filters(self) -> bool:
+        return bool(self.ranges or self.genres or self.exclude_genres)
+
+    def start(self, intent: str, query_vector: np.ndarray):
+        """Begin a new intent, dropping the previous candidates and filters."""
+        self.intent = intent
+        self.query_vector = np.asarray(query_vector, dtype='float32')
+        self.candidates = None
+        self.ranges = {}
+        self.genres = set()
+        self.exclude_genres = set()
+        self.refinements = []
+
+    def _merge_range(self, name: str, bound: Range):
+        merged = intersect(self.ranges.get(name, (None, None)), bound)
+        low, high = merged
+        # A bound contradicting an earlier one ("longer" after "shorter")
+        # replaces it instead of leaving nothing to recommend.
+        self.ranges[name] = bound if low is not None and high is not None and low > high else merged
+
+    def refine(
+        self,
+        refinement: Refinement,
+        shown_columns: Dict[str, np.ndarray],
+        text: Optional[str] = None
+    ):
+        """
+        Fold a turn's constraints into the active filters.
+
+        Relative constraints ("shorter") are resolved against the mean of the
+        movies shown last turn, given as `shown_columns`. `text` is recorded
+        as a follow-up for the synthesis prompt.
+        """
+        for name, bound in refinement.ranges.items():
+            self._merge_range(name, bound)
+        for name, direction in refinement.relative:
+            values = shown_columns.get(name)
+            if values is None or len(values) == 0:
+                continue
+            reference = float(values.mean())
+            if direction == 'above':
+                self._merge_range(name, (float(np.nextafter(reference, np.inf)), None))
+            else:
+                self._merge_range(name, (None, float(np.nextafter(reference, -np.inf))))
+        if refinement.genres:
+            self.genres = set(refinement.genres)
+            self.exclude_genres -= refinement.genres
+        self.exclude_genres |= refinement.exclude_genres
+        self.genres -= refinement.exclude_genres
+
+        if text:
+            self.refinements = (self.refinements + [text.strip()])[-MAX_REFINEMENTS:]
+
+    def synthesis_query(self) -> str:
+        """The request the LLM answers: the intent plus any follow-ups."""
+        if not self.refinements:
+            return self.intent
+        return f"{self.intent} (follow-ups: {'; '.join(self.refinements)})"
+
+    def filters(self) -> Dict[str, Any]:
+        return {
+            'ranges': dict(self.ranges),
+            'genres': sorted(self.genres),
+            'exclude_genres': sorted(self.exclude_genres)
+        }
+
+
+class SessionStore:
+    """
+    Bounded set of conversation sessions.
+
+    Sessions expire `ttl_seconds` after their last turn; beyond
+    `max_sessions`, or once their candidate sets together exceed
+    `max_bytes`, the least recently used sessions are evicted.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = SESSION_MAX_COUNT,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        max_bytes: int = SESSION_MAX_BYTES
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def get(self, session_id: str) -> Session:
+        """Return the live session with this id, starting a new one if it expired or never existed."""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.last_access > self.ttl_seconds:
+                self._remove(session_id)
+                session = None
+            if session is None:
+                session = Session(session_id)
+                self._sessions[session_id] = session
+                self._sizes[session_id] = 0
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now, keep=session_id)
+            return session
+
+    def save(self, session: Session):
+        """Account for a session's new size after a turn and evict if over budget."""
+        with self._lock:
+            if session.session_id not in self._sessions:
+                return
+            size = session.nbytes
+            self._bytes += size - self._sizes[session.session_id]
+            self._sizes[session.session_id] = size
+            self._evict(time.time(), keep=session.session_id)
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._remove(session_id)
+            return True
+
+    def _remove(self, session_id: str):
+        del self._sessions[session_id]
+        self._bytes -= self._sizes.pop(session_id)
+
+    def _evict(self, now: float, keep: str):
+        # Least recently used first, so expired sessions sit at the front.
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session_id == keep:
+                break
+            expired = now - session.last_access > self.ttl_seconds
+            if not (expired or len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+                break
+            self._remove(session_id)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {'sessions': len(self._sessions), 'bytes': self._bytes, 'evictions': self.evictions}
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class ResponseStream:
+    """
+    Iterator over the chunks of a streamed recommendation.
+
+    The header is yielded immediately, then the LLM tokens as they arrive,
+    then the footer. Time to first token (first LLM token, not the header)
+    and total latency are recorded once the stream is consumed.
+    """
+
+    def __init__(
+        self,
+        header: str,
+        tokens: Iterator[str],
+        footer: str,
+        on_complete: Optional[Callable[[str, float], None]] = None
+    ):
+        self.header = header
+        self.footer = footer
+        self.time_to_first_token: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+        self._tokens = tokens
+        self._parts: List[str] = []
+        self._on_complete = on_complete
+        self._start = time.perf_counter()
+
+    @property
+    def text(self) -> str:
+        """The full formatted response; only complete after iteration finishes."""
+        return self.header + "".join(self._parts) + self.footer
+
+    def _first_token(self):
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - self._start
+
+    def _finish(self):
+        self.total_seconds = time.perf_counter() - self._start
+        logger.info(
+            "Streamed response: first token %.3fs, total %.3fs",
+            self.time_to_first_token or self.total_seconds, self.total_seconds
+        )
+        if self._on_complete is not None:
+            self._on_complete(self.text, self.total_seconds)
+
+    def __iter__(self) -> Iterator[str]:
+        yield self.header
+        for token in self._tokens:
+            self._first_token()
+            self._parts.append(token)
+            yield token
+        self._finish()
+        yield self.footer
+
+
+class AsyncResponseStream(ResponseStream):
+    """
+    Async iterator variant of `ResponseStream`.
+
+    The token iterator is blocking (llama_index streams through a sync
+    generator), so each step is pulled on `executor`. When `limiter` is
+    given it is held while tokens are being produced.
+    """
+
+    def __init__(
+        self,
+        header: str,
+        tokens: Iterator[str],
+        footer: str,
+        executor: Optional[Executor] = None,
+        limiter: Optional[asyncio.Semaphore] = None,
+        on_complete: Optional[Callable[[str, float], None]] = None
+    ):
+        super().__init__(header, tokens, footer, on_complete)
+        self._executor = executor
+        self._limiter = limiter
+
+    def __iter__(self):
+        raise TypeError("AsyncResponseStream must be consumed with 'async for'")
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        yield self.header
+        async with self._limiter or nullcontext():
+            while True:
+                token = await loop.run_in_executor(self._executor, next, self._tokens, _DONE)
+                if token is _DONE:
+                    break
+                self._first_token()
+                self._parts.append(token)
+                yield token
+        self._finish()
+        yield self.footer
@@ -0,0 +1 @@
+from .server import RecommendationServer, run_server
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, Tuple, Union
+
+from ..config.settings import SERVER_HOST, SERVER_PORT
+from ..recommender.chatbot import MovieRecommendationBot
+from ..recommender.streaming import AsyncResponseStream
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    500: "Internal Server Error"
+}
+
+
+class RecommendationServer:
+    """
+    Minimal asyncio HTTP/1.1 front end for the chatbot's async API.
+
+    Routes:
+        GET  /health     -> {"status": "ok"}
+        GET  /metrics    -> Prometheus text exposition
+        GET  /metrics.json -> {"stages": {...}, "counters": {...}}
+        POST /recommend  {"query": str}                    -> {"response": str}
+        POST /recommend  {"query": str, "stream": true}    -> chunked text/plain
+        POST /recommend  {"query": str, "fast": true, "k": int, "genres": [str]} -> {"movies": [...]}
+        POST /chat       {"query": str, "session_id": str, "explain": bool} -> {"response": str, "session_id": str}
+        POST /similar    {"title": str, "explain": bool}   -> {"response": str}
+        POST /top        {"by": str, "k": int, "genre": str, "min_votes": float} -> {"movies": [...]}
+    """
+
+    def __init__(self, bot: MovieRecommendationBot, host: str = SERVER_HOST, port: int = SERVER_PORT):
+        self.bot = bot
+        self.host = host
+        self.port = port
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        method, path, _ = request_line.split(' ', 2)
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_BYTES:
+            raise OverflowError(length)
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), path.split('?', 1)[0], body
+
+    async def _route(
+        self,
+        method: str,
+        path: str,
+        body: bytes
+    ) -> Tuple[int, Union[Dict[str, Any], str, AsyncResponseStream]]:
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and path == '/metrics':
+            return 200, metrics.to_prometheus()
+        if method == 'GET' and path == '/metrics.json':
+            return 200, metrics.snapshot()
+        if method != 'POST' or path not in ('/recommend', '/chat', '/similar', '/top'):
+            return 404, {'error': f"No route for {method} {path}"}
+
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': "Body must be JSON"}
+
+        if path == '/recommend':
+            query = payload.get('query')
+            if not isinstance(query, str) or not query.strip():
+                return 400, {'error': "'query' is required"}
+            if payload.get('fast'):
+                genres = payload.get('genres')
+                if genres is not None and not isinstance(genres, list):
+                    return 400, {'error': "'genres' must be a list"}
+                movies = await self.bot.afast_recommendations(query, k=int(payload.get('k', 0)) or None, genres=genres)
+                return 200, {'movies': movies}
+            if payload.get('stream'):
+                return 200, await self.bot.astream_recommendation(query)
+            return 200, {'response': await self.bot.aget_recommendation(query)}
+
+        if path == '/chat':
+            query = payload.get('query')
+            if not isinstance(query, str) or not query.strip():
+                return 400, {'error': "'query' is required"}
+            # Without a session id the turn starts a new conversation.
+            session_id = payload.get('session_id') or uuid.uuid4().hex
+            if not isinstance(session_id, str):
+                return 400, {'error': "'session_id' must be a string"}
+            response = await self.bot.achat(query, session_id, bool(payload.get('explain', True)))
+            return 200, {'response': response, 'session_id': session_id}
+
+        if path == '/top':
+            try:
+                movies = self.bot.top_movies(
+                    by=payload.get('by', 'weighted_rating'),
+                    k=int(payload.get('k', 10)),
+                    genre=payload.get('genre'),
+                    min_votes=float(payload.get('min_votes', 0.0))
+                )
+            except (TypeError, ValueError) as e:
+                return 400, {'error': str(e)}
+            return 200, {'movies': movies}
+
+        title = payload.get('title')
+        if not isinstance(title, str) or not title.strip():
+            return 400, {'error': "'title' is required"}
+        response = await self.bot.aget_similar_movies(title, bool(payload.get('explain', False)))
+        return 200, {'response': response}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, path, body = await self._read_request(reader)
+                status, payload = await self._route(method, path, body)
+            except OverflowError:
+                status, payload = 413, {'error': "Request body too large"}
+            except (ValueError, asyncio.IncompleteReadError):
+                status, payload = 400, {'error': "Malformed request"}
+            except Exception as e:
+                logger.error(f"Error processing request: {e}")
+                status, payload = 500, {'error': "Internal error"}
+
+            if isinstance(payload, AsyncResponseStream):
+                await self._write_stream(writer, payload)
+                return
+
+            if isinstance(payload, str):
+                data, content_type = payload.encode(), "text/plain; version=0.0.4"
+            else:
+                data, content_type = json.dumps(payload).encode(), "application/json"
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, stream: AsyncResponseStream):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/plain; charset=utf-8\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        try:
+            async for chunk in stream:
+                data = chunk.encode()
+                if data:
+                    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    await writer.drain()
+        except Exception as e:
+            # Headers are already sent, so the error can only end the stream.
+            logger.error(f"Error streaming response: {e}")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        logger.info(f"Serving recommendations on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+def run_server(bot: MovieRecommendationBot, host: str = SERVER_HOST, port: int = SERVER_PORT):
+    """Serve the bot over HTTP until interrupted."""
+    asyncio.run(RecommendationServer(bot, host, port).serve_forever())
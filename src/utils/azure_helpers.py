@@ -1,6 +1,9 @@
 from typing import Dict
 import os
 from dotenv import load_dotenv
+from llama_index.llms import AzureOpenAI
+
+from ..config.settings import LLM_TIMEOUT_SECONDS
 
 def setup_azure_credentials() -> Dict[str, str]:
     """
@@ -53,4 +56,31 @@ def validate_azure_credentials(credentials: Dict[str, str]) -> bool:
         if not credentials[key]:
             raise ValueError(f"Empty {name} in Azure credentials")
             
-    return True
\ No newline at end of file
+    return True
+
+def create_azure_llm(credentials: Dict[str, str]) -> AzureOpenAI:
+    """
+    Create the Azure OpenAI LLM shared by all query engines.
+    
+    The underlying OpenAI clients are reused across calls, so every request
+    goes through one pooled HTTP connection set. Retries are left to
+    `retry_with_backoff` so they are not stacked on the client's own.
+    
+    Args:
+        credentials: Dictionary of Azure credentials
+        
+    Returns:
+        AzureOpenAI: Configured llama_index LLM
+    """
+    validate_azure_credentials(credentials)
+    
+    return AzureOpenAI(
+        model=credentials['AD_ENGINE'],
+        engine=credentials['AD_DEPLOYMENT_ID'],
+        api_key=credentials['AD_OPENAI_API_KEY'],
+        api_version=credentials['AD_OPENAI_API_VERSION'],
+        azure_endpoint=credentials['AD_OPENAI_API_BASE'],
+        reuse_client=True,
+        max_retries=0,
+        timeout=LLM_TIMEOUT_SECONDS
+    )
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+from llama_index.llms import LLM, CustomLLM, CompletionResponse, CompletionResponseGen, LLMMetadata
+from llama_index.llms.base import llm_completion_callback
+
+from ..config.settings import (
+    LLM_BACKEND,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_SECONDS,
+    SIMULATED_LLM_LATENCY
+)
+from .azure_helpers import create_azure_llm
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_TITLE_LINE = re.compile(r'^title: (.+)$', re.MULTILINE)
+
+
+class SimulatedLLM(CustomLLM):
+    """
+    Local LLM stand-in with configurable latency.
+
+    Answers by listing the movie titles found in the prompt's context, so
+    tests and load tests exercise the full pipeline without Azure.
+    """
+
+    latency: float = SIMULATED_LLM_LATENCY
+    token_latency: float = 0.0
+    failure_rate: float = 0.0
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SimulatedLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(context_window=4096, num_output=256, model_name="simulated")
+
+    def _answer(self, prompt: str) -> str:
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("Simulated LLM failure")
+        titles = _TITLE_LINE.findall(prompt)
+        if not titles:
+            return "I could not find any matching movies."
+        return "\n".join(f"{i}. {title} - matches the request." for i, title in enumerate(titles, 1))
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        time.sleep(self.latency)
+        return CompletionResponse(text=self._answer(prompt))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        time.sleep(self.latency)
+        answer = self._answer(prompt)
+
+        def gen() -> CompletionResponseGen:
+            text = ""
+            for token in re.findall(r'\S+\s*', answer):
+                time.sleep(self.token_latency)
+                text += token
+                yield CompletionResponse(text=text, delta=token)
+
+        return gen()
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        await asyncio.sleep(self.latency)
+        return CompletionResponse(text=self._answer(prompt))
+
+
+def create_llm(credentials: Dict[str, str], backend: str = LLM_BACKEND) -> LLM:
+    """
+    Build the LLM used for response synthesis.
+
+    Args:
+        credentials: Azure OpenAI credentials
+        backend: 'azure' for Azure OpenAI or 'simulated' for the local stand-in
+
+    Returns:
+        A llama_index LLM shared by every query engine of the bot
+    """
+    if backend == 'azure':
+        return create_azure_llm(credentials)
+    if backend == 'simulated':
+        return SimulatedLLM()
+    raise ValueError(f"Unknown LLM backend '{backend}', expected 'azure' or 'simulated'")
+
+
+def _backoff_delay(attempt: int, base_delay: float) -> float:
+    return base_delay * (2 ** attempt) * (0.5 + random.random())
+
+
+def retry_with_backoff(
+    fn: Callable[[], T],
+    retries: int = LLM_MAX_RETRIES,
+    base_delay: float = LLM_BACKOFF_SECONDS
+) -> T:
+    """Call `fn`, retrying failures with jittered exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = _backoff_delay(attempt, base_delay)
+            logger.warning(f"LLM call failed ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+
+async def aretry_with_backoff(
+    fn: Callable[[], Awaitable[T]],
+    retries: int = LLM_MAX_RETRIES,
+    base_delay: float = LLM_BACKOFF_SECONDS
+) -> T:
+    """Async variant of `retry_with_backoff`."""
+    for attempt in range(retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = _backoff_delay(attempt, base_delay)
+            logger.warning(f"LLM call failed ({e}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
@@ -0,0 +1,234 @@
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+import numpy as np
+
+from ..config.settings import METRICS_ENABLED, METRICS_SAMPLE_SIZE
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Latency samples for one stage; percentiles come from the most recent `sample_size` observations."""
+
+    def __init__(self, sample_size: int = METRICS_SAMPLE_SIZE):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=sample_size)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def summary(self) -> Dict[str, float]:
+        values = np.fromiter(self.samples, dtype=float, count=len(self.samples))
+        quantiles = np.quantile(values, QUANTILES) if len(values) else [0.0] * len(QUANTILES)
+        summary = {'count': self.count, 'sum': self.total}
+        summary.update({f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, quantiles)})
+        return summary
+
+
+class _Timer:
+    __slots__ = ('registry', 'stage', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', stage: str):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    In-process stage timings, value distributions and counters.
+
+    When disabled, `timer` hands back a shared no-op context manager and
+    `increment`/`observe` return immediately, so instrumented code pays one
+    attribute check per call.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, sample_size: int = METRICS_SAMPLE_SIZE):
+        self.enabled = enabled
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._values: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+
+    def timer(self, stage: str):
+        """Context manager recording the wall time of a pipeline stage."""
+        return _Timer(self, stage) if self.enabled else _NULL_TIMER
+
+    def timed(self, stage: str) -> Callable[[F], F]:
+        """Decorator form of `timer`."""
+        def decorator(fn: F) -> F:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Timer(self, stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.sample_size)
+            histogram.observe(seconds)
+
+    def record(self, name: str, value: float):
+        """Add a sample to a non-latency distribution, such as prompt size in tokens."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._values.get(name)
+            if histogram is None:
+                histogram = self._values[name] = Histogram(self.sample_size)
+            histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._values.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view of every stage summary, value distribution and counter."""
+        with self._lock:
+            return {
+                'stages': {stage: h.summary() for stage, h in sorted(self._histograms.items())},
+                'values': {name: h.summary() for name, h in sorted(self._values.items())},
+                'counters': dict(sorted(self._counters.items()))
+            }
+
+    def to_prometheus(self, prefix: str = "movie_bot") -> str:
+        """Render the snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall time per pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds summary"
+        ]
+        for stage, summary in snapshot['stages'].items():
+            for q in QUANTILES:
+                value = summary[f"p{int(q * 100)}"]
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {summary["sum"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {summary["count"]}')
+
+        for name, summary in snapshot['values'].items():
+            lines.append(f"# TYPE {prefix}_{name} summary")
+            for q in QUANTILES:
+                lines.append(f'{prefix}_{name}{{quantile="{q}"}} {summary[f"p{int(q * 100)}"]:g}')
+            lines.append(f"{prefix}_{name}_sum {summary['sum']:g}")
+            lines.append(f"{prefix}_{name}_count {summary['count']}")
+
+        for name, value in snapshot['counters'].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+timer = metrics.timer
+timed = metrics.timed
+
+
+@dataclass
+class ProfileResult:
+    mode: str
+    seconds: float = 0.0
+    peak_bytes: Optional[int] = None
+    report: str = ""
+
+
+@contextmanager
+def profile(mode: str = 'cprofile', limit: int = 20) -> Iterator[ProfileResult]:
+    """
+    Profile a single request.
+
+    Args:
+        mode: 'cprofile' for a cumulative-time call profile or 'tracemalloc'
+            for peak memory and the top allocation sites
+        limit: Number of functions or allocation sites in the report
+
+    Yields:
+        A ProfileResult whose fields are filled in when the block exits
+    """
+    if mode not in ('cprofile', 'tracemalloc'):
+        raise ValueError(f"Unknown profile mode '{mode}', expected 'cprofile' or 'tracemalloc'")
+
+    result = ProfileResult(mode)
+    start = time.perf_counter()
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            result.seconds = time.perf_counter() - start
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+            result.report = out.getvalue()
+        return
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield result
+    finally:
+        result.seconds = time.perf_counter() - start
+        after = tracemalloc.take_snapshot()
+        result.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if not was_tracing:
+            tracemalloc.stop()
+        top = after.compare_to(before, 'lineno')[:limit]
+        result.report = f"Peak traced memory: {result.peak_bytes / 1024 / 1024:.1f} MiB\n"
+        result.report += "\n".join(str(stat) for stat in top)
@@ -0,0 +1,59 @@
+import functools
+
+import pytest
+
+from benchmarks.fakes import create_service_context
+from benchmarks.synthetic import write_movies_csv
+from src.data.data_loader import MovieDataLoader
+from src.recommender import chatbot as chatbot_module
+from src.recommender.chatbot import MovieRecommendationBot
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    csv_path = write_movies_csv(tmp_path / "movies.csv", 300, seed=0)
+    loader = MovieDataLoader(data_file=str(csv_path), use_cache=False)
+    df, documents = loader.load_and_preprocess()
+    monkeypatch.setattr(chatbot_module, 'MovieVectorStore', functools.partial(
+        chatbot_module.MovieVectorStore,
+        search_cache_bytes=0,
+        use_embedding_cache=False,
+        index_dir=tmp_path / "index",
+        n_shards=0
+    ))
+    bot = MovieRecommendationBot(
+        documents=documents,
+        movie_data=df,
+        catalog=loader.catalog,
+        azure_credentials={},
+        service_context=create_service_context(0.0)
+    )
+    yield bot
+    bot.cleanup()
+
+
+def test_new_requests_are_served_from_the_response_cache(bot):
+    first = bot.stream_chat("a heist on a frozen lake", "a")
+    text = "".join(first)
+    assert first.time_to_first_token is not None
+
+    # Another conversation, the same request: served whole from the cache,
+    # which unconstrained requests share with `get_recommendation`.
+    assert list(bot.stream_chat("a heist on a frozen lake", "b")) == ["", text, ""]
+    assert bot.get_recommendation("a heist on a frozen lake") == text
+
+
+def test_cached_responses_are_keyed_on_constraints(bot):
+    short = "".join(bot.stream_chat("a heist on a frozen lake under 90 minutes", "a"))
+    assert list(bot.stream_chat("a heist on a frozen lake under 90 minutes", "b")) == ["", short, ""]
+
+    unconstrained = bot.stream_chat("a heist on a frozen lake", "c")
+    assert list(unconstrained)[0] != ""
+
+
+def test_follow_ups_are_not_cached(bot):
+    "".join(bot.stream_chat("a heist on a frozen lake", "a"))
+    entries = bot.response_cache.stats()['entries']
+    follow_up = bot.stream_chat("only ones rated above 7", "a")
+    assert list(follow_up)[0] != ""
+    assert bot.response_cache.stats()['entries'] == entries
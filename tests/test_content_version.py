@@ -0,0 +1,48 @@
+import pytest
+
+from benchmarks.fakes import create_service_context
+from benchmarks.synthetic import write_movies_csv
+from src.data.data_loader import MovieDataLoader
+from src.indexing.vector_store import MovieVectorStore
+
+
+@pytest.fixture(scope="module")
+def documents(tmp_path_factory):
+    csv_path = write_movies_csv(tmp_path_factory.mktemp("data") / "movies.csv", 300, seed=0)
+    _, documents = MovieDataLoader(data_file=str(csv_path), use_cache=False).load_and_preprocess()
+    return documents[:200]
+
+
+@pytest.fixture(scope="module")
+def service_context():
+    return create_service_context(0.0)
+
+
+def open_store(index_dir, service_context, documents=None) -> MovieVectorStore:
+    store = MovieVectorStore(
+        search_cache_bytes=0,
+        service_context=service_context,
+        use_embedding_cache=False,
+        index_dir=index_dir,
+        n_shards=0,
+        compaction_threshold=10**9
+    )
+    store.initialize_index(documents)
+    return store
+
+
+def test_content_version_survives_restart_and_tracks_changes(tmp_path, documents, service_context):
+    store = open_store(tmp_path, service_context, documents)
+    version = store.content_version
+    assert open_store(tmp_path, service_context).content_version == version
+
+    store.delete_documents([documents[0].id_])
+    updated = store.content_version
+    assert updated != version
+    # Replaying the log on load restores the same version.
+    assert open_store(tmp_path, service_context).content_version == updated
+
+    store.compact()
+    compacted = store.content_version
+    assert compacted != updated
+    assert open_store(tmp_path, service_context).content_version == compacted
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from llama_index import Document
+
+from benchmarks.fakes import create_service_context
+from benchmarks.synthetic import write_movies_csv
+from src.data.data_loader import MovieDataLoader
+from src.indexing.document_store import DocumentStore
+from src.indexing.vector_store import MovieVectorStore
+
+
+@pytest.fixture(scope="module")
+def documents(tmp_path_factory):
+    csv_path = write_movies_csv(tmp_path_factory.mktemp("data") / "movies.csv", 300, seed=0)
+    _, documents = MovieDataLoader(data_file=str(csv_path), use_cache=False).load_and_preprocess()
+    return documents[:200]
+
+
+@pytest.fixture
+def service_context():
+    return create_service_context(0.0)
+
+
+def open_store(index_dir, service_context, documents=None) -> MovieVectorStore:
+    store = MovieVectorStore(
+        search_cache_bytes=0,
+        service_context=service_context,
+        use_embedding_cache=False,
+        index_dir=index_dir,
+        n_shards=0,
+        compaction_threshold=10**9
+    )
+    store.initialize_index(documents)
+    return store
+
+
+def test_missing_title_keeps_the_document_hash(tmp_path, documents):
+    doc = documents[0].copy()
+    doc.metadata = {**doc.metadata, 'title': float('nan')}
+    store = DocumentStore.from_documents([doc])
+    store.save(tmp_path / "documents")
+
+    loaded = DocumentStore.load(tmp_path / "documents")
+    assert loaded.get(doc.id_).hash == doc.hash
+    assert loaded.title(loaded.position(doc.id_)) == ""
+
+
+def test_retrieved_nodes_come_from_the_document_store(tmp_path, service_context, documents):
+    store = open_store(tmp_path, service_context, documents)
+    changed = Document(id_=documents[1].id_, text="pirates sail across the stars", metadata=documents[1].metadata)
+    store.update_documents([changed])
+    store.compact()
+
+    store = open_store(tmp_path, service_context)
+    node = store.retrieve_batch(["pirates sail across the stars"], 1)[0][0].node
+    assert node.ref_doc_id == changed.id_
+    assert node.text == changed.text
+    assert node.metadata == changed.metadata
+    assert json.loads((store.index_path / "docstore.json").read_text()) == {}
+
+
+@pytest.mark.parametrize("prefix", ["", "tt"])
+def test_upsert_delete_and_compact_round_trip(tmp_path, documents, prefix):
+    # Numeric ids use the dense position table, others the dict.
+    docs = [Document(id_=prefix + doc.id_, text=doc.text, metadata=doc.metadata) for doc in documents[:20]]
+    store = DocumentStore.from_documents(docs)
+    edited = Document(id_=docs[3].id_, text="An edited overview.", metadata=docs[3].metadata)
+    added = Document(id_=prefix + "999", text="A new movie.", metadata=docs[0].metadata)
+
+    changed = store.upsert([edited, added]).delete([docs[5].id_, prefix + "unknown"])
+    expected = {doc.id_: doc for doc in docs if doc.id_ != docs[5].id_}
+    expected.update({edited.id_: edited, added.id_: added})
+
+    # The original store is untouched.
+    assert len(store) == len(docs)
+    assert store.get(docs[3].id_).hash == docs[3].hash
+    assert store.get(docs[5].id_) is not None
+
+    changed.save(tmp_path / "documents")
+    for result in (changed, changed.compacted(), DocumentStore.load(tmp_path / "documents")):
+        assert len(result) == len(expected)
+        assert sorted(result.ids()) == sorted(expected)
+        assert docs[5].id_ not in result
+        for doc_id, doc in expected.items():
+            assert result.get(doc_id).hash == doc.hash
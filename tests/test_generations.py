@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from llama_index import ServiceContext
+
+from benchmarks.fakes import HashingEmbedding, create_service_context
+from benchmarks.synthetic import write_movies_csv
+from src.data.data_loader import MovieDataLoader
+from src.indexing.vector_store import MovieVectorStore
+from src.utils.llm import SimulatedLLM
+
+
+class ShiftedEmbedding(HashingEmbedding):
+    """Consistent with itself, but not with `HashingEmbedding`."""
+
+    def _embed(self, texts):
+        return np.roll(np.asarray(super()._embed(texts)), 1, axis=1).tolist()
+
+
+@pytest.fixture(scope="module")
+def documents(tmp_path_factory):
+    csv_path = write_movies_csv(tmp_path_factory.mktemp("data") / "movies.csv", 300, seed=0)
+    _, documents = MovieDataLoader(data_file=str(csv_path), use_cache=False).load_and_preprocess()
+    return documents[:200]
+
+
+@pytest.fixture
+def service_context():
+    return create_service_context(0.0)
+
+
+def open_store(index_dir, service_context, documents=None) -> MovieVectorStore:
+    store = MovieVectorStore(
+        search_cache_bytes=0,
+        service_context=service_context,
+        use_embedding_cache=False,
+        index_dir=index_dir,
+        n_shards=0,
+        compaction_threshold=10**9
+    )
+    store.initialize_index(documents)
+    return store
+
+
+def test_rebuild_swaps_in_a_valid_generation(tmp_path, service_context, documents):
+    store = open_store(tmp_path, service_context, documents[:80])
+    store.rebuild(documents, wait=True)
+
+    assert store.rebuild_status['state'] == 'swapped'
+    assert store.rebuild_status['sample_recall'] == 1.0
+    assert len(store.documents) == len(documents)
+    assert len(open_store(tmp_path, service_context).documents) == len(documents)
+
+
+def test_generation_disagreeing_with_the_live_one_is_rejected(tmp_path, service_context, documents):
+    store = open_store(tmp_path / "live", service_context, documents)
+    shifted = ServiceContext.from_defaults(embed_model=ShiftedEmbedding(), llm=SimulatedLLM())
+    builder = open_store(tmp_path / "candidate", shifted, documents)
+
+    with pytest.raises(ValueError, match="recall"):
+        store.validate_generation(builder, documents)
+
+
+def test_changed_documents_do_not_count_against_recall(tmp_path, service_context, documents):
+    store = open_store(tmp_path / "live", service_context, documents)
+    changed = [doc.copy() for doc in documents]
+    for doc in changed[:100]:
+        doc.text = "completely different words " + doc.id_
+    builder = open_store(tmp_path / "candidate", service_context, changed)
+
+    assert store.validate_generation(builder, changed)['sample_recall'] == 1.0
+
+
+def test_failed_rebuild_keeps_the_live_generation(tmp_path, service_context, documents):
+    store = open_store(tmp_path, service_context, documents)
+    store.rebuild(documents[:50], wait=True)
+
+    assert store.rebuild_status['state'] == 'failed'
+    assert "shrink" in store.rebuild_status['error']
+    assert len(store.documents) == len(documents)
+
+
+def test_updates_during_a_rebuild_are_carried_over(tmp_path, service_context, documents, monkeypatch):
+    store = open_store(tmp_path, service_context, documents)
+    edited = documents[0].copy()
+    edited.text = "Rewritten while the new generation was being built."
+    validate = MovieVectorStore.validate_generation
+
+    def validate_then_update(self, builder, docs):
+        report = validate(self, builder, docs)
+        self.update_documents([edited])
+        self.delete_documents([documents[1].id_])
+        return report
+
+    monkeypatch.setattr(MovieVectorStore, 'validate_generation', validate_then_update)
+    store.rebuild(documents, wait=True)
+    assert store.rebuild_status['state'] == 'swapped'
+
+    for swapped in (store, open_store(tmp_path, service_context)):
+        assert swapped.index_path.parent.name == "generations"
+        assert swapped.get_document(edited.id_).hash == edited.hash
+        assert documents[1].id_ not in swapped.documents
+        assert swapped.retrieve_batch([edited.text], 1)[0][0].node.ref_doc_id == edited.id_
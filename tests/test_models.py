@@ -0,0 +1,31 @@
+import pytest
+
+from src.models import BaseMovie, CatalogMovie, Movie, MovieCatalog
+
+RECORD = dict(
+    id='1', title='Heat', genres=['Crime'], overview='A heist.', budget=60e6, revenue=187e6,
+    runtime=170.0, vote_average=7.7, vote_count=3000.0, popularity=17.0
+)
+ORIGINAL_KEYS = list(RECORD) + ['collection', 'original_language', 'adult', 'roi', 'popularity_score']
+
+
+def test_movie_is_a_mutable_record():
+    movie = Movie(**RECORD)
+    movie.budget = 0
+    assert movie.roi == 0.0
+    assert list(movie.to_dict()) == ORIGINAL_KEYS
+    assert Movie.from_dict(movie.to_dict()) == movie
+
+
+def test_catalog_movie_reads_catalog_scores():
+    catalog = MovieCatalog.from_records([Movie(**RECORD).to_dict(), {**RECORD, 'id': '2', 'vote_count': 10.0}])
+    view = catalog.movie(0)
+    assert isinstance(view, CatalogMovie) and isinstance(view, BaseMovie) and not isinstance(view, Movie)
+    assert view.to_dict() == pytest.approx(Movie(**RECORD).to_dict())
+    assert view.weighted_rating == catalog.columns['weighted_rating'][0]
+    with pytest.raises(AttributeError):
+        view.budget = 1.0
+
+    dicts = BaseMovie.to_dicts([Movie(**RECORD), view])
+    assert dicts[1] == catalog.to_dicts([0])[0]
+    assert set(dicts[0]) == set(dicts[1]) == set(ORIGINAL_KEYS) | {'is_successful', 'weighted_rating'}
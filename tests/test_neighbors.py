@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pytest
+from llama_index import ServiceContext
+
+from benchmarks.fakes import HashingEmbedding, create_service_context
+from benchmarks.synthetic import write_movies_csv
+from src.data.data_loader import MovieDataLoader
+from src.indexing.neighbors import NeighborGraph, compute_neighbors
+from src.indexing.vector_store import NEIGHBORS_DIR, MovieVectorStore
+from src.utils.llm import SimulatedLLM
+
+
+@pytest.fixture(scope="module")
+def documents(tmp_path_factory):
+    csv_path = write_movies_csv(tmp_path_factory.mktemp("data") / "movies.csv", 300, seed=0)
+    _, documents = MovieDataLoader(data_file=str(csv_path), use_cache=False).load_and_preprocess()
+    return documents[:200]
+
+
+def open_store(index_dir, service_context, documents=None) -> MovieVectorStore:
+    store = MovieVectorStore(
+        search_cache_bytes=0,
+        service_context=service_context,
+        use_embedding_cache=False,
+        index_dir=index_dir,
+        n_shards=0,
+        compaction_threshold=10**9
+    )
+    store.initialize_index(documents)
+    return store
+
+
+def test_compute_neighbors_matches_exact_search():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 8)).astype('float32')
+    ids, scores = compute_neighbors(vectors, 5, max_block_bytes=1024)
+
+    sims = vectors @ vectors.T
+    np.fill_diagonal(sims, -np.inf)
+    expected = np.argsort(-sims, axis=1)[:, :5]
+    assert np.array_equal(ids, expected)
+    # Scores are stored as float16.
+    assert np.allclose(scores, np.take_along_axis(sims, expected, axis=1), rtol=1e-2)
+
+
+def test_saved_graph_is_reused_only_for_the_same_index(tmp_path, documents):
+    service_context = create_service_context(0.0)
+    store = open_store(tmp_path, service_context, documents)
+    store.build_neighbor_graph()
+    assert open_store(tmp_path, service_context).neighbor_graph is not None
+
+    meta_path = tmp_path / NEIGHBORS_DIR / "meta.json"
+    meta = json.loads(meta_path.read_text())
+    meta['key']['embedding_model'] = "another-model"
+    meta_path.write_text(json.dumps(meta))
+    assert open_store(tmp_path, service_context).neighbor_graph is None
+
+
+def test_new_embedding_model_drops_the_graph(tmp_path, documents):
+    open_store(tmp_path, create_service_context(0.0), documents).build_neighbor_graph()
+
+    other = ServiceContext.from_defaults(embed_model=HashingEmbedding(model_name="hashing-v2"), llm=SimulatedLLM())
+    open_store(tmp_path, other, documents)
+    assert not (tmp_path / NEIGHBORS_DIR).exists()
+    assert open_store(tmp_path, other).neighbor_graph is None
+
+
+def test_graph_key_tracks_row_order(tmp_path, documents):
+    store = open_store(tmp_path, create_service_context(0.0), documents)
+    graph = store.build_neighbor_graph()
+    assert graph.key == store.neighbor_graph_key()
+    assert NeighborGraph.load(tmp_path / NEIGHBORS_DIR).key == graph.key
+
+    store._row_node_ids = list(reversed(store.row_node_ids))
+    assert store.neighbor_graph_key() != graph.key
+
+
+def test_update_drops_the_graph_in_memory(tmp_path, documents):
+    store = open_store(tmp_path, create_service_context(0.0), documents)
+    store.build_neighbor_graph()
+    doc_id = documents[0].id_
+    neighbor = store.similar_nodes(doc_id, 1)[0].node.ref_doc_id
+
+    store.delete_documents([neighbor])
+    assert store.neighbor_graph is None
+    assert neighbor not in [node.node.ref_doc_id for node in store.similar_nodes(doc_id, 5)]
@@ -0,0 +1,18 @@
+import pytest
+
+from src.recommender.refinement import genre_aliases, parse_refinement
+
+ALIASES = genre_aliases(['Horror', 'Comedy', 'Drama'])
+
+
+@pytest.mark.parametrize("text, genres, excluded", [
+    ("no horror or comedy", set(), {'Horror', 'Comedy'}),
+    ("without horror, comedy and drama", set(), {'Horror', 'Comedy', 'Drama'}),
+    ("no horror but comedy", {'Comedy'}, {'Horror'}),
+    ("comedy without horror", {'Comedy'}, {'Horror'}),
+    ("horror or comedy", {'Horror', 'Comedy'}, set()),
+])
+def test_negation_covers_genre_list(text, genres, excluded):
+    refinement = parse_refinement(text, ALIASES)
+    assert refinement.genres == genres
+    assert refinement.exclude_genres == excluded
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from llama_index import Document
+
+from benchmarks.fakes import create_service_context
+from benchmarks.synthetic import write_movies_csv
+from src.data.data_loader import MovieDataLoader
+from src.indexing.search_cache import SearchCache
+from src.indexing.vector_store import MovieVectorStore
+
+
+@pytest.fixture(scope="module")
+def documents(tmp_path_factory):
+    csv_path = write_movies_csv(tmp_path_factory.mktemp("data") / "movies.csv", 300, seed=0)
+    _, documents = MovieDataLoader(data_file=str(csv_path), use_cache=False).load_and_preprocess()
+    return documents[:200]
+
+
+@pytest.fixture
+def service_context():
+    return create_service_context(0.0)
+
+
+def open_store(index_dir, service_context, documents=None) -> MovieVectorStore:
+    store = MovieVectorStore(
+        search_cache_bytes=1 << 20,
+        service_context=service_context,
+        use_embedding_cache=False,
+        index_dir=index_dir,
+        n_shards=0,
+        compaction_threshold=10**9
+    )
+    store.initialize_index(documents)
+    return store
+
+
+def cached_search(store: MovieVectorStore, text: str, k: int = 5):
+    query = np.asarray(store.embed_query(text), dtype='float32')
+    scores, rows = store.search(query, k, backend='flat')
+    return [store.row_doc_ids[row] for row in rows]
+
+
+def test_cache_evicts_least_recently_used_within_budget():
+    entry = (np.zeros(4, dtype='float32'), np.arange(4))
+    size = entry[0].nbytes + entry[1].nbytes + 256
+    cache = SearchCache(2 * size)
+    cache.put("a", *entry)
+    cache.put("b", *entry)
+    assert cache.get("a") is not None
+    cache.put("c", *entry)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.bytes_used <= cache.max_bytes
+    scores, _ = cache.get("a")
+    with pytest.raises(ValueError):
+        scores[0] = 1.0
+
+
+def test_updates_invalidate_cached_searches(tmp_path, service_context, documents):
+    store = open_store(tmp_path, service_context, documents)
+    query = "submarine captain mutiny"
+    before = cached_search(store, query)
+    assert cached_search(store, query) == before
+    assert store.search_cache.hits == 1
+
+    store.update_documents([Document(id_="500", text="A submarine captain faces a mutiny.", metadata=documents[0].metadata)])
+    assert cached_search(store, query)[0] == "500"
+
+    store.delete_documents(["500", before[0]])
+    after = cached_search(store, query)
+    assert "500" not in after and before[0] not in after
+
+
+def test_rebuild_invalidates_cached_searches(tmp_path, service_context, documents):
+    store = open_store(tmp_path, service_context, documents[:80])
+    query = documents[90].text
+    assert documents[90].id_ not in cached_search(store, query)
+
+    store.rebuild(documents, wait=True)
+    assert store.rebuild_status['state'] == 'swapped'
+    assert cached_search(store, query)[0] == documents[90].id_
@@ -0,0 +1,110 @@
+import pytest
+from llama_index import Document
+
+from benchmarks.fakes import create_service_context
+from benchmarks.synthetic import write_movies_csv
+from src.data.data_loader import MovieDataLoader
+from src.indexing.update_log import UpdateLog, delete_record
+from src.indexing.vector_store import MovieVectorStore
+
+
+@pytest.fixture(scope="module")
+def documents(tmp_path_factory):
+    csv_path = write_movies_csv(tmp_path_factory.mktemp("data") / "movies.csv", 300, seed=0)
+    _, documents = MovieDataLoader(data_file=str(csv_path), use_cache=False).load_and_preprocess()
+    return documents[:200]
+
+
+@pytest.fixture(scope="module")
+def service_context():
+    return create_service_context(0.0)
+
+
+def open_store(index_dir, service_context, documents=None) -> MovieVectorStore:
+    store = MovieVectorStore(
+        search_cache_bytes=0,
+        service_context=service_context,
+        use_embedding_cache=False,
+        index_dir=index_dir,
+        n_shards=0,
+        compaction_threshold=10**9
+    )
+    store.initialize_index(documents)
+    return store
+
+
+def test_advance_numbers_records_after_snapshot(tmp_path):
+    log = UpdateLog(tmp_path / "updates.log")
+    log.append([delete_record("1"), delete_record("2")])
+    log.truncate(log.last_seq)
+
+    reopened = UpdateLog(tmp_path / "updates.log")
+    reopened.advance(2)
+    reopened.append([delete_record("3")])
+    assert [record['id'] for record in reopened.read(2)] == ["3"]
+
+
+def test_upsert_after_compaction_survives_crash(tmp_path, documents, service_context):
+    store = open_store(tmp_path, service_context, documents)
+    store.delete_documents([documents[0].id_, documents[1].id_])
+    assert store.compact()
+
+    restarted = open_store(tmp_path, service_context)
+    template = documents[2]
+    restarted.update_documents([Document(id_="200", text="A new movie added after compaction.", metadata=template.metadata)])
+
+    # No cleanup: the process dies with the upsert only in the log.
+    recovered = open_store(tmp_path, service_context)
+    assert "200" in recovered.documents
+    assert documents[0].id_ not in recovered.documents
+    assert recovered.update_log.last_seq > 2
+
+
+def test_compaction_drops_the_neighbour_graph(tmp_path, documents, service_context):
+    store = open_store(tmp_path, service_context, documents)
+    store.build_neighbor_graph()
+    edited = [Document(id_=doc.id_, text=doc.text + " (director's cut)", metadata=doc.metadata) for doc in documents[:10]]
+    store.update_documents(edited)
+    assert store.compact()
+    store.update_documents(documents[:10])
+    assert store.compact()
+
+    # Same corpus hash as when the graph was built, but the rows moved.
+    reopened = open_store(tmp_path, service_context)
+    assert reopened.neighbor_graph is None
+    doc_id = documents[0].id_
+    row = reopened.doc_rows[doc_id][0]
+    _, rows = reopened.search(reopened.index_configs['flat'].reconstruct(row), 4, backend='flat')
+    expected = [reopened.row_doc_ids[r] for r in rows if reopened.row_doc_ids[r] != doc_id][:3]
+    assert [node.node.ref_doc_id for node in reopened.similar_nodes(doc_id, 3)] == expected
+
+
+def test_startup_check_includes_logged_changes(tmp_path, documents, service_context):
+    store = open_store(tmp_path, service_context, documents)
+    store.delete_documents([documents[0].id_])
+
+    # The snapshot still matches `documents`, but the index after replay does not.
+    restarted = open_store(tmp_path, service_context, documents)
+    assert documents[0].id_ in restarted.documents
+    assert len(restarted.update_log) == 0
+
+    restarted.delete_documents([documents[0].id_])
+    reused = open_store(tmp_path, service_context, documents[1:])
+    assert documents[0].id_ not in reused.documents
+    assert len(reused.update_log) == 1
+
+
+def test_compaction_drops_dead_rows_and_keeps_results(tmp_path, documents, service_context):
+    store = open_store(tmp_path, service_context, documents)
+    store.update_documents([Document(id_=documents[0].id_, text="A heist on a frozen lake.", metadata=documents[0].metadata)])
+    store.delete_documents([documents[1].id_])
+    queries = ["heist frozen lake", documents[5].text]
+    before = [[n.node.ref_doc_id for n in nodes] for nodes in store.retrieve_batch(queries, 5)]
+
+    assert store.compact()
+    assert store.index_configs['flat'].ntotal == len(documents) - 1
+    assert not store.dead_rows
+    assert len(store.update_log) == 0
+    for compacted in (store, open_store(tmp_path, service_context)):
+        assert [[n.node.ref_doc_id for n in nodes] for nodes in compacted.retrieve_batch(queries, 5)] == before
+        assert documents[1].id_ not in compacted.documents